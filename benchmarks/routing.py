@@ -0,0 +1,292 @@
+"""
+Routing and dispatch micro-benchmarks.
+
+Builds synthetic route tables of several sizes, then times route lookups,
+reverse() and full request round-trips through both the WSGI entry point
+(`SpiderwebRouter.__call__`) and the ASGI handler. Everything runs
+in-process; no sockets are opened.
+
+Results are written as JSON so two runs can be compared:
+
+    python -m benchmarks.routing --output before.json
+    git checkout my-branch
+    python -m benchmarks.routing --output after.json --compare before.json
+
+To measure a commit from before this script existed, copy the script somewhere
+else first and run it with that checkout on PYTHONPATH.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from wsgiref.util import setup_testing_defaults
+
+from spiderweb import SpiderwebRouter
+from spiderweb.constants import __version__
+from spiderweb.response import HttpResponse
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000)
+
+# Each route in a table is one of these; they're handed out round-robin so
+# every table has the same mix.
+ROUTE_KINDS = ("static", "int", "str", "path", "custom")
+
+
+class SlugConverter:
+    regex = r"[-a-z0-9_]+"
+    name = "slug"
+
+    def to_python(self, value):
+        return str(value)
+
+
+def view(request, **kwargs):
+    return HttpResponse("ok")
+
+
+def route_for(kind: str, i: int) -> tuple[str, str, dict]:
+    """Return the route path, a URL that hits it, and its reverse() kwargs."""
+    if kind == "static":
+        return f"/static{i}/page", f"/static{i}/page", {}
+    if kind == "int":
+        return f"/items{i}/<int:item_id>", f"/items{i}/42", {"item_id": 42}
+    if kind == "str":
+        return f"/users{i}/<str:name>", f"/users{i}/joe", {"name": "joe"}
+    if kind == "path":
+        return f"/files{i}/<path:rest>", f"/files{i}/a/b/c.txt", {"rest": "a/b/c.txt"}
+    return f"/posts{i}/<slug:slug>", f"/posts{i}/hello-world", {"slug": "hello-world"}
+
+
+def build_app(size: int) -> tuple[SpiderwebRouter, list[tuple[str, str, dict]]]:
+    """
+    Make an app with `size` routes. Returns the app and a list of
+    (route name, url, reverse kwargs) targets spread across the table, one
+    per route kind near the start, middle and end.
+    """
+    log = logging.getLogger("spiderweb.benchmarks")
+    log.setLevel(logging.ERROR)
+    app = SpiderwebRouter(db="sqlite://", log=log)
+    app.register_converter(SlugConverter)
+
+    routes = []
+    for i in range(size):
+        kind = ROUTE_KINDS[i % len(ROUTE_KINDS)]
+        path, url, kwargs = route_for(kind, i)
+        app.add_route(path, view, name=f"route_{i}")
+        routes.append((f"route_{i}", url, kwargs))
+
+    targets = []
+    for start in {0, size // 2, max(size - len(ROUTE_KINDS), 0)}:
+        targets.extend(routes[start : start + len(ROUTE_KINDS)])
+    # older versions compile routes lazily and don't have freeze_routes()
+    if freeze_routes := getattr(app, "freeze_routes", None):
+        freeze_routes()
+    return app, targets
+
+
+def make_environ(url: str) -> dict:
+    environ = {}
+    setup_testing_defaults(environ)
+    environ["PATH_INFO"] = url
+    return environ
+
+
+def make_scope(url: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url,
+        "raw_path": url.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 8000),
+    }
+
+
+def best_ns_per_op(run, ops: int, repeat: int) -> float:
+    """Call `run()` `repeat` times and return the fastest time per op in ns."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        run()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / ops
+
+
+def bench_get_route(app, targets, number: int, repeat: int) -> float:
+    urls = [url for _, url, _ in targets]
+    get_route = app.get_route
+
+    def run():
+        for _ in range(number):
+            for url in urls:
+                get_route(url)
+
+    return best_ns_per_op(run, number * len(urls), repeat)
+
+
+def bench_reverse(app, targets, number: int, repeat: int) -> float:
+    reverse = app.reverse
+
+    def run():
+        for _ in range(number):
+            for name, _, kwargs in targets:
+                reverse(name, kwargs)
+
+    return best_ns_per_op(run, number * len(targets), repeat)
+
+
+def bench_wsgi(app, targets, number: int, repeat: int) -> float:
+    environs = [make_environ(url) for _, url, _ in targets]
+
+    def start_response(status, headers):
+        pass
+
+    def run():
+        for _ in range(number):
+            for environ in environs:
+                app(environ, start_response)
+
+    return best_ns_per_op(run, number * len(environs), repeat)
+
+
+def bench_asgi(app, targets, number: int, repeat: int) -> float:
+    handler = app.asgi_app
+    scopes = [make_scope(url) for _, url, _ in targets]
+    request_message = {"type": "http.request", "body": b"", "more_body": False}
+
+    async def receive():
+        return request_message
+
+    async def send(message):
+        pass
+
+    async def run_batch():
+        for _ in range(number):
+            for scope in scopes:
+                await handler(scope, receive, send)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return best_ns_per_op(
+            lambda: loop.run_until_complete(run_batch()),
+            number * len(scopes),
+            repeat,
+        )
+    finally:
+        loop.close()
+
+
+BENCHMARKS = {
+    "get_route": bench_get_route,
+    "reverse": bench_reverse,
+    "wsgi_round_trip": bench_wsgi,
+    "asgi_round_trip": bench_asgi,
+}
+
+
+def check_targets(app, targets) -> None:
+    # make sure we're timing real matches and not the 404 path
+    for name, url, kwargs in targets:
+        if app.reverse(name, kwargs) != url:
+            raise RuntimeError(f"{name} reversed to the wrong URL")
+        app.get_route(url)
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, number: int, repeat: int, only=None) -> dict:
+    results = []
+    for size in sizes:
+        app, targets = build_app(size)
+        check_targets(app, targets)
+        for name, bench in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            ns = bench(app, targets, number, repeat)
+            results.append({"benchmark": name, "routes": size, "ns_per_op": ns})
+            print(f"{name:>16} {size:>6} routes: {ns:>12.1f} ns/op", file=sys.stderr)
+    return {
+        "spiderweb": __version__,
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "number": number,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print how each benchmark moved between two result files."""
+    previous = {(r["benchmark"], r["routes"]): r["ns_per_op"] for r in old["results"]}
+    print(f"comparing {old.get('commit')} -> {new.get('commit')}", file=sys.stderr)
+    for result in new["results"]:
+        before = previous.get((result["benchmark"], result["routes"]))
+        if before is None:
+            continue
+        change = (result["ns_per_op"] - before) / before * 100
+        print(
+            f"{result['benchmark']:>16} {result['routes']:>6} routes: "
+            f"{before:>12.1f} -> {result['ns_per_op']:>12.1f} ns/op ({change:+.1f}%)",
+            file=sys.stderr,
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="route table sizes to test",
+    )
+    parser.add_argument(
+        "--number", type=int, default=200, help="passes over the targets per timing"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="timings per benchmark; the best is kept"
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS), help="only run these benchmarks"
+    )
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    data = run_benchmarks(args.sizes, args.number, args.repeat, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), data)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,163 @@
 import asyncio
-import io
+import contextlib
 import inspect
+import os
 import sys
 import traceback
 
-from spiderweb.constants import DEFAULT_ENCODING, DEFAULT_ALLOWED_METHODS
-from spiderweb.exceptions import NotFound, SpiderwebNetworkException
-from spiderweb.response import HttpResponse, JsonResponse, TemplateResponse
+from spiderweb.constants import (
+    ASGI_EXTENSIONS_KEY,
+    ASGI_HEADERS_KEY,
+    DEFAULT_ENCODING,
+    DEFAULT_ALLOWED_METHODS,
+    STREAM_CHUNK_SIZE,
+)
+from spiderweb.exceptions import (
+    NotFound,
+    RequestEntityTooLarge,
+    SpiderwebNetworkException,
+)
+from spiderweb.response import (
+    FileRange,
+    FileResponse,
+    HttpResponse,
+    JsonResponse,
+    TemplateResponse,
+)
+from spiderweb.routes import DEFAULT_BODY_SIZE
+from spiderweb.utils import ResponseHeaders
 
+# what the next-chunk helpers in _send_streaming return once the body is done
+_STREAM_DONE = object()
 
-def build_environ_from_asgi(scope: dict, body: bytes) -> dict:
-    """Convert an ASGI http scope + buffered body into a WSGI-compatible environ."""
+
+class ASGIRequestBody:
+    """
+    The `wsgi.input` for ASGI requests.
+
+    It either holds a body that was buffered before the view ran, or, for
+    views marked with `stream_request_body`, pulls chunks from `receive()` as
+    they're read. Iterate over it with `async for` on the event loop, or with
+    a plain `for` / `read()` from a sync view (which runs in a worker thread).
+    """
+
+    def __init__(self, body: bytes = b"", receive=None, loop=None, max_size=None):
+        self._data = body
+        self._pos = 0
+        self._receive = receive
+        self._loop = loop
+        self._max_size = max_size
+        self._received = len(body)
+        # whether there might still be chunks waiting in receive()
+        self._more = receive is not None
+
+    async def _receive_chunk(self) -> bytes:
+        while self._more:
+            msg = await self._receive()
+            if msg["type"] == "http.disconnect":
+                self._more = False
+                break
+            chunk = msg.get("body", b"")
+            self._more = msg.get("more_body", False)
+            self._received += len(chunk)
+            if self._max_size is not None and self._received > self._max_size:
+                self._more = False
+                raise RequestEntityTooLarge()
+            if chunk:
+                return chunk
+        return b""
+
+    def _take_buffered(self, size: int = -1) -> bytes:
+        if size < 0 or self._pos + size >= len(self._data):
+            data = self._data[self._pos :] if self._pos else self._data
+            self._data = b""
+            self._pos = 0
+            return data
+        data = self._data[self._pos : self._pos + size]
+        self._pos += size
+        return data
+
+    def _receive_chunk_from_thread(self) -> bytes:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            raise RuntimeError(
+                "The request body is still streaming and can't be read"
+                " synchronously from the event loop. Use"
+                " `async for chunk in request.stream()` or"
+                " `await request.read_body()` instead."
+            )
+        return asyncio.run_coroutine_threadsafe(
+            self._receive_chunk(), self._loop
+        ).result()
+
+    @property
+    def buffered_size(self) -> int:
+        """How many bytes can be read without waiting on the client."""
+        return len(self._data) - self._pos
+
+    def _buffer_at_least(self, size: int) -> None:
+        # only has to wait on the client while the body is still streaming
+        if not self._more or (size >= 0 and self.buffered_size >= size):
+            return
+        buffered = self.buffered_size
+        chunks = [self._take_buffered()]
+        while self._more and (size < 0 or buffered < size):
+            chunk = self._receive_chunk_from_thread()
+            chunks.append(chunk)
+            buffered += len(chunk)
+        self._data = b"".join(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        self._buffer_at_least(size)
+        return self._take_buffered(size)
+
+    def readinto(self, buffer) -> int:
+        """Copy up to len(buffer) bytes straight into `buffer`."""
+        self._buffer_at_least(len(buffer))
+        count = min(len(buffer), self.buffered_size)
+        memoryview(buffer)[:count] = memoryview(self._data)[
+            self._pos : self._pos + count
+        ]
+        self._pos += count
+        return count
+
+    async def fill(self) -> None:
+        """Receive the rest of the body so that `read()` never has to wait."""
+        if not self._more:
+            return
+        chunks = [self._take_buffered()]
+        while self._more:
+            chunks.append(await self._receive_chunk())
+        self._data = b"".join(chunks)
+
+    def __iter__(self):
+        while chunk := self.read(STREAM_CHUNK_SIZE):
+            yield chunk
+
+    async def __aiter__(self):
+        buffered = self._take_buffered()
+        if buffered:
+            yield buffered
+        while chunk := await self._receive_chunk():
+            yield chunk
+
+
+def get_content_length(scope: dict) -> int:
+    """The Content-Length the client sent, or 0 if it didn't send a usable one."""
+    for name, value in scope.get("headers", []):
+        if name.lower() == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def build_environ_from_asgi(scope: dict, body: bytes | ASGIRequestBody) -> dict:
+    """Convert an ASGI http scope + request body into a WSGI-compatible environ."""
     server = scope.get("server") or ("localhost", 8000)
     environ = {
         "REQUEST_METHOD": scope["method"].upper(),
@@ -20,13 +167,17 @@ def build_environ_from_asgi(scope: dict, body: bytes) -> dict:
         "SERVER_NAME": server[0],
         "SERVER_PORT": str(server[1]),
         "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
-        "wsgi.input": io.BytesIO(body),
+        "wsgi.input": (
+            body if isinstance(body, ASGIRequestBody) else ASGIRequestBody(body)
+        ),
         "wsgi.errors": sys.stderr,
         "wsgi.multithread": True,
         "wsgi.multiprocess": False,
         "wsgi.run_once": False,
         "wsgi.url_scheme": scope.get("scheme", "http"),
         "GATEWAY_INTERFACE": "CGI/1.1",
+        ASGI_HEADERS_KEY: scope.get("headers", []),
+        ASGI_EXTENSIONS_KEY: scope.get("extensions") or {},
     }
     for raw_name, raw_value in scope.get("headers", []):
         name = raw_name.decode("latin1").upper().replace("-", "_")
@@ -66,6 +217,8 @@ class ASGIHandler:
                             await cb()
                         else:
                             await asyncio.to_thread(cb)
+                    # routes added by startup hooks are in place now
+                    self._router.freeze_routes()
                     await send({"type": "lifespan.startup.complete"})
                 except Exception as e:
                     await send({"type": "lifespan.startup.failed", "message": str(e)})
@@ -84,48 +237,57 @@ class ASGIHandler:
 
     async def _handle_http(self, scope, receive, send) -> None:
         router = self._router
-        max_body = getattr(
-            router, "max_request_body_size", 10 * 1024 * 1024
-        )  # default 10 MB
-        # 1. Buffer request body (enforcing size limit to prevent memory exhaustion)
-        body = b""
-        while True:
-            msg = await receive()
-            body += msg.get("body", b"")
-            if max_body is not None and len(body) > max_body:
-                await send(
-                    {
-                        "type": "http.response.start",
-                        "status": 413,
-                        "headers": [
-                            (b"content-type", b"text/plain; charset=utf-8"),
-                            (b"connection", b"close"),
-                        ],
-                    }
-                )
-                await send(
-                    {
-                        "type": "http.response.body",
-                        "body": b"Request body too large",
-                        "more_body": False,
-                    }
-                )
-                return
-            if not msg.get("more_body", False):
-                break
-
-        # 2. Build environ and Request
-        environ = build_environ_from_asgi(scope, body)
+        if not router._routes_frozen:
+            router.freeze_routes()
+        # 1. Build environ and Request; the body is attached once we know the view
+        environ = build_environ_from_asgi(scope, b"")
         request = router.get_request(environ)
 
-        # 3. Route
+        # 2. Route
         try:
-            handler, url_kwargs, allowed_methods = router.get_route(request.path)
+            handler, url_kwargs, allowed_methods, route_max_body = (
+                router.get_request_handler(request)
+            )
         except NotFound:
             handler = router.get_error_route(404)
             url_kwargs = {}
             allowed_methods = DEFAULT_ALLOWED_METHODS
+            route_max_body = DEFAULT_BODY_SIZE
         request.handler = handler
+        max_body = router.get_max_body_size(route_max_body)
+
+        # 3. Buffer the request body (enforcing size limit to prevent memory
+        # exhaustion), unless the view wants to stream it. If the client told us
+        # up front that the body is too big, don't read any of it.
+        if max_body is not None and get_content_length(scope) > max_body:
+            await self._send_too_large(send)
+            return
+        if getattr(handler, "stream_request_body", False):
+            environ["wsgi.input"] = ASGIRequestBody(
+                receive=receive,
+                loop=asyncio.get_running_loop(),
+                max_size=max_body,
+            )
+        else:
+            # collect the chunks and join them once at the end; `+=` on bytes
+            # would copy everything received so far for every chunk
+            chunks = []
+            received = 0
+            while True:
+                msg = await receive()
+                if msg["type"] == "http.disconnect":
+                    return
+                chunk = msg.get("body", b"")
+                if chunk:
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if max_body is not None and received > max_body:
+                        await self._send_too_large(send)
+                        return
+                if not msg.get("more_body", False):
+                    break
+            # joining a single chunk hands back the same bytes object
+            environ["wsgi.input"] = ASGIRequestBody(b"".join(chunks))
 
         # Host check first: an invalid host short-circuits before the method check
         # so we don't reveal route/method info to untrusted callers.
@@ -139,7 +301,7 @@ class ASGIHandler:
         abort = await router.process_request_middleware_async(request)
         if abort:
             await router.process_response_middleware_async(request, abort)
-            await self._send_response(send, request, abort)
+            await self._send_response(send, request, abort, receive)
             return
 
         # 5. Dispatch handler (sync or async)
@@ -182,11 +344,36 @@ class ASGIHandler:
         await router.process_response_middleware_async(request, resp)
 
         # 7. Send ASGI response
-        await self._send_response(send, request, resp)
+        await self._send_response(send, request, resp, receive)
 
-    async def _send_response(self, send, request, resp: HttpResponse) -> None:
+    async def _send_too_large(self, send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"Request body too large",
+                "more_body": False,
+            }
+        )
+
+    async def _send_response(
+        self, send, request, resp: HttpResponse, receive=None
+    ) -> None:
         router = self._router
         try:
+            if isinstance(resp, JsonResponse) and resp.json_dumps is None:
+                resp.json_dumps = router.json_dumps
+            elif isinstance(resp, FileResponse) and resp.request is None:
+                resp.request = request
             rendered = resp.render()
             rendered = await router.post_process_middleware_async(
                 request, resp, rendered
@@ -209,6 +396,31 @@ class ASGIHandler:
             )
             return
 
+        raw_headers = ResponseHeaders.coerce(resp.headers).asgi_items()
+
+        if getattr(resp, "streaming", False):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": resp.status_code,
+                    "headers": raw_headers,
+                }
+            )
+            await self._send_streaming(send, receive, rendered)
+            return
+
+        if hasattr(rendered, "read"):
+            # an open file from FileResponse
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": resp.status_code,
+                    "headers": raw_headers,
+                }
+            )
+            await self._send_file(send, request, rendered)
+            return
+
         if isinstance(rendered, str):
             body_bytes = rendered.encode(DEFAULT_ENCODING)
         elif isinstance(rendered, list):
@@ -219,19 +431,6 @@ class ASGIHandler:
         else:
             body_bytes = rendered
 
-        # Normalise headers from a *copy* — never mutate resp.headers so that
-        # the response object remains usable if _send_response is called again.
-        normalised = {k.replace("_", "-"): v for k, v in resp.headers.items()}
-        cookies = normalised.pop("set-cookie", [])
-        varies = normalised.pop("vary", [])
-        raw_headers = [
-            (k.encode("latin1"), str(v).encode("latin1")) for k, v in normalised.items()
-        ]
-        for c in cookies:
-            raw_headers.append((b"set-cookie", str(c).encode("latin1")))
-        for v in varies:
-            raw_headers.append((b"vary", str(v).encode("latin1")))
-
         await send(
             {
                 "type": "http.response.start",
@@ -243,6 +442,105 @@ class ASGIHandler:
             {"type": "http.response.body", "body": body_bytes, "more_body": False}
         )
 
+    @staticmethod
+    async def _wait_for_disconnect(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _send_streaming(self, send, receive, content) -> None:
+        """
+        Send the body of a StreamingHttpResponse a chunk at a time. Sync
+        iterables are advanced on a worker thread so they can't block the
+        loop. If the client disconnects, an async generator is cancelled where
+        it's waiting, and a sync one is closed once its current chunk is done.
+        """
+        if hasattr(content, "__aiter__"):
+            iterator = content.__aiter__()
+
+            async def next_chunk():
+                try:
+                    return await iterator.__anext__()
+                except StopAsyncIteration:
+                    return _STREAM_DONE
+
+        else:
+            iterator = iter(content)
+
+            async def next_chunk():
+                return await asyncio.to_thread(next, iterator, _STREAM_DONE)
+
+        if receive is not None:
+            disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        else:
+            disconnected = asyncio.get_running_loop().create_future()
+        try:
+            while True:
+                fetch = asyncio.ensure_future(next_chunk())
+                await asyncio.wait(
+                    {fetch, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not fetch.done():
+                    # the client went away; don't wait for the rest
+                    if hasattr(iterator, "__anext__"):
+                        fetch.cancel()
+                    with contextlib.suppress(asyncio.CancelledError, Exception):
+                        await fetch
+                    return
+                chunk = fetch.result()
+                if chunk is _STREAM_DONE:
+                    break
+                if isinstance(chunk, str):
+                    chunk = chunk.encode(DEFAULT_ENCODING)
+                if chunk:
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            disconnected.cancel()
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            elif hasattr(iterator, "close"):
+                iterator.close()
+
+    async def _send_file(self, send, request, file) -> None:
+        """
+        Send an open file as the response body. If the server supports it, it
+        reads the file itself (pathsend) or sends it from the file descriptor
+        (zerocopysend, which also covers a single range); otherwise it's read
+        in chunks on a worker thread.
+        """
+        extensions = request.environ.get(ASGI_EXTENSIONS_KEY) or {}
+        try:
+            if "http.response.pathsend" in extensions and isinstance(
+                getattr(file, "name", None), str
+            ):
+                await send(
+                    {
+                        "type": "http.response.pathsend",
+                        "path": os.path.abspath(file.name),
+                    }
+                )
+            elif "http.response.zerocopysend" in extensions and hasattr(file, "fileno"):
+                message = {"type": "http.response.zerocopysend", "file": file}
+                if isinstance(file, FileRange):
+                    message.update(file=file.file, offset=file.offset, count=file.count)
+                await send(message)
+            else:
+                while chunk := await asyncio.to_thread(file.read, STREAM_CHUNK_SIZE):
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": True,
+                        }
+                    )
+                await send(
+                    {"type": "http.response.body", "body": b"", "more_body": False}
+                )
+        finally:
+            file.close()
+
     async def _send_error(self, send, request, e: SpiderwebNetworkException) -> None:
         body = f"Something went wrong.\n\nCode: {e.code}\n\nMsg: {e.msg}\n\nDesc: {e.desc}".encode(
             DEFAULT_ENCODING
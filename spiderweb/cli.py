@@ -386,7 +386,7 @@ def _cmd_routes(app, _args, _extra):
 
     rows = []
     for _pattern, data in routes.items():
-        path = data.get("reverse", "")
+        path = data.get("path", "")
         methods = ", ".join(data.get("allowed_methods") or [])
         name = data.get("name") or ""
         func = data.get("func")
@@ -3,6 +3,15 @@ import importlib.metadata
 DEFAULT_ALLOWED_METHODS = ["POST", "GET", "PUT", "PATCH", "DELETE"]
 DEFAULT_ENCODING = "UTF-8"
 
+# how much of a request body (request.stream()) or a file being sent is handled
+# at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# environ key holding the original ASGI header pairs for requests served over ASGI
+ASGI_HEADERS_KEY = "spiderweb.asgi_headers"
+# environ key holding the extensions the ASGI server advertised in the scope
+ASGI_EXTENSIONS_KEY = "spiderweb.asgi_extensions"
+
 try:
     __version__ = importlib.metadata.version("spiderweb-framework")
 except importlib.metadata.PackageNotFoundError:
@@ -2,3 +2,13 @@ def csrf_exempt(func):
     """Mark a view as not requiring CSRF verification on POST requests."""
     func.csrf_exempt = True
     return func
+
+
+def stream_request_body(func):
+    """
+    Mark a view as reading its request body with `request.stream()`. Under
+    ASGI the body is handed to the view as it arrives instead of being
+    buffered before the view is called.
+    """
+    func.stream_request_body = True
+    return func
@@ -1,6 +1,8 @@
 import os
+from pathlib import Path
 
 from spiderweb.exceptions import NotFound
+from spiderweb.files import UPLOAD_TEMP_DIR
 from spiderweb.response import JsonResponse, FileResponse
 from spiderweb.utils import is_safe_path
 
@@ -24,10 +26,13 @@ def http500(request):
 
 
 def send_file(request, filename: str) -> FileResponse:
+    if UPLOAD_TEMP_DIR in Path(filename).parts:
+        # uploads that are still coming in (or were never saved)
+        raise NotFound
     for folder in request.server.staticfiles_dirs:
         requested_path = request.server.BASE_DIR / folder / filename
         if os.path.exists(requested_path):
             if not is_safe_path(requested_path):
                 raise NotFound
-            return FileResponse(filename=requested_path)
+            return FileResponse(filename=requested_path, request=request)
     raise NotFound
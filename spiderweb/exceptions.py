@@ -54,6 +54,13 @@ class Forbidden(SpiderwebNetworkException):
         self.desc = desc if desc else "You are not allowed to access this resource"
 
 
+class RequestEntityTooLarge(SpiderwebNetworkException):
+    def __init__(self, desc=None):
+        self.code = 413
+        self.msg = "Content Too Large"
+        self.desc = desc if desc else "Request body too large"
+
+
 class ServerError(SpiderwebNetworkException):
     def __init__(self, desc=None):
         self.code = 500
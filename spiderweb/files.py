@@ -1,7 +1,233 @@
+import contextlib
+import hashlib
+import os
 import random
+import shutil
 import string
+import tempfile
+import weakref
+from pathlib import Path
 
-from multipart import MultipartPart
+from multipart import (
+    MultiDict,
+    MultipartError,
+    MultipartPart,
+    MultipartSegment,
+    PushMultipartParser,
+    parse_options_header,
+)
+
+from spiderweb.constants import DEFAULT_ENCODING, STREAM_CHUNK_SIZE
+from spiderweb.exceptions import RequestEntityTooLarge
+
+# text fields bigger than this are written to disk and end up in FILES, same as
+# with multipart.parse_form_data
+FIELD_MEMORY_LIMIT = 2**18
+
+# uploads in progress go in this folder inside `media_dir`, which is never
+# served; see get_upload_dir()
+UPLOAD_TEMP_DIR = ".incoming"
+
+
+def _discard(path: Path) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+class StreamedPart:
+    """
+    A multipart part whose body was written straight to a temporary file while
+    the request was being parsed. It has the same attributes as MultipartPart
+    so that MediaFile can wrap either one, plus `move_to()`, which renames the
+    temporary file instead of copying it.
+    """
+
+    def __init__(
+        self,
+        segment: MultipartSegment,
+        charset: str = DEFAULT_ENCODING,
+        temp_dir: str | Path = None,
+        hash_algorithm: str = None,
+    ):
+        self.name = segment.name
+        self.filename = segment.filename
+        self.content_type = segment.content_type or (
+            "application/octet-stream" if segment.filename else "text/plain"
+        )
+        self.charset = segment.charset or charset
+        self.headerlist = segment.headerlist
+        self.size = 0
+        self.memfile_limit = 0
+        self.buffer_size = STREAM_CHUNK_SIZE
+        self._hash = hashlib.new(hash_algorithm) if hash_algorithm else None
+
+        fd, path = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=temp_dir)
+        self.path = Path(path)
+        self.file = os.fdopen(fd, "w+b")
+        # if nobody saves the upload, the temp file goes away with this object
+        self._finalizer = weakref.finalize(self, _discard, self.path)
+
+    @property
+    def hash(self) -> str | None:
+        """Hex digest of the body, if the router has `upload_hash_algorithm` set."""
+        return self._hash.hexdigest() if self._hash else None
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        self.file.write(chunk)
+        if self._hash:
+            self._hash.update(chunk)
+
+    def finish(self) -> None:
+        self.file.flush()
+        self.file.seek(0)
+
+    def move_to(self, path: str | Path) -> Path:
+        """
+        Rename the temporary file to `path` and keep reading from there. If
+        `path` is on another filesystem, the file is copied over instead.
+        """
+        self.file.close()
+        try:
+            os.replace(self.path, path)
+        except OSError:
+            shutil.copyfile(self.path, path)
+            _discard(self.path)
+        self._finalizer.detach()
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        return self.path
+
+    def save_as(self, path: str | Path) -> int:
+        """Save a copy of the body to `path` and return the number of bytes."""
+        with open(path, "wb") as fp:
+            pos = self.file.tell()
+            try:
+                self.file.seek(0)
+                shutil.copyfileobj(self.file, fp, self.buffer_size)
+            finally:
+                self.file.seek(pos)
+        return self.size
+
+    def close(self) -> None:
+        self.file.close()
+        self._finalizer()
+
+
+def get_upload_dir(server) -> Path | None:
+    """
+    Where to put temporary files for uploads: a folder inside `media_dir` that
+    `send_file` won't serve, so half-received uploads can't be downloaded, and
+    saving one is usually a rename on the same filesystem. Without a
+    `media_dir`, the system's temp directory is used.
+    """
+    media_dir = getattr(server, "media_dir", None)
+    if not media_dir:
+        return None
+    upload_dir = server.BASE_DIR / media_dir / UPLOAD_TEMP_DIR
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    return upload_dir
+
+
+def parse_multipart(environ, server=None) -> tuple[MultiDict, MultiDict]:
+    """
+    Parse a multipart/form-data body from `wsgi.input` in a single pass. File
+    parts are written to disk as they arrive and text fields are kept in
+    memory. The router's `upload_max_file_size` and `upload_max_total_size` are
+    checked as the body is read; going over either raises
+    RequestEntityTooLarge and removes whatever was already written.
+
+    Returns two MultiDicts like multipart.parse_form_data: text fields and
+    StreamedParts.
+    """
+    forms, files = MultiDict(), MultiDict()
+    content_type, options = parse_options_header(environ.get("CONTENT_TYPE", ""))
+    boundary = options.get("boundary")
+    if content_type != "multipart/form-data" or not boundary:
+        return forms, files
+    charset = options.get("charset", DEFAULT_ENCODING)
+
+    max_file_size = getattr(server, "upload_max_file_size", None)
+    max_total_size = getattr(server, "upload_max_total_size", None)
+    hash_algorithm = getattr(server, "upload_hash_algorithm", None)
+    temp_dir = get_upload_dir(server)
+
+    stream = environ["wsgi.input"]
+    terminated = environ.get("wsgi.input_terminated", False)
+    try:
+        remaining = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return forms, files
+    if max_total_size is not None and remaining > max_total_size:
+        raise RequestEntityTooLarge()
+
+    segment = part = None
+    field = []
+    field_size = total = 0
+    try:
+        with PushMultipartParser(boundary, remaining if remaining else -1) as parser:
+            while not parser.closed:
+                if terminated or remaining > 0:
+                    size = STREAM_CHUNK_SIZE
+                    chunk = stream.read(size if terminated else min(size, remaining))
+                    remaining -= len(chunk)
+                else:
+                    chunk = b""
+                for event in parser.parse(chunk):
+                    if isinstance(event, MultipartSegment):
+                        segment = event
+                        if segment.filename:
+                            part = StreamedPart(
+                                segment, charset, temp_dir, hash_algorithm
+                            )
+                    elif event:
+                        total += len(event)
+                        if max_total_size is not None and total > max_total_size:
+                            raise RequestEntityTooLarge()
+                        if part is None:
+                            field_size += len(event)
+                            if field_size <= FIELD_MEMORY_LIMIT:
+                                field.append(event)
+                                continue
+                            # too big to keep in memory; treat it like a file
+                            part = StreamedPart(
+                                segment, charset, temp_dir, hash_algorithm
+                            )
+                            event = b"".join(field) + event
+                            field = []
+                        if (
+                            max_file_size is not None
+                            and part.size + len(event) > max_file_size
+                        ):
+                            raise RequestEntityTooLarge(
+                                f"Uploaded file '{part.filename or part.name}'"
+                                f" is larger than {max_file_size} bytes"
+                            )
+                        part.write(event)
+                    else:
+                        # the end of a segment
+                        if part is not None:
+                            part.finish()
+                            files.append(part.name, part)
+                            part = None
+                        else:
+                            forms.append(
+                                segment.name,
+                                b"".join(field).decode(segment.charset or charset),
+                            )
+                        field = []
+                        field_size = 0
+    except MultipartError:
+        # like parse_form_data outside of strict mode: keep what was complete
+        if part is not None:
+            part.close()
+    except BaseException:
+        if part is not None:
+            part.close()
+        for upload in files.values():
+            upload.close()
+        raise
+    return forms, files
 
 
 class MediaFile:
@@ -31,6 +257,11 @@ class MediaFile:
         """Generate a random 6 character suffix."""
         return "".join(random.choices(string.ascii_letters, k=6))
 
+    @property
+    def hash(self) -> str | None:
+        """Hex digest of the upload, if the router has `upload_hash_algorithm` set."""
+        return getattr(self._file, "hash", None)
+
     def save(self):
         file_path = self.server.BASE_DIR / self.server.media_dir / self._file.filename
         if file_path.exists():
@@ -39,7 +270,11 @@ class MediaFile:
             file_path = file_path.with_name(
                 f"{file_path.stem}_[{suffix}]{file_path.suffix}"
             )
-        self._file.save_as(file_path)
+        if hasattr(self._file, "move_to"):
+            # already on disk; just move it into place
+            self._file.move_to(file_path)
+        else:
+            self._file.save_as(file_path)
         return file_path
 
     def read(self):
@@ -1,5 +1,8 @@
+import asyncio
 import functools
+import hashlib
 import inspect
+import json
 import logging
 import pathlib
 import os
@@ -11,6 +14,7 @@ from pathlib import Path
 from threading import Thread
 from typing import Optional, Callable, Sequence, Literal
 from wsgiref.simple_server import WSGIServer
+from wsgiref.util import FileWrapper
 
 from jinja2 import BaseLoader, FileSystemLoader
 from sqlalchemy import create_engine
@@ -24,6 +28,7 @@ from spiderweb.constants import (
 from spiderweb.constants import (
     DEFAULT_ENCODING,
     DEFAULT_ALLOWED_METHODS,
+    STREAM_CHUNK_SIZE,
 )
 from spiderweb.db import Base, create_sqlite_engine, create_session_factory
 from spiderweb.default_views import (
@@ -38,15 +43,26 @@ from spiderweb.exceptions import (
     NotFound,
     APIError,
     NoResponseError,
+    RequestEntityTooLarge,
     SpiderwebNetworkException,
 )
 from spiderweb.jinja_core import SpiderwebEnvironment
 from spiderweb.local_server import LocalServerMixin
-from spiderweb.request import Request
-from spiderweb.response import HttpResponse, TemplateResponse, JsonResponse
-from spiderweb.routes import RoutesMixin
+from spiderweb.request import BoundedInput, Request
+from spiderweb.response import (
+    FileResponse,
+    HttpResponse,
+    TemplateResponse,
+    JsonResponse,
+)
+from spiderweb.routes import DEFAULT_BODY_SIZE, RoutesMixin, RouteCache
 from spiderweb.secrets import FernetMixin
-from spiderweb.utils import get_http_status_by_code, convert_url_to_regex
+from spiderweb.utils import (
+    get_http_status_by_code,
+    convert_url_to_regex,
+    HostMatcher,
+    ResponseHeaders,
+)
 
 console_logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -95,10 +111,22 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
         max_request_body_size: int | None = 10
         * 1024
         * 1024,  # 10 MB; None disables the limit
+        upload_max_file_size: int | None = None,
+        upload_max_total_size: int | None = None,
+        upload_hash_algorithm: str | None = None,
+        json_loads: Callable = None,
+        json_dumps: Callable = None,
         log: Logger = None,
+        route_cache_size: int = 0,  # 0 disables the route cache
         **kwargs,
     ):
         self._routes = {}
+        self._route_trie = None
+        self._static_routes = {}
+        self._reverse_index = {}
+        self._routes_frozen = False
+        self._host_tables = {}
+        self._route_cache = RouteCache(route_cache_size) if route_cache_size else None
         self._converters = {}
         self.routes = routes
         self._error_routes = {}
@@ -118,6 +146,7 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
         self.secret_key = secret_key if secret_key else self.generate_key()
         self._allowed_hosts = allowed_hosts or ["*"]
         self.allowed_hosts = [convert_url_to_regex(i) for i in self._allowed_hosts]
+        self.host_matcher = HostMatcher(self._allowed_hosts)
 
         self.cors_allowed_origins = cors_allowed_origins or []
         self.cors_allowed_origin_regexes = cors_allowed_origin_regexes or []
@@ -153,6 +182,12 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
         self.on_startup = on_startup or []
         self.on_shutdown = on_shutdown or []
         self.max_request_body_size = max_request_body_size
+        self.upload_max_file_size = upload_max_file_size
+        self.upload_max_total_size = upload_max_total_size
+        self.upload_hash_algorithm = upload_hash_algorithm
+        # e.g. orjson.loads / orjson.dumps; the stdlib is used by default
+        self.json_loads = json_loads or json.loads
+        self.json_dumps = json_dumps or json.dumps
 
         self.DEFAULT_ENCODING = DEFAULT_ENCODING
         self.DEFAULT_ALLOWED_METHODS = DEFAULT_ALLOWED_METHODS
@@ -246,6 +281,14 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
                     " Media files will not be served."
                 )
 
+        if (
+            self.upload_hash_algorithm
+            and self.upload_hash_algorithm not in hashlib.algorithms_available
+        ):
+            raise ConfigError(
+                f"Unknown upload_hash_algorithm '{self.upload_hash_algorithm}'."
+            )
+
         # finally, run the startup checks to verify everything is correct and happy.
         self.log.info("Run startup checks...")
         self.run_middleware_checks()
@@ -261,6 +304,10 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
     ) -> None | list[bytes]:
         try:
             try:
+                if isinstance(resp, JsonResponse) and resp.json_dumps is None:
+                    resp.json_dumps = self.json_dumps
+                elif isinstance(resp, FileResponse) and resp.request is None:
+                    resp.request = request
                 rendered_output: str = resp.render()
                 final_output: str | bytes = self.post_process_middleware(
                     request, resp, rendered_output
@@ -274,21 +321,18 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
                 return [f"Internal Server Error: {e}".encode(DEFAULT_ENCODING)]
 
             status = get_http_status_by_code(resp.status_code)
-            cookies = []
-            varies = []
-            resp.headers = {k.replace("_", "-"): v for k, v in resp.headers.items()}
-            if "set-cookie" in resp.headers:
-                cookies = resp.headers["set-cookie"]
-                del resp.headers["set-cookie"]
-            if "vary" in resp.headers:
-                varies = resp.headers["vary"]
-                del resp.headers["vary"]
-            resp.headers = {k: str(v) for k, v in resp.headers.items()}
-            headers = list(resp.headers.items())
-            for c in cookies:
-                headers.append(("set-cookie", str(c)))
-            for v in varies:
-                headers.append(("vary", str(v)))
+            headers = ResponseHeaders.coerce(resp.headers).wsgi_items()
+
+            if getattr(resp, "streaming", False):
+                start_response(status, headers)
+                return self.iter_streaming_content(final_output)
+
+            if hasattr(final_output, "read"):
+                # an open file from FileResponse; the server sends it in chunks
+                # (or with sendfile) instead of us reading it into memory
+                start_response(status, headers)
+                file_wrapper = request.environ.get("wsgi.file_wrapper", FileWrapper)
+                return file_wrapper(final_output, STREAM_CHUNK_SIZE)
 
             # Is there any situation now where it could be a list before this point?
             if not isinstance(final_output, list):
@@ -309,6 +353,44 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
                 start_response, request, self.get_error_route(500)(request)
             )
 
+    @staticmethod
+    def iter_streaming_content(content):
+        """
+        Turn the body of a StreamingHttpResponse into the bytes iterator WSGI
+        wants. When the server closes it (done, or the client went away), the
+        view's generator is closed too.
+        """
+        if hasattr(content, "__aiter__"):
+            loop = asyncio.new_event_loop()
+            iterator = content.__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = loop.run_until_complete(iterator.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    yield (
+                        chunk.encode(DEFAULT_ENCODING)
+                        if isinstance(chunk, str)
+                        else chunk
+                    )
+            finally:
+                if hasattr(iterator, "aclose"):
+                    loop.run_until_complete(iterator.aclose())
+                loop.close()
+        else:
+            iterator = iter(content)
+            try:
+                for chunk in iterator:
+                    yield (
+                        chunk.encode(DEFAULT_ENCODING)
+                        if isinstance(chunk, str)
+                        else chunk
+                    )
+            finally:
+                if hasattr(iterator, "close"):
+                    iterator.close()
+
     def get_caller_filepath(self):
         """Figure out who called us and return their path."""
         stack = inspect.stack()
@@ -356,7 +438,11 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
         self, start_response, request: Request, e: SpiderwebNetworkException
     ):
         try:
-            status = get_http_status_by_code(500)
+            try:
+                status = get_http_status_by_code(e.code)
+            except ValueError:
+                # not a real status code
+                status = get_http_status_by_code(500)
             headers = [("Content-Type", "text/plain; charset=utf-8")]
 
             start_response(status, headers)
@@ -395,26 +481,64 @@ class SpiderwebRouter(LocalServerMixin, MiddlewareMixin, RoutesMixin, FernetMixi
                 start_response, request, self.get_error_route(500)(request)
             )
 
+    def get_max_body_size(self, route_max_body_size) -> int | None:
+        """
+        The most request body a view will accept: what its route set with
+        `max_body_size` (as returned by get_request_handler()), or
+        `max_request_body_size` if it didn't set anything.
+        """
+        if route_max_body_size is DEFAULT_BODY_SIZE:
+            return self.max_request_body_size
+        return route_max_body_size
+
+    def limit_request_body(self, request, max_body: int) -> bool:
+        """
+        Make sure a WSGI request body can't go over `max_body`. Returns False if
+        the Content-Length already says it does; chunked bodies (where the
+        server sets `wsgi.input_terminated`) are cut off while they're being
+        read instead.
+        """
+        environ = request.environ
+        try:
+            content_length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_body:
+            return False
+        if environ.get("wsgi.input_terminated") and "wsgi.input" in environ:
+            # no length to go on, so the body is read until the server says stop
+            environ["wsgi.input"] = BoundedInput(environ["wsgi.input"], max_body)
+        return True
+
     def check_valid_host(self, request) -> bool:
-        host = request.headers.get("http_host")
+        host = request.environ.get("HTTP_HOST")
         if not host:
             return False
-        for option in self.allowed_hosts:
-            if re.match(option, host):
-                return True
-        return False
+        return self.host_matcher.is_allowed(host)
 
     def __call__(self, environ, start_response, *args, **kwargs):
         """Entry point for WSGI apps."""
+        if not self._routes_frozen:
+            self.freeze_routes()
         request = self.get_request(environ)
         try:
-            handler, additional_args, allowed_methods = self.get_route(request.path)
+            handler, additional_args, allowed_methods, route_max_body = (
+                self.get_request_handler(request)
+            )
         except NotFound:
             handler = self.get_error_route(404)
             additional_args = {}
             allowed_methods = DEFAULT_ALLOWED_METHODS
+            route_max_body = DEFAULT_BODY_SIZE
         request.handler = handler
 
+        # turn away bodies that are too big before anything reads them
+        max_body = self.get_max_body_size(route_max_body)
+        if max_body is not None and not self.limit_request_body(request, max_body):
+            return self.send_error_response(
+                start_response, request, RequestEntityTooLarge()
+            )
+
         if not self.check_valid_host(request):
             handler = self.get_error_route(403)
         elif request.method not in allowed_methods:
@@ -102,7 +102,11 @@ class MiddlewareMixin:
         # run them in reverse order, same as process_response. The top of the middleware
         # stack should be the first and last middleware to run.
         to_remove = []
+        streaming = getattr(response, "streaming", False)
         for middleware in list(reversed(self.middleware)):
+            if streaming and not getattr(middleware, "supports_streaming", False):
+                # it would have to read the whole body to do anything with it
+                continue
             try:
                 result = middleware.post_process(request, response, rendered_response)
                 if inspect.iscoroutine(result):
@@ -168,7 +172,10 @@ class MiddlewareMixin:
         self, request: Request, response: HttpResponse, rendered: str
     ) -> str | bytes:
         to_remove = []
+        streaming = getattr(response, "streaming", False)
         for middleware in list(reversed(self.middleware)):
+            if streaming and not getattr(middleware, "supports_streaming", False):
+                continue
             try:
                 fn = middleware.post_process
                 if inspect.iscoroutinefunction(fn):
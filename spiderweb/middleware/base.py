@@ -25,6 +25,10 @@ class SpiderwebMiddleware:
     and the response will be returned immediately. `process_response` will not be called.
     """
 
+    # set to True if post_process can handle StreamingHttpResponse bodies, which
+    # arrive as an iterable of chunks; otherwise it's skipped for those
+    supports_streaming = False
+
     def __init__(self, server):
         self.server = server
         # If there are any startup checks that need to be run, they should be added
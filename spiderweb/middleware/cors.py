@@ -52,12 +52,9 @@ class CorsMiddleware(SpiderwebMiddleware):
         if not enabled:
             return response
 
-        if "vary" in response.headers:
-            response.headers["vary"].append("origin")
-        else:
-            response.headers["vary"] = ["origin"]
+        response.headers.add("vary", "origin")
 
-        origin = request.headers.get("http_origin")
+        origin = request.headers.get_canonical("origin")
         if not origin:
             return response
 
@@ -101,9 +98,7 @@ class CorsMiddleware(SpiderwebMiddleware):
                 )
         if (
             self.server.cors_allow_private_network
-            and request.headers.get(
-                ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK.replace("-", "_")
-            )
+            and request.headers.get_canonical(ACCESS_CONTROL_REQUEST_PRIVATE_NETWORK)
             == "true"
         ):
             response.headers[ACCESS_CONTROL_ALLOW_PRIVATE_NETWORK] = "true"
@@ -137,7 +132,8 @@ class CorsMiddleware(SpiderwebMiddleware):
         if (
             request._cors_enabled
             and request.method == "OPTIONS"
-            and "access-control-request-method" in request.headers
+            and request.headers.get_canonical("access-control-request-method")
+            is not None
         ):
             # this should be 204, but according to mozilla, not all browsers
             # parse that correctly. See [204] comment below.
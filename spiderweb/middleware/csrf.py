@@ -73,11 +73,11 @@ class CSRFMiddleware(SpiderwebMiddleware):
     CSRF_EXPIRY = 60 * 60  # 1 hour
 
     def is_trusted_origin(self, request) -> bool:
-        origin = request.headers.get("http_origin")
-        referrer = request.headers.get("http_referer") or request.headers.get(
-            "http_referrer"
-        )
-        host = request.headers.get("http_host")
+        origin = request.headers.get_canonical("origin")
+        referrer = request.headers.get_canonical(
+            "referer"
+        ) or request.headers.get_canonical("referrer")
+        host = request.headers.get_canonical("host")
 
         if not origin and not (host == referrer):
             return False
@@ -97,7 +97,7 @@ class CSRFMiddleware(SpiderwebMiddleware):
                     return
 
             csrf_token = (
-                request.headers.get("x-csrf-token")
+                request.headers.get_canonical("x-csrf-token")
                 or request.GET.get("csrf_token")
                 or request.POST.get("csrf_token")
             )
@@ -49,20 +49,24 @@ class GzipMiddleware(SpiderwebMiddleware):
         # - The response status code is a 2xx success code
         # - The response length is at least 500 bytes
         # - The response is not a streaming response
-        #   - (already bytes, like from FileResponse)
+        #   - (an open file, like from FileResponse)
         # - The response is not already compressed
         # - The request accepts gzip encoding
         if (
             not (200 <= response.status_code < 300)
+            or not isinstance(rendered_response, (str, bytes))
             or len(rendered_response) < self.server.gzip_minimum_response_length
-            or not isinstance(rendered_response, str)
-            or self.algorithm in response.headers.get("Content-Encoding", "")
-            or self.algorithm not in request.headers.get("Accept-Encoding", "")
+            or self.algorithm in response.headers.get_canonical("content-encoding", "")
+            or self.algorithm
+            not in request.headers.get_canonical("accept-encoding", "")
         ):
             return rendered_response
 
+        if isinstance(rendered_response, str):
+            # JSON backends like orjson hand back bytes already
+            rendered_response = rendered_response.encode("UTF-8")
         zipped = gzip.compress(
-            rendered_response.encode("UTF-8"),
+            rendered_response,
             compresslevel=self.server.gzip_compression_level,
         )
         response.headers["Content-Encoding"] = self.algorithm
@@ -1,5 +1,5 @@
 import inspect
-from typing import get_type_hints
+from typing import get_type_hints, TYPE_CHECKING
 
 try:  # pragma: no cover - import guard
     from pydantic import BaseModel  # type: ignore
@@ -28,12 +28,19 @@ from spiderweb.request import Request
 from spiderweb.response import JsonResponse
 from spiderweb.server_checks import ServerCheck
 
+if TYPE_CHECKING:
 
-class RequestModel(BaseModel, Request):
-    # type hinting shenanigans that allow us to annotate Request objects
-    # with the pydantic models we want to validate them with, but doesn't
-    # break the Request object's ability to be used as a Request object
-    pass
+    class RequestModel(BaseModel, Request):
+        # type hinting shenanigans that allow us to annotate Request objects
+        # with the pydantic models we want to validate them with, but doesn't
+        # break the Request object's ability to be used as a Request object
+        pass
+
+else:
+    # Request uses __slots__, so it can't share a class with BaseModel at
+    # runtime; the annotation only has to look like a Request to type checkers.
+    class RequestModel(BaseModel):
+        pass
 
 
 class CheckPydanticInstalled(ServerCheck):
@@ -36,7 +36,7 @@ class SessionMiddleware(SpiderwebMiddleware):
                     Session.session_key
                     == request.COOKIES.get(self.server.session_cookie_name),
                     Session.ip_address == request.META.get("client_address"),
-                    Session.user_agent == request.headers.get("HTTP_USER_AGENT"),
+                    Session.user_agent == request.headers.get_canonical("user-agent"),
                 )
                 .order_by(Session.id.desc())
                 .first()
@@ -109,7 +109,7 @@ class SessionMiddleware(SpiderwebMiddleware):
                     created_at=datetime.now(),
                     last_active=datetime.now(),
                     ip_address=request.META.get("client_address"),
-                    user_agent=request.headers.get("HTTP_USER_AGENT"),
+                    user_agent=request.headers.get_canonical("user-agent"),
                 )
                 dbsession.add(session)
                 dbsession.commit()
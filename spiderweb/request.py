@@ -1,19 +1,158 @@
 import json
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse
 
-from spiderweb.constants import DEFAULT_ENCODING
-from spiderweb.files import MediaFile
-from spiderweb.utils import get_client_address, Headers
+from spiderweb.constants import (
+    ASGI_HEADERS_KEY,
+    DEFAULT_ENCODING,
+    STREAM_CHUNK_SIZE,
+)
+from spiderweb.exceptions import RequestEntityTooLarge
+from spiderweb.files import MediaFile, parse_multipart
+from spiderweb.utils import (
+    EMPTY_DICT,
+    EMPTY_MULTIDICT,
+    EMPTY_QUERYDICT,
+    SHARED_EMPTY_TYPES,
+    CookieView,
+    CopyOnWrite,
+    Headers,
+    MetaView,
+    QueryDict,
+)
 
 from multipart import (
     parse_form_data,
     is_form_request as m_is_form_request,
-    MultiDict,
-    MultipartPart,
 )
 
+_UNSET = object()
+
+
+class BoundedInput:
+    """
+    Wraps `wsgi.input` for a body of unknown length (chunked uploads) and
+    raises RequestEntityTooLarge as soon as more than `limit` bytes are read
+    from it.
+    """
+
+    __slots__ = ("stream", "limit", "received")
+
+    def __init__(self, stream, limit: int):
+        self.stream = stream
+        self.limit = limit
+        self.received = 0
+
+    def _count(self, data: bytes) -> bytes:
+        self.received += len(data)
+        if self.received > self.limit:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        # never ask for more than one byte past the limit
+        allowed = self.limit - self.received + 1
+        if size is None or size < 0 or size > allowed:
+            size = allowed
+        return self._count(self.stream.read(size))
+
+    def readline(self, size: int = -1) -> bytes:
+        allowed = self.limit - self.received + 1
+        if size is None or size < 0 or size > allowed:
+            size = allowed
+        return self._count(self.stream.readline(size))
+
+    def __iter__(self):
+        while line := self.readline():
+            yield line
+
+
+class LazySlot:
+    """
+    Attribute stored in the slot `slot` and filled in by calling the method
+    `loader` the first time it's read. Assigning to it sets the slot and
+    clears anything in `resets` that was worked out from the old value.
+    Shared empty values are handed out behind a CopyOnWrite, so writing to
+    them gives this request its own copy instead of raising.
+    """
+
+    __slots__ = ("slot", "loader", "resets")
+
+    def __init__(self, slot: str, loader: str, resets: tuple[str, ...] = ()):
+        self.slot = slot
+        self.loader = loader
+        self.resets = resets
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value is _UNSET:
+            getattr(obj, self.loader)()
+            value = getattr(obj, self.slot)
+        if type(value) in SHARED_EMPTY_TYPES:
+            value = CopyOnWrite(value, obj, self.slot)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value) -> None:
+        setattr(obj, self.slot, value)
+        for slot in self.resets:
+            setattr(obj, slot, _UNSET)
+
 
 class Request:
+    """
+    The incoming request.
+
+    Only the cheap bits are set up front. `headers`, `META`, `COOKIES`, the
+    body (raw bytes in `body`, decoded text in `content`) and the parsed `GET`,
+    `POST` and `FILES` data are all built the first time something asks for
+    them, so a view that never looks at them never pays for them. Each one can
+    still be assigned to directly.
+
+    Empty `COOKIES`, `GET`, `POST` and `FILES` are shared between requests
+    until something writes to them, at which point the request gets its own
+    copy. Middleware can still attach its own attributes (like
+    `request.user`).
+    """
+
+    __slots__ = (
+        "environ",
+        "method",
+        "path",
+        "query_params",
+        "server",
+        "handler",
+        "SESSION",
+        "_session",
+        "validated_data",
+        "_initial_content",
+        "_initial_headers",
+        "_url",
+        "_headers",
+        "_meta",
+        "_cookies",
+        "_body",
+        "_content",
+        "_json",
+        "_get",
+        "_post",
+        "_files",
+        # anything middleware or views attach to the request ends up here
+        "__dict__",
+    )
+
+    url = LazySlot("_url", "populate_url")
+    headers = LazySlot("_headers", "populate_headers")
+    META = LazySlot("_meta", "populate_meta")
+    COOKIES = LazySlot("_cookies", "populate_cookies")
+    # json() is parsed from these, so replacing either one means parsing again
+    body = LazySlot("_body", "populate_body", resets=("_json",))
+    content = LazySlot("_content", "populate_content", resets=("_json",))
+    GET = LazySlot("_get", "populate_get")
+    POST = LazySlot("_post", "populate_body")
+    FILES = LazySlot("_files", "populate_body")
+
     def __init__(
         self,
         environ=None,
@@ -24,100 +163,165 @@ class Request:
         handler=None,
     ):
         self.environ = environ
-        self.content: str = content
+        self._initial_content: str = content
+        self._initial_headers: dict[str, str] = headers
         self.method: str = environ["REQUEST_METHOD"]
-        self.headers: dict[str, str] = headers if headers else {}
         self.path: str = path if path else environ["PATH_INFO"]
-        self.url = urlparse(path)
         self.query_params = []
         self.server = server
         self.handler = handler  # the view function that will be called
-        self.GET = MultiDict()
-        self.POST = MultiDict()
-        self.FILES = MultiDict()
-        self.META = {}
-        self.COOKIES = {}
         # only used for the session middleware
         self.SESSION = {}
         self._session: dict = {"new_session": False, "id": None}
         # only used for the pydantic middleware and only on POST requests
         self.validated_data = {}
+        self._url = _UNSET
+        self._headers = _UNSET
+        self._meta = _UNSET
+        self._cookies = _UNSET
+        self._body = _UNSET
+        self._content = _UNSET
+        self._json = _UNSET
+        self._get = _UNSET
+        self._post = _UNSET
+        self._files = _UNSET
 
-        self.populate_headers()
-        self.populate_meta()
-        self.populate_cookies()
+    def populate_url(self) -> None:
+        self.url = urlparse(self.path)
 
-        content_length = int(self.headers.get("content_length") or 0)
-        if self.is_form_request():
-            if self.method == "POST":
-                # this pulls from wsgi.input, so we don't have to do it ourselves
-                self.POST, self.FILES = parse_form_data(self.environ)
-                for key, value in self.FILES.items():
-                    if isinstance(value, MultipartPart):
-                        self.FILES[key] = MediaFile(self.server, value)
-        else:
-            if content_length:
-                self.content = (
-                    self.environ["wsgi.input"]
-                    .read(content_length)
-                    .decode(DEFAULT_ENCODING)
-                )
-            self.GET.update(parse_qs(self.content))
+    def populate_get(self) -> None:
+        query_string = self.environ.get("QUERY_STRING")
+        self.GET = QueryDict(query_string) if query_string else EMPTY_QUERYDICT
 
     def populate_headers(self) -> None:
-        data = self.headers
-        data |= {
-            "content_type": self.environ.get("CONTENT_TYPE"),
-            "content_length": self.environ.get("CONTENT_LENGTH"),
-        }
-        for k, v in self.environ.items():
-            if k.startswith("HTTP_"):
-                data[k] = v
-        self.headers = Headers(**{k.lower(): v for k, v in data.items()})
+        raw_headers = self.environ.get(ASGI_HEADERS_KEY)
+        if raw_headers is not None:
+            # under ASGI, skip the environ and use the original header pairs
+            headers = Headers.from_asgi(raw_headers)
+        else:
+            headers = Headers.from_environ(self.environ)
+        if self._initial_headers:
+            for k, v in self._initial_headers.items():
+                if k not in headers:
+                    headers[k] = v
+        self.headers = headers
 
     def populate_meta(self) -> None:
         # all caps fields are from WSGI, lowercase names
         # are custom
-        fields = [
-            "SERVER_PROTOCOL",
-            "SERVER_SOFTWARE",
-            "REQUEST_METHOD",
-            "PATH_INFO",
-            "QUERY_STRING",
-            "REMOTE_HOST",
-            "REMOTE_ADDR",
-            "SERVER_NAME",
-            "GATEWAY_INTERFACE",
-            "SERVER_PORT",
-            "CONTENT_LENGTH",
-            "SCRIPT_NAME",
-        ]
-        for f in fields:
-            self.META[f] = self.environ.get(f)
-        for f in self.environ.keys():
-            if f.startswith("HTTP_"):
-                self.META[f] = self.environ[f]
-        self.META["client_address"] = get_client_address(self.environ)
+        self.META = MetaView(self.environ)
 
     def populate_cookies(self) -> None:
         cookies_header = self.environ.get("HTTP_COOKIE")
-        if not cookies_header:
-            return
-        cookies: dict[str, str] = {}
-        # Split on ';' and be tolerant of optional spaces and malformed segments
-        for segment in cookies_header.split(";"):
-            part = segment.strip()
-            if not part:
-                continue
-            if "=" not in part:
-                # Ignore flag-like segments that don't conform to name=value
-                continue
-            name, _, value = part.partition("=")  # only split on first '='
-            cookies[name.strip()] = value.strip()
-        self.COOKIES = cookies
+        self.COOKIES = CookieView(cookies_header) if cookies_header else EMPTY_DICT
+
+    def populate_body(self) -> None:
+        """Read the body once and fill in `body`, `POST` and `FILES`."""
+        body = b""
+        post = files = EMPTY_MULTIDICT
+        if self.is_form_request():
+            if self.method == "POST":
+                if self.environ.get("CONTENT_TYPE", "").startswith("multipart/"):
+                    # files are written to disk as they're parsed
+                    post, files = parse_multipart(self.environ, self.server)
+                else:
+                    # this pulls from wsgi.input, so we don't have to do it ourselves
+                    post, files = parse_form_data(self.environ)
+                for values in files.dict.values():
+                    values[:] = [MediaFile(self.server, part) for part in values]
+        else:
+            content_length = int(self.environ.get("CONTENT_LENGTH") or 0)
+            if content_length:
+                body = self.environ["wsgi.input"].read(content_length)
+        # anything that was assigned before the body was read wins
+        if self._body is _UNSET:
+            self._body = body
+        if self._post is _UNSET:
+            self._post = post
+        if self._files is _UNSET:
+            self._files = files
+
+    def populate_content(self) -> None:
+        body = self.body
+        # straight into the slot; decoding doesn't change what json() sees
+        self._content = body.decode(DEFAULT_ENCODING) if body else self._initial_content
+
+    def stream(self, chunk_size: int = STREAM_CHUNK_SIZE):
+        """
+        Iterate over the request body in chunks of bytes instead of reading it
+        all into memory. Under WSGI this is a normal iterator; under ASGI use
+        `async for` (or a plain `for` from a sync view). Decorate the view with
+        `stream_request_body` so ASGI doesn't buffer the body first.
+
+        The body can only be read once: after streaming it, `body`, `content`,
+        `POST` and `FILES` are empty.
+        """
+        body = self.environ["wsgi.input"]
+        if self._body is not _UNSET:
+            # already read, so hand back what we have
+            data = self._body
+        elif self._content is not _UNSET:
+            data = self.content.encode(DEFAULT_ENCODING) if self.content else b""
+        else:
+            data = None
+        if data is not None:
+            if hasattr(body, "__aiter__"):
+                return type(body)(data)
+            return iter([data] if data else [])
+        if self._post is _UNSET:
+            self._post = EMPTY_MULTIDICT
+        if self._files is _UNSET:
+            self._files = EMPTY_MULTIDICT
+        self._body = b""
+        self._content = ""
+        if hasattr(body, "__aiter__"):
+            return body
+        return self._iter_wsgi_body(body, chunk_size)
+
+    def _iter_wsgi_body(self, body, chunk_size: int):
+        # never read past CONTENT_LENGTH unless the server says the input ends
+        # on its own (chunked requests)
+        terminated = self.environ.get("wsgi.input_terminated", False)
+        remaining = int(self.environ.get("CONTENT_LENGTH") or 0)
+        while terminated or remaining > 0:
+            chunk = body.read(chunk_size if terminated else min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def read_body(self) -> str:
+        """
+        Wait for the whole body to arrive and return `request.content`. Only
+        needed from async views marked with `stream_request_body`, where the
+        body can't be read synchronously; anywhere else it's the same as
+        reading `request.content`.
+        """
+        body = self.environ["wsgi.input"]
+        if self._body is _UNSET and hasattr(body, "fill"):
+            await body.fill()
+            if not self.environ.get("CONTENT_LENGTH"):
+                # chunked upload; now we know how long it is
+                self.environ["CONTENT_LENGTH"] = str(body.buffered_size)
+        return self.content
 
     def json(self):
-        return json.loads(self.content)
+        """
+        The body parsed as JSON. It's only parsed once, so middleware and the
+        view can both call this for free, until something assigns `content` or
+        `body`. Uses the router's `json_loads`.
+        """
+        if self._json is _UNSET:
+            loads = getattr(self.server, "json_loads", json.loads)
+            # straight from the bytes, unless `content` was already decoded
+            # (or replaced); like `content`, an empty body falls back to the
+            # content the request was created with
+            if self._content is not _UNSET:
+                data = self._content
+            else:
+                data = self.body or self._initial_content
+            self._json = loads(data)
+        return self._json
 
     def is_form_request(self) -> bool:
         return m_is_form_request(self.environ)
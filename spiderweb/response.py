@@ -1,16 +1,25 @@
 import datetime
+import email.utils
 import json
 import re
+import secrets
+from collections.abc import Mapping
+import os
 from os import PathLike
-from typing import Any
+from typing import Any, AsyncIterable, BinaryIO, Callable, Iterable
 import urllib.parse
 import mimetypes
-from wsgiref.util import FileWrapper
 
 from spiderweb.constants import REGEX_COOKIE_NAME
 from spiderweb.exceptions import GeneralException
 from spiderweb.request import Request
-from spiderweb.utils import Headers
+from spiderweb.utils import (
+    EMPTY_DICT,
+    ResponseHeaders,
+    get_date_header,
+    parse_http_date,
+    parse_range_header,
+)
 
 from multipart import MultiDict
 
@@ -18,6 +27,31 @@ mimetypes.init()
 
 
 class HttpResponse:
+    __slots__ = (
+        "body",
+        "data",
+        "context",
+        "status_code",
+        "_headers",
+        "_response_headers",
+        # lets middleware and subclasses attach their own attributes
+        "__dict__",
+    )
+
+    #: True if render() returns an iterable of chunks rather than the whole body
+    streaming = False
+    #: headers every response of this class starts out with, as (name, value)
+    #: pairs; names must already be canonical (lowercase, with dashes)
+    default_headers = (
+        ("content-type", "text/html; charset=utf-8"),
+        ("server", "Spiderweb"),
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # encoded once here rather than for every response
+        cls._encoded_default_headers = ResponseHeaders.encode_items(cls.default_headers)
+
     def __init__(
         self,
         body: str = None,
@@ -30,16 +64,23 @@ class HttpResponse:
         self.data = data
         self.context = context if context else {}
         self.status_code = status_code
-        self._headers = headers if headers else {}
-        self.headers = Headers()
-        for k, v in self._headers.items():
-            self.headers[k.lower()] = v
-        if not self.headers.get("content-type"):
-            self.headers["content-type"] = "text/html; charset=utf-8"
-        self.headers["server"] = "Spiderweb"
-        self.headers["date"] = datetime.datetime.now(tz=datetime.UTC).strftime(
-            "%a, %d %b %Y %H:%M:%S GMT"
+        self._headers = headers if headers else EMPTY_DICT
+        self._response_headers = ResponseHeaders.from_encoded(
+            self._encoded_default_headers, get_date_header()
         )
+        for k, v in self._headers.items():
+            # an empty content-type keeps the default one
+            if v or k.lower() != "content-type":
+                self.headers[k] = v
+
+    @property
+    def headers(self) -> ResponseHeaders:
+        return self._response_headers
+
+    @headers.setter
+    def headers(self, value) -> None:
+        # a plain dict works too, but middleware can count on ResponseHeaders
+        self._response_headers = ResponseHeaders.coerce(value)
 
     def __str__(self):
         return self.body
@@ -95,40 +136,246 @@ class HttpResponse:
         attrs = [urllib.parse.quote_plus(value)] + attrs
         cookie = f"{name}={'; '.join(attrs)}"
 
-        if "set-cookie" in self.headers:
-            self.headers["set-cookie"].append(cookie)
-        else:
-            self.headers["set-cookie"] = [cookie]
+        self.headers.add("set-cookie", cookie)
 
     def render(self) -> str:
         return str(self.body)
 
 
+HttpResponse._encoded_default_headers = ResponseHeaders.encode_items(
+    HttpResponse.default_headers
+)
+
+
+class FileRange:
+    """
+    One slice of an open file, for a single-range (206) response. The file is
+    already positioned at `offset` and only `count` bytes can be read from it,
+    so `wsgi.file_wrapper` and ASGI zerocopysend can still send it straight
+    from the file descriptor.
+    """
+
+    __slots__ = ("file", "offset", "count", "remaining")
+
+    def __init__(self, file: BinaryIO, offset: int, count: int):
+        self.file = file
+        self.offset = offset
+        self.count = count
+        self.remaining = count
+        file.seek(offset)
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class MultiRangeFile:
+    """
+    The `multipart/byteranges` body of a multi-range (206) response, read from
+    the open file one part at a time.
+    """
+
+    __slots__ = ("file", "parts", "current")
+
+    def __init__(self, file: BinaryIO, parts: list[bytes | tuple[int, int]]):
+        # each part is either bytes (boundaries and part headers) or an
+        # (offset, count) slice of the file
+        self.file = file
+        self.parts = parts
+        self.current = None
+
+    def read(self, size: int = -1) -> bytes:
+        while self.current is None or not self.current.remaining:
+            if not self.parts:
+                return b""
+            part = self.parts.pop(0)
+            if isinstance(part, bytes):
+                return part
+            self.current = FileRange(self.file, *part)
+        return self.current.read(size)
+
+    def close(self) -> None:
+        self.file.close()
+
+
 class FileResponse(HttpResponse):
-    def __init__(self, filename, *args, **kwargs):
+    """
+    Sends a file from disk. It gets `ETag` (from the file's size and
+    modification time), `Last-Modified` and `Accept-Ranges` headers, and if
+    it knows the request (the server fills it in), GET requests are answered
+    with a 304 when the client's copy is still current and with a 206 when
+    they ask for a `Range`.
+    """
+
+    __slots__ = ("filename", "content_type", "request")
+
+    def __init__(self, filename, *args, request: Request = None, **kwargs):
         super().__init__(*args, **kwargs)
         self.filename = filename
-        self.content_type = mimetypes.guess_type(self.filename)[0]
+        self.content_type = (
+            mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+        )
         self.headers["content-type"] = self.content_type
+        self.request = request
+
+    def render(self) -> BinaryIO | FileRange | MultiRangeFile | str:
+        """
+        Open the file and hand it back without reading it. The server sends it
+        from there: through `wsgi.file_wrapper` under WSGI, or with the
+        pathsend / zerocopysend extensions (or chunked reads) under ASGI.
+        """
+        f = open(self.filename, "rb")
+        stat = os.fstat(f.fileno())
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = email.utils.formatdate(
+            stat.st_mtime, usegmt=True
+        )
+        self.headers["accept-ranges"] = "bytes"
+        self.body = f
+
+        environ = self.request.environ if self.request else EMPTY_DICT
+        if self.status_code != 200 or environ.get("REQUEST_METHOD") != "GET":
+            self.headers["content-length"] = str(size)
+            return f
+
+        if self.is_not_modified(environ, etag, int(stat.st_mtime)):
+            f.close()
+            self.status_code = 304
+            del self.headers["content-type"]
+            self.body = ""
+            return self.body
+
+        range_header = environ.get("HTTP_RANGE")
+        if range_header and self.if_range_matches(
+            environ.get("HTTP_IF_RANGE"), etag, int(stat.st_mtime)
+        ):
+            ranges = parse_range_header(range_header, size)
+            if ranges is not None:
+                return self.render_ranges(f, size, ranges)
 
-    def render(self) -> list[bytes]:
-        with open(self.filename, "rb") as f:
-            self.body = [chunk for chunk in FileWrapper(f)]
+        self.headers["content-length"] = str(size)
+        return f
+
+    @staticmethod
+    def is_not_modified(environ: dict, etag: str, mtime: int) -> bool:
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            # weak comparison, and If-Modified-Since is ignored
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = parse_http_date(environ.get("HTTP_IF_MODIFIED_SINCE"))
+        return if_modified_since is not None and mtime <= if_modified_since
+
+    @staticmethod
+    def if_range_matches(if_range: str | None, etag: str, mtime: int) -> bool:
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            # strong comparison only
+            return if_range == etag
+        return parse_http_date(if_range) == mtime
+
+    def render_ranges(
+        self, f: BinaryIO, size: int, ranges: list[tuple[int, int]]
+    ) -> FileRange | MultiRangeFile | str:
+        if not ranges:
+            f.close()
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{size}"
+            self.body = ""
+            return self.body
+
+        self.status_code = 206
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            self.headers["content-range"] = f"bytes {first}-{last}/{size}"
+            self.headers["content-length"] = str(last - first + 1)
+            self.body = FileRange(f, first, last - first + 1)
+            return self.body
+
+        boundary = secrets.token_hex(16)
+        parts = []
+        length = 0
+        for i, (first, last) in enumerate(ranges):
+            header = (
+                f"--{boundary}\r\nContent-Type: {self.content_type}\r\n"
+                f"Content-Range: bytes {first}-{last}/{size}\r\n\r\n"
+            ).encode("latin1")
+            if i:
+                # the end of the previous part
+                header = b"\r\n" + header
+            parts += [header, (first, last - first + 1)]
+            length += len(header) + last - first + 1
+        closing = f"\r\n--{boundary}--\r\n".encode("latin1")
+        parts.append(closing)
+        length += len(closing)
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(length)
+        self.body = MultiRangeFile(f, parts)
         return self.body
 
 
+class StreamingHttpResponse(HttpResponse):
+    """
+    A response whose body is an iterable of str or bytes chunks, sent as they
+    are produced instead of being built up in memory first. Generators and
+    async generators both work. If the client goes away partway through, the
+    generator is closed (or cancelled, for async ones) so it can clean up.
+
+    `post_process` middleware is skipped for these responses unless it sets
+    `supports_streaming = True`; it then receives the iterable and has to
+    return one.
+    """
+
+    __slots__ = ("streaming_content",)
+
+    streaming = True
+
+    def __init__(self, streaming_content: Iterable | AsyncIterable, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.streaming_content = streaming_content
+
+    def render(self) -> Iterable | AsyncIterable:
+        return self.streaming_content
+
+
 class JsonResponse(HttpResponse):
-    def __init__(self, *args, **kwargs):
+    __slots__ = ("json_dumps",)
+
+    default_headers = (
+        ("content-type", "application/json"),
+        ("server", "Spiderweb"),
+    )
+
+    def __init__(self, *args, json_dumps: Callable = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.headers["content-type"] = "application/json"
+        # filled in with the router's `json_dumps` if left empty
+        self.json_dumps = json_dumps
 
-    def render(self) -> str:
+    def render(self) -> str | bytes:
         if isinstance(self.data, MultiDict):
             self.data = self.data.dict
-        return json.dumps(self.data)
+        elif isinstance(self.data, Mapping) and not isinstance(self.data, dict):
+            # views like request.COOKIES and request.headers
+            self.data = dict(self.data)
+        return (self.json_dumps or json.dumps)(self.data)
 
 
 class RedirectResponse(HttpResponse):
+    __slots__ = ()
+
     def __init__(self, location: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.status_code = 302
@@ -136,6 +383,14 @@ class RedirectResponse(HttpResponse):
 
 
 class TemplateResponse(HttpResponse):
+    __slots__ = (
+        "template_path",
+        "template_string",
+        "template_loader",
+        "string_loader",
+        "_template",
+    )
+
     def __init__(
         self,
         request: Request,
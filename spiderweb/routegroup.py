@@ -1,5 +1,7 @@
 from typing import Callable
 
+from spiderweb.routes import DEFAULT_BODY_SIZE
+
 
 class RouteGroup:
     """
@@ -26,10 +28,14 @@ class RouteGroup:
         self._pending_routes: list[tuple] = []
 
     def route(
-        self, path: str, allowed_methods: list[str] = None, name: str = None
+        self,
+        path: str,
+        allowed_methods: list[str] = None,
+        name: str = None,
+        max_body_size: int | None = DEFAULT_BODY_SIZE,
     ) -> Callable:
         def outer(func):
-            self.add_route(path, func, allowed_methods, name)
+            self.add_route(path, func, allowed_methods, name, max_body_size)
             return func
 
         return outer
@@ -40,5 +46,6 @@ class RouteGroup:
         func: Callable,
         allowed_methods: list[str] = None,
         name: str = None,
+        max_body_size: int | None = DEFAULT_BODY_SIZE,
     ):
-        self._pending_routes.append((path, func, allowed_methods, name))
+        self._pending_routes.append((path, func, allowed_methods, name, max_body_size))
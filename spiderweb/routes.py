@@ -1,5 +1,9 @@
+import functools
 import inspect
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import Callable, Any, Sequence, Optional
 
 from spiderweb.constants import DEFAULT_ALLOWED_METHODS
@@ -14,6 +18,35 @@ from spiderweb.exceptions import (
     MethodNotAllowed,
 )
 from spiderweb.response import RedirectResponse, HttpResponse
+from spiderweb.routetrie import RouteTrie, is_plain_literal
+from spiderweb.utils import get_hostname
+
+VIEW_METHOD_NAMES = ("get", "post", "delete", "head", "put", "patch", "options")
+
+# max_body_size wasn't passed, so the app-wide limit applies; None is a real
+# value (no limit)
+DEFAULT_BODY_SIZE = object()
+
+
+@functools.cache
+def get_view_methods(view_class) -> tuple[str, ...]:
+    """
+    Return the HTTP methods that a class-based view actually implements,
+    uppercased and sorted. OPTIONS is always available, so it's included by
+    default. The result is cached per class.
+    """
+    values = {"options"}
+    for cls in view_class.mro():
+        if cls is View:
+            break
+        values.update(
+            {
+                name
+                for name in cls.__dict__.keys()
+                if name in VIEW_METHOD_NAMES and callable(getattr(view_class, name))
+            }
+        )
+    return tuple(sorted(name.upper() for name in values))
 
 
 class View:
@@ -33,6 +66,11 @@ class View:
     ref: https://developer.mozilla.org/en-US/docs/Web/HTTP/Reference/Methods
     """
 
+    # If True, one instance of the view is created when the route is added and
+    # reused for every request. Only turn this on for views that don't keep any
+    # per-request state on `self`.
+    shared_instance: bool = False
+
     def __init__(self, *args, **kwargs):
         self.template_name: Optional[str] = None
 
@@ -71,25 +109,8 @@ class View:
         The OPTIONS method describes the communication options for the target
         resource.
         """
-        # Get a list of all functions on the child class that called this.
-        # Filter out all the functions that aren't route-related, then
-        # return that. OPTIONS is always available, so we include it by
-        # default.
-        values = {"options"}
-        for cls in type(self).mro():
-            if cls is View:
-                break
-            values.update(
-                {
-                    name
-                    for name in cls.__dict__.keys()
-                    if name
-                    in ["get", "post", "delete", "head", "put", "patch", "options"]
-                    and callable(getattr(self, name))
-                }
-            )
         return HttpResponse(
-            status_code=204, headers={"ALLOW": ", ".join(values).upper()}
+            status_code=204, headers={"ALLOW": ", ".join(get_view_methods(type(self)))}
         )
 
     def patch(self, request, *args, **kwargs) -> HttpResponse:
@@ -113,21 +134,56 @@ class View:
         raise MethodNotAllowed
 
 
-def convert_match_to_dict(match: dict, extra_converters: dict = None):
-    """Convert a match object to a dict with the proper converted types for each match.
+def make_view_dispatcher(view_class) -> Callable:
+    """
+    Build the route handler for a class-based view.
+
+    The view's method for each HTTP verb is looked up once, when the route is
+    added, so handling a request is a dict lookup and a call. Methods the view
+    doesn't implement never get here; they're left out of `view_methods`,
+    which becomes the route's allowed methods so the router can send back a
+    405 without touching the view.
 
-    extra_converters maps converter class names to converter classes and is used
-    for any custom converters registered via register_converter().
+    The handler is a plain function, so anything that inspects `request.handler`
+    (like PydanticMiddleware) keeps working.
     """
-    result = {}
-    for k, v in match.items():
-        param_name, converter_name = k.split("__")
-        if extra_converters and converter_name in extra_converters:
-            cls = extra_converters[converter_name]
-        else:
-            cls = globals()[converter_name]
-        result[param_name] = cls().to_python(v)
-    return result
+    view_methods = list(get_view_methods(view_class))
+    if view_class.shared_instance:
+        instance = view_class()
+        handlers = {
+            method: getattr(instance, method.lower()) for method in view_methods
+        }
+
+        def dispatch(request, *args, **kwargs):
+            handler = handlers.get(request.method)
+            if handler is None:
+                raise MethodNotAllowed
+            return handler(request, *args, **kwargs)
+
+    else:
+        handlers = {
+            method: getattr(view_class, method.lower()) for method in view_methods
+        }
+
+        def dispatch(request, *args, **kwargs):
+            handler = handlers.get(request.method)
+            if handler is None:
+                raise MethodNotAllowed
+            return handler(view_class(), request, *args, **kwargs)
+
+    dispatch.view_class = view_class
+    dispatch.view_methods = view_methods
+    return dispatch
+
+
+class AutomaticOptionsRoute:
+    """Answers OPTIONS for routes that don't have their own OPTIONS view."""
+
+    def __init__(self, allow: str):
+        self.allow = allow
+
+    def __call__(self, request, *args, **kwargs):
+        return HttpResponse(body="", status_code=204, headers={"allow": self.allow})
 
 
 class DummyRedirectRoute:
@@ -138,12 +194,68 @@ class DummyRedirectRoute:
         return RedirectResponse(self.location)
 
 
+# Candidate values used to build an example URL for each route when looking for
+# routes that are shadowed by something registered earlier.
+SHADOW_CHECK_SAMPLES = ("1", "1.0", "a", "2000", "a-1", "a.txt", "a/b")
+
+
+class RouteCache:
+    """
+    Bounded LRU of resolved routes, keyed by the exact request path.
+
+    Only successful lookups are stored, so a flood of 404s can't push the real
+    routes out. ``clear()`` bumps a generation counter so that a lookup which
+    started before the route table changed doesn't put a stale result back.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def resolve(self, path: str, resolver: Callable) -> tuple:
+        with self._lock:
+            result = self._data.get(path)
+            if result is not None:
+                self._data.move_to_end(path)
+                self.hits += 1
+                return result
+            self.misses += 1
+            generation = self._generation
+        result = resolver(path)
+        with self._lock:
+            if generation == self._generation:
+                self._data[path] = result
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+
 class RoutesMixin:
     """Cannot be called on its own. Requires context of SpiderwebRouter."""
 
     # ones that start with underscores are the compiled versions, non-underscores
     # are the user-supplied versions
     _routes: dict
+    _route_trie: Optional[RouteTrie]  # built from _routes on first lookup
+    _static_routes: dict[str, dict]  # exact path -> packet for parameter-less routes
+    _route_cache: Optional[RouteCache]  # only set if route_cache_size is given
+    _routes_frozen: bool
+    _host_tables: dict[str, "HostRouteTable"]  # hostname -> routes for that host
+    debug: bool
+    log: Any
+    _reverse_index: dict[str, str | tuple]  # route name -> compiled reverse template
     _converters: dict  # name -> converter class (custom converters)
     routes: Sequence[tuple[str, Callable] | tuple[str, Callable, dict]]
     _error_routes: dict
@@ -151,7 +263,9 @@ class RoutesMixin:
     append_slash: bool
     fix_route_starting_slash: bool
 
-    def route(self, path, allowed_methods=None, name=None) -> Callable:
+    def route(
+        self, path, allowed_methods=None, name=None, max_body_size=DEFAULT_BODY_SIZE
+    ) -> Callable:
         """
         Decorator for adding a route to a view.
 
@@ -166,28 +280,226 @@ class RoutesMixin:
         :param path: str
         :param allowed_methods: list[str]
         :param name: str
+        :param max_body_size: int | None; overrides max_request_body_size for
+            this view. None removes the limit.
         :return: Callable
         """
 
         def outer(func):
-            self.add_route(path, func, allowed_methods, name)
+            self.add_route(path, func, allowed_methods, name, max_body_size)
             return func
 
         return outer
 
     def get_route(self, path) -> tuple[Callable, dict[str, Any], list[str]]:
-        # Build a by-class-name lookup for any registered custom converters so
-        # convert_match_to_dict can find them without touching globals().
-        custom_by_class = {cls.__name__: cls for cls in self._converters.values()}
-        for option in self._routes.keys():
+        packet, kwargs = self.find_route(path)
+        return packet["func"], kwargs, packet["allowed_methods"]
+
+    def get_handler(
+        self, path: str, method: str
+    ) -> tuple[Callable, dict[str, Any], list[str], Any]:
+        """
+        Like get_route(), but returns the view registered for the given HTTP
+        method. If there isn't one, OPTIONS is answered automatically from the
+        route's methods; anything else gets the route's first view back along
+        with allowed methods that don't include it, so the caller can 405.
+
+        The last value is the `max_body_size` the route was added with for
+        that method, or `DEFAULT_BODY_SIZE` if it didn't set one.
+        """
+        packet, kwargs = self.find_route(path)
+        max_body_size = packet["max_body_sizes"].get(method, DEFAULT_BODY_SIZE)
+        if handler := packet["handlers"].get(method):
+            return handler, kwargs, packet["allowed_methods"], max_body_size
+        if method == "OPTIONS":
+            return packet["options"], kwargs, ["OPTIONS"], max_body_size
+        return packet["func"], kwargs, packet["allowed_methods"], max_body_size
+
+    def get_request_handler(
+        self, request
+    ) -> tuple[Callable, dict[str, Any], list, Any]:
+        """
+        Resolve the view for a request. If routes were added for the request's
+        host with host(), those are checked first; anything they don't match
+        falls through to the app's own routes. Returns the same values as
+        get_handler().
+        """
+        if self._host_tables:
+            host = request.environ.get("HTTP_HOST")
+            table = self._host_tables.get(get_hostname(host)) if host else None
+            if table is not None:
+                try:
+                    return table.get_handler(request.path, request.method)
+                except NotFound:
+                    pass
+        return self.get_handler(request.path, request.method)
+
+    def host(self, hostname: str) -> "HostRouteTable":
+        """
+        Return the routes that only apply to requests for ``hostname``,
+        creating them if needed. The result has the same ``route()``,
+        ``add_route()``, ``include_routegroup()`` and ``reverse()`` methods as
+        the app::
+
+            api = app.host("api.example.com")
+
+            @api.route("/users")
+            def users(request): ...
+        """
+        hostname = get_hostname(hostname)
+        if hostname not in self._host_tables:
+            self._host_tables[hostname] = HostRouteTable(self, hostname)
+        return self._host_tables[hostname]
+
+    def find_route(self, path) -> tuple[dict, dict[str, Any]]:
+        """Return the route packet and converted path arguments for a path."""
+        if self._route_trie is None:
+            self._route_trie = self.build_route_trie()
+        if packet := self._static_routes.get(path):
+            return packet, {}
+        if self._route_cache is not None:
+            return self._route_cache.resolve(path, self.match_route)
+        return self.match_route(path)
+
+    def match_route(self, path) -> tuple[dict, dict[str, Any]]:
+        """Resolve a path with the route trie, bypassing any caches."""
+        if self._route_trie is None:
+            self._route_trie = self.build_route_trie()
+        if result := self._route_trie.match(path):
+            return result
+        raise NotFound()
+
+    @property
+    def route_cache_hits(self) -> int:
+        return self._route_cache.hits if self._route_cache is not None else 0
+
+    @property
+    def route_cache_misses(self) -> int:
+        return self._route_cache.misses if self._route_cache is not None else 0
+
+    def scan_routes(self, path) -> tuple[Callable, dict[str, Any], list[str]]:
+        """Resolve a path by trying every compiled route regex in order.
+
+        This is the reference implementation that the route trie has to agree
+        with; ``get_route`` should be used everywhere else.
+        """
+        for option, packet in self._routes.items():
             if match_data := option.match(path):
                 return (
-                    self._routes[option]["func"],
-                    convert_match_to_dict(match_data.groupdict(), custom_by_class),
-                    self._routes[option]["allowed_methods"],
+                    packet["func"],
+                    {
+                        name: to_python(value)
+                        for (name, to_python), value in zip(
+                            packet["converters"], match_data.groupdict().values()
+                        )
+                    },
+                    packet["allowed_methods"],
                 )
         raise NotFound()
 
+    def build_route_trie(self) -> RouteTrie:
+        """
+        Compile the current route table into a RouteTrie, and refill
+        `_static_routes` with the parameter-less routes that the trie agrees
+        are theirs to answer.
+        """
+        trie = RouteTrie()
+        static = []
+        for order, packet in enumerate(self._routes.values()):
+            raw_parts = packet["path"].split("/")
+            parts = [self.parse_path_part(part) for part in raw_parts]
+            trie.insert(order, parts, packet)
+            if all(
+                isinstance(part, str) and is_plain_literal(raw)
+                for part, raw in zip(parts, raw_parts)
+            ):
+                static.append(packet)
+        trie.finalize()
+        # Parameter-less routes can be answered with a single dict lookup,
+        # unless an earlier route already matches this exact path -- the
+        # earlier route wins, so leave that one to the trie.
+        self._static_routes = {}
+        for packet in static:
+            match = trie.match(packet["path"])
+            if match and match[0] is packet:
+                self._static_routes[packet["path"]] = packet
+        return trie
+
+    def freeze_routes(self) -> dict[str, Any]:
+        """
+        Compile everything routing needs up front and lock the route table.
+
+        This runs automatically before the first request is handled (or when
+        the ASGI lifespan startup completes), but can be called directly once
+        all routes have been added. Outside of debug mode, adding routes after
+        this point raises a ConfigError. Returns a report of what was compiled,
+        which is also logged.
+        """
+        start = time.perf_counter()
+        self._route_trie = self.build_route_trie()
+        if self._route_cache is not None:
+            self._route_cache.clear()
+
+        converter_counts: dict[str, int] = {}
+        shadowed = []
+        for packet in self._routes.values():
+            parts = [self.parse_path_part(part) for part in packet["path"].split("/")]
+            converters = {part[1] for part in parts if isinstance(part, tuple)}
+            for converter in converters:
+                name = getattr(converter, "name", converter.__name__)
+                converter_counts[name] = converter_counts.get(name, 0) + 1
+            if sample := self.get_sample_path(parts):
+                match = self._route_trie.match(sample)
+                if match and match[0] is not packet:
+                    shadowed.append((packet["path"], match[0]["path"]))
+        self._routes_frozen = True
+
+        report = {
+            "compile_time_ms": (time.perf_counter() - start) * 1000,
+            "routes": len(self._routes),
+            "static_routes": len(self._static_routes),
+            "converters": converter_counts,
+            "shadowed": shadowed,
+        }
+        if self._host_tables:
+            report["hosts"] = {
+                hostname: table.freeze_routes()
+                for hostname, table in self._host_tables.items()
+            }
+        host_name = getattr(self, "host_name", None)
+        where = f" for {host_name}" if host_name else ""
+        self.log.info(
+            f"Compiled {report['routes']} routes{where}"
+            f" ({report['static_routes']} static)"
+            f" in {report['compile_time_ms']:.2f}ms."
+        )
+        if converter_counts:
+            counts = ", ".join(f"{k}: {v}" for k, v in sorted(converter_counts.items()))
+            self.log.info(f"Routes per converter: {counts}")
+        for path, shadowed_by in shadowed:
+            self.log.warning(
+                f"Route '{path}' is shadowed by '{shadowed_by}', which was added"
+                f" first and matches the same URLs."
+            )
+        return report
+
+    @staticmethod
+    def get_sample_path(parts: list) -> Optional[str]:
+        """Build an example URL for a parsed route, if we can find one."""
+        sample = []
+        for part in parts:
+            if isinstance(part, tuple):
+                regex = re.compile(part[1].regex)
+                value = next(
+                    (v for v in SHADOW_CHECK_SAMPLES if regex.fullmatch(v)), None
+                )
+                if value is None:
+                    return None
+                sample.append(value)
+            else:
+                sample.append(part)
+        return "/".join(sample)
+
     def add_error_route(self, code: int, method: Callable):
         """Add an error route to the server."""
         if code not in self._error_routes:
@@ -208,35 +520,90 @@ class RoutesMixin:
             return http500  # noqa: F405
         return view
 
-    def check_for_route_duplicates(self, path: str):
-        if self.convert_path(path) in self._routes:
+    def check_for_route_duplicates(self, path: str, methods: list[str] = None):
+        """
+        Raise if the path is already routed. If ``methods`` is given, only
+        raise if one of those methods already has a view for this path.
+        """
+        existing = self._routes.get(self.convert_path(path))
+        if existing is None:
+            return
+        if methods is None or any(m in existing["handlers"] for m in methods):
             raise ConfigError(f"Route '{path}' already exists.")
 
+    def parse_path_part(self, part: str) -> str | tuple[str, type]:
+        """
+        Return a path segment as-is, or as ``(name, converter_cls)`` if it is a
+        path variable like ``<int:post_id>``.
+        """
+        if not (part.startswith("<") and part.endswith(">")):
+            return part
+        name = part[1:-1]
+        if "__" in name:
+            raise ConfigError(
+                f"Cannot use `__` (double underscore) in path variable."
+                f" Please fix '{name}'."
+            )
+        if ":" in name:
+            converter_name, name = name.split(":")
+            # Check custom converters first, then fall back to built-ins.
+            if converter_name in self._converters:
+                converter_cls = self._converters[converter_name]
+            else:
+                try:
+                    converter_cls = globals()[converter_name.title() + "Converter"]
+                except KeyError:
+                    raise ParseError(f"Unknown converter {converter_name}")
+        else:
+            converter_cls = StrConverter  # noqa: F405
+        return name, converter_cls
+
+    def compile_converters(self, path: str) -> tuple[tuple[str, Callable], ...]:
+        """
+        Return ``(param_name, to_python)`` pairs for every path variable in
+        ``path``, in order. Each route gets its own converter instance up front
+        so that matching a request doesn't have to look anything up or create
+        new objects.
+        """
+        converters = []
+        for part in path.split("/"):
+            parsed = self.parse_path_part(part)
+            if isinstance(parsed, tuple):
+                name, converter_cls = parsed
+                converters.append((name, converter_cls().to_python))
+        return tuple(converters)
+
+    def compile_reverse(self, path: str) -> str | tuple[tuple[str, ...], ...]:
+        """
+        Pre-split a route path for reverse(). Paths with parameters become a
+        ``(literals, params)`` pair, where the literal pieces go around the
+        parameter values; paths without any are returned unchanged.
+        """
+        literals = []
+        params = []
+        current = ""
+        for i, part in enumerate(path.split("/")):
+            if i:
+                current += "/"
+            parsed = self.parse_path_part(part)
+            if isinstance(parsed, tuple):
+                literals.append(current)
+                params.append(parsed[0])
+                current = ""
+            else:
+                current += part
+        if not params:
+            return path
+        literals.append(current)
+        return tuple(literals), tuple(params)
+
     def convert_path(self, path: str):
         """Convert a path to a regex."""
         parts = path.split("/")
         for i, part in enumerate(parts):
-            if part.startswith("<") and part.endswith(">"):
-                name = part[1:-1]
-                if "__" in name:
-                    raise ConfigError(
-                        f"Cannot use `__` (double underscore) in path variable."
-                        f" Please fix '{name}'."
-                    )
-                if ":" in name:
-                    converter_name, name = name.split(":")
-                    # Check custom converters first, then fall back to built-ins.
-                    if converter_name in self._converters:
-                        converter_cls = self._converters[converter_name]
-                    else:
-                        try:
-                            converter_cls = globals()[
-                                converter_name.title() + "Converter"
-                            ]
-                        except KeyError:
-                            raise ParseError(f"Unknown converter {converter_name}")
-                else:
-                    converter_cls = StrConverter  # noqa: F405
+            parsed = self.parse_path_part(part)
+            if isinstance(parsed, tuple):
+                name, converter_cls = parsed
                 parts[i] = (
                     rf"(?P<{name}__{converter_cls.__name__}>{converter_cls.regex})"
                 )
@@ -271,13 +638,19 @@ class RoutesMixin:
         Route paths are prefixed with ``routegroup.prefix``.  If the group
         has a ``namespace``, route names become ``"namespace:name"``.
         """
-        for path, func, allowed_methods, name in routegroup._pending_routes:
+        for (
+            path,
+            func,
+            allowed_methods,
+            name,
+            max_body_size,
+        ) in routegroup._pending_routes:
             full_path = routegroup.prefix + path
             if name is not None and routegroup.namespace:
                 full_name = f"{routegroup.namespace}:{name}"
             else:
                 full_name = name
-            self.add_route(full_path, func, allowed_methods, full_name)
+            self.add_route(full_path, func, allowed_methods, full_name, max_body_size)
 
     def add_route(
         self,
@@ -285,55 +658,103 @@ class RoutesMixin:
         method: Callable,
         allowed_methods: None | list[str] = None,
         name: str = None,
+        max_body_size: int | None = DEFAULT_BODY_SIZE,
     ):
         """Add a route to the server."""
-        allowed_methods = (
-            getattr(method, "allowed_methods", None)
-            or allowed_methods
-            or DEFAULT_ALLOWED_METHODS
-        )
-
+        if self._routes_frozen:
+            if not self.debug:
+                raise ConfigError(
+                    f"Cannot add route '{path}'; routes are frozen once the server"
+                    f" starts handling requests."
+                )
+            # in debug mode, just recompile on the next request
+            self._routes_frozen = False
+        allowed_methods = getattr(method, "allowed_methods", None) or allowed_methods
         if inspect.isclass(method) and issubclass(method, View):
-            view_class = method
-
-            def wrapped_view(request, *args, **kwargs):
-                return view_class()(request, *args, **kwargs)
-
-            method = wrapped_view
+            method = make_view_dispatcher(method)
+            # only the verbs the view implements, unless told otherwise
+            allowed_methods = allowed_methods or method.view_methods
+        allowed_methods = allowed_methods or DEFAULT_ALLOWED_METHODS
 
         if not path.startswith("/") and self.fix_route_starting_slash:
             path = "/" + path
-        reverse_path = re.sub(r"<(.*?):(.*?)>", r"{\2}", path) if "<" in path else path
 
-        def get_packet(func):
-            return {
+        def save(func, route_path):
+            existing = self._routes.get(self.convert_path(route_path))
+            if existing is not None:
+                # same path, new methods: add them to the route that's there
+                for allowed_method in allowed_methods:
+                    existing["handlers"][allowed_method] = func
+                    if max_body_size is not DEFAULT_BODY_SIZE:
+                        existing["max_body_sizes"][allowed_method] = max_body_size
+                if existing["name"] is None:
+                    existing["name"] = name
+                self.update_route_methods(existing)
+                return
+            packet = {
+                "path": route_path,
                 "func": func,
-                "allowed_methods": allowed_methods,
+                "handlers": {m: func for m in allowed_methods},
+                # per-method body limits, for the methods that set one
+                "max_body_sizes": (
+                    {m: max_body_size for m in allowed_methods}
+                    if max_body_size is not DEFAULT_BODY_SIZE
+                    else {}
+                ),
+                "converters": self.compile_converters(route_path),
                 "name": name,
-                "reverse": reverse_path,
             }
+            self.update_route_methods(packet)
+            self.store_route(route_path, packet)
+
+        if name is not None and name not in self._reverse_index:
+            # the first route registered under a name is the one reverse() finds
+            reverse_template = self.compile_reverse(path)
+        else:
+            reverse_template = None
 
         if self.append_slash and not path.endswith("/"):
             updated_path = path + "/"
-            self.check_for_route_duplicates(updated_path)
-            self.check_for_route_duplicates(path)
-            self._routes[self.convert_path(path)] = get_packet(
-                DummyRedirectRoute(updated_path)
-            )
-            self._routes[self.convert_path(updated_path)] = get_packet(method)
+            self.check_for_route_duplicates(updated_path, allowed_methods)
+            self.check_for_route_duplicates(path, allowed_methods)
+            save(DummyRedirectRoute(updated_path), path)
+            save(method, updated_path)
         else:
-            self.check_for_route_duplicates(path)
-            self._routes[self.convert_path(path)] = get_packet(method)
+            self.check_for_route_duplicates(path, allowed_methods)
+            save(method, path)
+        if reverse_template is not None:
+            self._reverse_index[name] = reverse_template
+        # the trie is rebuilt from _routes on the next lookup
+        self._route_trie = None
+        if self._route_cache is not None:
+            self._route_cache.clear()
+
+    @staticmethod
+    def update_route_methods(packet: dict) -> None:
+        """Refresh the values in a route packet that depend on its methods."""
+        packet["allowed_methods"] = list(packet["handlers"])
+        packet["options"] = AutomaticOptionsRoute(
+            ", ".join(sorted({*packet["handlers"], "OPTIONS"}))
+        )
+
+    def store_route(self, path: str, packet: dict) -> None:
+        """Save a route packet into the route table(s)."""
+        self._routes[self.convert_path(path)] = packet
 
     def add_routes(self):
         for line in self.routes:
+            max_body_size = DEFAULT_BODY_SIZE
             if len(line) == 3:
                 path, func, kwargs = line
                 for k, v in kwargs.items():
-                    setattr(func, k, v)
+                    if k == "max_body_size":
+                        # a setting for the route, not the view
+                        max_body_size = v
+                    else:
+                        setattr(func, k, v)
             else:
                 path, func = line
-            self.add_route(path, func)
+            self.add_route(path, func, max_body_size=max_body_size)
 
     def add_error_routes(self):
         for code, func in self.error_routes.items():
@@ -343,22 +764,63 @@ class RoutesMixin:
         self, view_name: str, data: dict[str, Any] = None, query: dict[str, Any] = None
     ) -> str:
         # take in a view name and return the path
-        for option in self._routes.values():
-            if option["name"] == view_name:
-                path = option["reverse"]
-                if args := re.findall(r"{(.*?)}", path):
-                    if not data:
-                        raise SpiderwebException(
-                            f"Missing arguments for reverse: {args}"
-                        )
-                    for arg in args:
-                        if arg not in data:
-                            raise SpiderwebException(
-                                f"Missing argument '{arg}' for reverse."
-                            )
-                        path = path.replace(f"{{{arg}}}", str(data[arg]))
-
-                if query:
-                    path += "?" + "&".join([f"{k}={str(v)}" for k, v in query.items()])
-                return path
-        raise ReverseNotFound(f"View '{view_name}' not found.")
+        template = self._reverse_index.get(view_name)
+        if template is None:
+            raise ReverseNotFound(f"View '{view_name}' not found.")
+        if isinstance(template, str):
+            # no parameters, so the path was already built when it was registered
+            path = template
+        else:
+            literals, params = template
+            if not data:
+                raise SpiderwebException(
+                    f"Missing arguments for reverse: {list(params)}"
+                )
+            pieces = [literals[0]]
+            for param, literal in zip(params, literals[1:]):
+                if param not in data:
+                    raise SpiderwebException(f"Missing argument '{param}' for reverse.")
+                pieces.append(str(data[param]))
+                pieces.append(literal)
+            path = "".join(pieces)
+
+        if query:
+            path += "?" + "&".join([f"{k}={str(v)}" for k, v in query.items()])
+        return path
+
+
+class HostRouteTable(RoutesMixin):
+    """
+    A separate set of routes used only for requests to a single host. Get one
+    with ``app.host("api.example.com")`` rather than creating it directly.
+
+    It shares the app's converters and settings, but has its own route table,
+    trie, reverse index and route cache.
+    """
+
+    def __init__(self, router, host_name: str):
+        self.router = router
+        self.host_name = host_name
+        self._routes = {}
+        self._route_trie = None
+        self._static_routes = {}
+        self._reverse_index = {}
+        # a table added after startup can't take new routes either
+        self._routes_frozen = router._routes_frozen
+        self._host_tables = {}
+        self._route_cache = (
+            RouteCache(router._route_cache.maxsize)
+            if router._route_cache is not None
+            else None
+        )
+        self._converters = router._converters
+        self.append_slash = router.append_slash
+        self.fix_route_starting_slash = router.fix_route_starting_slash
+
+    @property
+    def debug(self) -> bool:
+        return self.router.debug
+
+    @property
+    def log(self):
+        return self.router.log
@@ -0,0 +1,175 @@
+import re
+from typing import Any, Optional
+
+from spiderweb.converters import IntConverter, StrConverter, FloatConverter
+
+# Built-in converters whose regex can never match a "/", so they only ever
+# need to be tried against a single path segment.
+SINGLE_SEGMENT_CONVERTERS = (IntConverter, StrConverter, FloatConverter)
+REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+def is_plain_literal(part: str) -> bool:
+    """True if a literal path segment means the same thing as a regex."""
+    return REGEX_SPECIAL_CHARS.isdisjoint(part)
+
+
+class RouteTerminal:
+    """A registered route sitting at the end of a chain of trie edges."""
+
+    __slots__ = ("order", "packet", "converters")
+
+    def __init__(self, order: int, packet: dict):
+        self.order = order
+        self.packet = packet
+        # (param_name, to_python) for every variable edge on the way here, in
+        # the same order as the values collected while matching.
+        self.converters = packet["converters"]
+
+
+class PatternEdge:
+    """A non-static edge: a path variable or a literal that is itself a regex."""
+
+    __slots__ = ("key", "regex", "param", "converter", "spans", "child")
+
+    def __init__(self, key, regex: str, param: Optional[str], converter, spans: bool):
+        self.key = key
+        self.regex = re.compile(regex)
+        self.param = param
+        self.converter = converter
+        # Whether the edge may swallow more than one segment (``path`` and any
+        # custom converter or regex literal that could match a "/").
+        self.spans = spans
+        self.child = TrieNode()
+
+
+class TrieNode:
+    __slots__ = ("static", "edges", "terminal", "min_order")
+
+    def __init__(self):
+        self.static: dict[str, TrieNode] = {}
+        self.edges: list[PatternEdge] = []
+        self.terminal: Optional[RouteTerminal] = None
+        # lowest registration order of any route at or below this node; used to
+        # prune branches that cannot beat a match we've already found.
+        self.min_order = float("inf")
+
+
+class RouteTrie:
+    """
+    Segment trie used to resolve a request path to a route.
+
+    Static segments are stored as dict children, path variables become typed
+    wildcard edges that are checked with their converter's regex, and ``path``
+    (or any converter that can match a "/") acts as a catch-all that may consume
+    several segments. Matching returns the route that was registered *first*
+    among all routes that match, which is exactly what a linear scan over the
+    route table in insertion order would return.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, order: int, parts: list, packet: dict) -> None:
+        """
+        Add a route. ``parts`` is the path split on "/", where each item is
+        either a literal string or a ``(param_name, converter_cls)`` tuple.
+        """
+        node = self.root
+        node.min_order = min(node.min_order, order)
+        for part in parts:
+            if isinstance(part, tuple):
+                name, converter = part
+                key = (name, converter)
+                edge = self._get_edge(node, key)
+                if edge is None:
+                    edge = PatternEdge(
+                        key,
+                        converter.regex,
+                        name,
+                        converter,
+                        converter not in SINGLE_SEGMENT_CONVERTERS,
+                    )
+                    node.edges.append(edge)
+                node = edge.child
+            elif is_plain_literal(part):
+                node = node.static.setdefault(part, TrieNode())
+            else:
+                # Literal segments are spliced into the route regex unescaped,
+                # so something like "robots.txt" has to keep matching the way
+                # the regex would.
+                edge = self._get_edge(node, part)
+                if edge is None:
+                    edge = PatternEdge(part, part, None, None, True)
+                    node.edges.append(edge)
+                node = edge.child
+            node.min_order = min(node.min_order, order)
+        if node.terminal is None or node.terminal.order > order:
+            node.terminal = RouteTerminal(order, packet)
+
+    @staticmethod
+    def _get_edge(node: TrieNode, key) -> Optional[PatternEdge]:
+        for edge in node.edges:
+            if edge.key == key:
+                return edge
+        return None
+
+    def finalize(self) -> None:
+        """Sort wildcard edges so the most promising branch is tried first."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.edges.sort(key=lambda e: e.child.min_order)
+            stack.extend(node.static.values())
+            stack.extend(e.child for e in node.edges)
+
+    def match(self, path: str) -> Optional[tuple[dict, dict[str, Any]]]:
+        """Return ``(packet, kwargs)`` for the earliest matching route, or None."""
+        result = self._search(self.root, path.split("/"), 0, float("inf"))
+        if result is None:
+            return None
+        terminal, values = result
+        kwargs = {
+            name: to_python(value)
+            for (name, to_python), value in zip(terminal.converters, values)
+        }
+        return terminal.packet, kwargs
+
+    def _search(self, node: TrieNode, segments: list[str], index: int, limit):
+        if index == len(segments):
+            terminal = node.terminal
+            if terminal is not None and terminal.order < limit:
+                return terminal, ()
+            return None
+
+        best = None
+        child = node.static.get(segments[index])
+        if child is not None and child.min_order < limit:
+            best = self._search(child, segments, index + 1, limit)
+            if best is not None:
+                limit = best[0].order
+
+        remaining = len(segments) - index
+        for edge in node.edges:
+            child = edge.child
+            if child.min_order >= limit:
+                # edges are sorted, so nothing after this can win either
+                break
+            # Try the longest run of segments first to mirror greedy regex
+            # matching when a catch-all is followed by more of the path.
+            for count in range(remaining, 0, -1) if edge.spans else (1,):
+                if count == 1:
+                    value = segments[index]
+                else:
+                    value = "/".join(segments[index : index + count])
+                if edge.regex.fullmatch(value) is None:
+                    continue
+                found = self._search(child, segments, index + count, limit)
+                if found is None:
+                    continue
+                terminal, values = found
+                if edge.param is not None:
+                    values = (value,) + values
+                best = terminal, values
+                limit = terminal.order
+        return best
@@ -17,6 +17,66 @@ class StartResponse:
         return {h[0]: h[1] for h in self.headers} if self.headers else {}
 
 
+def call(app, environ, start_response, path, method="GET", host=None) -> bytes:
+    """Send a WSGI request for `path` through the app and return the body."""
+    if host is not None:
+        environ["HTTP_HOST"] = host
+    environ["PATH_INFO"] = path
+    environ["REQUEST_METHOD"] = method
+    return b"".join(app(environ, start_response))
+
+
+def make_scope(path="/", method="GET", headers=None):
+    """A minimal ASGI http scope."""
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")] + (headers or []),
+    }
+
+
+class Receiver:
+    """ASGI `receive`: hands out body messages one at a time and logs each call."""
+
+    def __init__(self, chunks, log=None):
+        self.messages = [
+            {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": i < len(chunks) - 1,
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+        self.log = log if log is not None else []
+
+    async def __call__(self):
+        if not self.messages:
+            return {"type": "http.disconnect"}
+        message = self.messages.pop(0)
+        self.log.append(("receive", message["body"]))
+        return message
+
+
+class Sender:
+    """ASGI `send`: keeps every message so the response can be checked."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+
+    @property
+    def status(self):
+        return self.messages[0]["status"]
+
+    @property
+    def body(self):
+        return b"".join(m.get("body", b"") for m in self.messages[1:])
+
+
 def setup(**kwargs):
     environ = {}
     setup_testing_defaults(environ)
@@ -38,3 +38,19 @@ class ExplodingPostProcessingMiddleware(SpiderwebMiddleware):
         self, request: Request, response: HttpResponse, rendered_response: str
     ) -> str:
         raise UnusedMiddleware("Unfinished!")
+
+
+class StreamingPostProcessingMiddleware(SpiderwebMiddleware):
+    supports_streaming = True
+
+    def post_process(self, request: Request, response: HttpResponse, rendered_response):
+        if response.streaming:
+            return (chunk.upper() for chunk in rendered_response)
+        return rendered_response
+
+
+class FillInEmptyValuesMiddleware(SpiderwebMiddleware):
+    def process_request(self, request: Request) -> None:
+        request.POST["x"] = "from middleware"
+        request.COOKIES["k"] = "v"
+        request.GET.update({"q": "search"})
@@ -189,3 +189,39 @@ async def test_wsgi_still_works_alongside_asgi():
     body_iter = app(environ, start_response)
     assert start_response.status.startswith("200")
     assert b"".join(body_iter) == b"wsgi ok"
+
+
+@pytest.mark.asyncio
+async def test_asgi_request_headers_keep_repeated_values():
+    app, _, _ = setup()
+
+    @app.route("/headers")
+    def headers_view(request):
+        return JsonResponse(
+            data={
+                "values": request.headers.getall("x-multi"),
+                "host": request.headers.get("http_host"),
+            }
+        )
+
+    async with _client(app.asgi_app) as client:
+        resp = await client.get(
+            "/headers", headers=[("X-Multi", "one"), ("X-Multi", "two")]
+        )
+    assert resp.json() == {"values": ["one", "two"], "host": "testserver"}
+
+
+@pytest.mark.asyncio
+async def test_asgi_response_sends_each_header_value():
+    app, _, _ = setup()
+
+    @app.route("/cookies")
+    def cookies_view(request):
+        resp = HttpResponse("ok")
+        resp.set_cookie("a", "1")
+        resp.set_cookie("b", "2")
+        return resp
+
+    async with _client(app.asgi_app) as client:
+        resp = await client.get("/cookies")
+    assert resp.headers.get_list("set-cookie") == ["a=1", "b=2"]
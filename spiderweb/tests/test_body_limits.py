@@ -0,0 +1,207 @@
+import io
+
+import pytest
+
+from spiderweb.request import BoundedInput
+from spiderweb.exceptions import RequestEntityTooLarge
+from spiderweb.response import HttpResponse
+from spiderweb.routegroup import RouteGroup
+from spiderweb.tests.helpers import Receiver, Sender, make_scope, setup
+
+
+class TrackingInput(io.BytesIO):
+    """Remembers every size it was asked to read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.requested = []
+
+    def read(self, size=-1):
+        self.requested.append(size)
+        return super().read(size)
+
+
+def post(environ, path, body, content_length=True):
+    environ["PATH_INFO"] = path
+    environ["REQUEST_METHOD"] = "POST"
+    if content_length:
+        environ["CONTENT_LENGTH"] = str(len(body))
+    else:
+        environ.pop("CONTENT_LENGTH", None)
+        environ["wsgi.input_terminated"] = True
+    environ["wsgi.input"] = TrackingInput(body)
+    return environ
+
+
+def echo(request):
+    return HttpResponse(b"".join(request.stream()).decode())
+
+
+def test_wsgi_rejects_large_content_length_without_reading():
+    app, environ, start_response = setup(max_request_body_size=10)
+    called = []
+
+    @app.route("/echo", allowed_methods=["POST"])
+    def view(request):
+        called.append(request)
+        return HttpResponse(request.content)
+
+    post(environ, "/echo", b"x" * 11)
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+    assert environ["wsgi.input"].requested == []
+    assert called == []
+
+
+def test_wsgi_body_at_the_limit_is_accepted():
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.add_route("/echo", echo, ["POST"])
+
+    post(environ, "/echo", b"x" * 10)
+
+    assert app(environ, start_response) == [b"x" * 10]
+
+
+def test_wsgi_chunked_body_is_cut_off_at_the_limit():
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.add_route("/echo", echo, ["POST"])
+
+    post(environ, "/echo", b"x" * 1000, content_length=False)
+    body = environ["wsgi.input"]
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+    # never read more than one byte past the limit
+    assert sum(body.requested) <= 11
+
+
+def test_wsgi_chunked_body_under_the_limit():
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.add_route("/echo", echo, ["POST"])
+
+    post(environ, "/echo", b"chunked", content_length=False)
+
+    assert app(environ, start_response) == [b"chunked"]
+
+
+@pytest.mark.parametrize(
+    "max_body_size, size, status",
+    [(100, 50, "200"), (100, 101, "413"), (None, 500, "200"), (5, 6, "413")],
+)
+def test_route_max_body_size_overrides_the_app(max_body_size, size, status):
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.route("/echo", allowed_methods=["POST"], max_body_size=max_body_size)(echo)
+
+    post(environ, "/echo", b"x" * size)
+
+    app(environ, start_response)
+    assert start_response.status.startswith(status)
+
+
+def test_route_max_body_size_only_applies_to_that_route():
+    app, environ, start_response = setup(max_request_body_size=10)
+
+    @app.route("/big", allowed_methods=["POST"], max_body_size=100)
+    def big(request):
+        return HttpResponse(request.content)  # pragma: no cover
+
+    app.add_route("/echo", echo, ["POST"])
+    post(environ, "/echo", b"x" * 50)
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+
+
+def test_one_view_on_two_routes_keeps_each_limit():
+    app, environ, start_response = setup(max_request_body_size=1000)
+    app.add_route("/a", echo, ["POST"], max_body_size=10)
+    app.add_route("/b", echo, ["POST"], max_body_size=None)
+
+    post(environ, "/a", b"x" * 50)
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+
+    _, environ, start_response = setup()
+    post(environ, "/b", b"x" * 5000)
+    assert app(environ, start_response) == [b"x" * 5000]
+
+
+def test_limits_for_different_methods_on_one_path():
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.add_route("/echo", echo, ["POST"])
+    app.add_route("/echo", echo, ["PUT"], max_body_size=100)
+
+    post(environ, "/echo", b"x" * 50)
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+
+    _, environ, start_response = setup()
+    post(environ, "/echo", b"x" * 50)
+    environ["REQUEST_METHOD"] = "PUT"
+    assert app(environ, start_response) == [b"x" * 50]
+
+
+def test_bound_method_view_with_max_body_size():
+    class Views:
+        def echo(self, request):
+            return HttpResponse(request.content)
+
+    app, environ, start_response = setup(max_request_body_size=10)
+    app.add_route("/echo", Views().echo, ["POST"], max_body_size=100)
+
+    post(environ, "/echo", b"x" * 50)
+
+    assert app(environ, start_response) == [b"x" * 50]
+
+
+def test_routegroup_max_body_size():
+    app, environ, start_response = setup(max_request_body_size=10)
+    group = RouteGroup(prefix="/api")
+    group.route("/echo", allowed_methods=["POST"], max_body_size=100)(echo)
+    app.include_routegroup(group)
+
+    post(environ, "/api/echo", b"x" * 50)
+
+    assert app(environ, start_response) == [b"x" * 50]
+
+
+def test_routes_list_max_body_size():
+    def view(request):
+        return HttpResponse(request.content)
+
+    app, environ, start_response = setup(
+        routes=[("/echo", view, {"max_body_size": 5, "allowed_methods": ["POST"]})]
+    )
+
+    post(environ, "/echo", b"x" * 6)
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+
+
+@pytest.mark.asyncio
+async def test_asgi_route_max_body_size():
+    app, _, _ = setup(max_request_body_size=10)
+
+    @app.route("/echo", allowed_methods=["POST"], max_body_size=100)
+    async def view(request):
+        return HttpResponse(str(len(await request.read_body())))
+
+    send = Sender()
+    headers = [(b"content-length", b"50")]
+    await app.asgi_app(
+        make_scope("/echo", "POST", headers=headers), Receiver([b"x" * 50]), send
+    )
+
+    assert send.status == 200
+    assert send.body == b"50"
+
+
+def test_bounded_input():
+    stream = BoundedInput(io.BytesIO(b"line one\nline two\n"), 12)
+
+    assert stream.readline() == b"line one\n"
+    assert stream.read(3) == b"lin"
+    with pytest.raises(RequestEntityTooLarge):
+        stream.read()
@@ -0,0 +1,336 @@
+import email.utils
+import os
+
+import pytest
+
+from spiderweb.response import FileResponse
+from spiderweb.tests.helpers import setup
+from spiderweb.utils import parse_http_date, parse_range_header
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", [(0, 99)]),
+        ("bytes=100-", [(100, 1023)]),
+        ("bytes=-100", [(924, 1023)]),
+        ("bytes=-5000", [(0, 1023)]),
+        ("bytes=1000-5000", [(1000, 1023)]),
+        ("bytes=0-0,-1", [(0, 0), (1023, 1023)]),
+        ("bytes= 0-9 , 20-29", [(0, 9), (20, 29)]),
+        # overlapping and adjacent ranges are merged
+        ("bytes=0-9,5-19,20-29", [(0, 29)]),
+        ("bytes=500-599,0-9", [(0, 9), (500, 599)]),
+        ("BYTES=0-1", [(0, 1)]),
+        # unsatisfiable
+        ("bytes=1024-", []),
+        ("bytes=2000-3000", []),
+        ("bytes=-0", []),
+        ("bytes=1024-,2000-", []),
+        # some satisfiable, some not
+        ("bytes=0-1,5000-6000", [(0, 1)]),
+        # ignored
+        ("bytes=10-5", None),
+        ("bytes=abc", None),
+        ("bytes=-", None),
+        ("bytes=+1-2", None),
+        ("bytes=1--2", None),
+        ("bytes=", None),
+        ("items=0-1", None),
+        ("0-1", None),
+        ("bytes=" + ",".join(["0-0"] * 101), None),
+    ],
+)
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, len(DATA)) == expected
+
+
+def test_parse_range_header_empty_file():
+    assert parse_range_header("bytes=0-", 0) == []
+    assert parse_range_header("bytes=-10", 0) == []
+
+
+def test_parse_http_date():
+    assert parse_http_date("Sun, 06 Nov 1994 08:49:37 GMT") == 784111777
+    assert parse_http_date("yesterday") is None
+    assert parse_http_date(None) is None
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+    return path
+
+
+def get(path, method="GET", **headers):
+    app, environ, start_response = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+    environ["REQUEST_METHOD"] = method
+    for name, value in headers.items():
+        environ[f"HTTP_{name.upper()}"] = value
+    body = b"".join(app(environ, start_response))
+    return start_response, body
+
+
+def validators(path):
+    response, _ = get(path)
+    return response.get_headers()
+
+
+def test_full_response_has_validators(data_file):
+    response, body = get(data_file)
+
+    headers = response.get_headers()
+    stat = os.stat(data_file)
+    assert response.status == "200 OK"
+    assert body == DATA
+    assert headers["etag"] == f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    assert headers["last-modified"] == email.utils.formatdate(
+        stat.st_mtime, usegmt=True
+    )
+    assert headers["accept-ranges"] == "bytes"
+    assert headers["content-length"] == "1024"
+
+
+def test_etag_changes_with_the_file(data_file):
+    etag = validators(data_file)["etag"]
+    data_file.write_bytes(DATA + b"more")
+
+    assert validators(data_file)["etag"] != etag
+
+
+@pytest.mark.parametrize(
+    "if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"]
+)
+def test_if_none_match_gives_304(data_file, if_none_match):
+    etag = validators(data_file)["etag"]
+
+    response, body = get(data_file, if_none_match=if_none_match.format(etag=etag))
+
+    headers = response.get_headers()
+    assert response.status == "304 Not Modified"
+    assert body == b""
+    assert headers["etag"] == etag
+    assert "content-length" not in headers
+    assert "content-type" not in headers
+
+
+def test_if_none_match_mismatch_ignores_if_modified_since(data_file):
+    last_modified = validators(data_file)["last-modified"]
+
+    response, body = get(
+        data_file, if_none_match='"stale"', if_modified_since=last_modified
+    )
+
+    assert response.status == "200 OK"
+    assert body == DATA
+
+
+def test_if_modified_since(data_file):
+    last_modified = validators(data_file)["last-modified"]
+
+    response, body = get(data_file, if_modified_since=last_modified)
+    assert response.status == "304 Not Modified"
+    assert body == b""
+
+    response, body = get(data_file, if_modified_since="Sun, 06 Nov 1994 08:49:37 GMT")
+    assert response.status == "200 OK"
+
+    response, body = get(data_file, if_modified_since="not a date")
+    assert response.status == "200 OK"
+
+
+def test_conditional_headers_only_apply_to_get(data_file):
+    etag = validators(data_file)["etag"]
+
+    response, body = get(
+        data_file, method="POST", if_none_match=etag, range="bytes=0-1"
+    )
+
+    assert response.status == "200 OK"
+    assert body == DATA
+
+
+def test_single_range(data_file):
+    response, body = get(data_file, range="bytes=10-19")
+
+    headers = response.get_headers()
+    assert response.status == "206 Partial Content"
+    assert body == DATA[10:20]
+    assert headers["content-range"] == "bytes 10-19/1024"
+    assert headers["content-length"] == "10"
+    assert headers["content-type"] == "application/octet-stream"
+
+
+def test_suffix_and_open_ended_ranges(data_file):
+    _, body = get(data_file, range="bytes=-10")
+    assert body == DATA[-10:]
+
+    _, body = get(data_file, range="bytes=1000-")
+    assert body == DATA[1000:]
+
+    response, body = get(data_file, range="bytes=1000-99999")
+    assert body == DATA[1000:]
+    assert response.get_headers()["content-range"] == "bytes 1000-1023/1024"
+
+
+def test_unsatisfiable_range(data_file):
+    response, body = get(data_file, range="bytes=1024-")
+
+    headers = response.get_headers()
+    assert response.status == "416 Requested Range Not Satisfiable"
+    assert headers["content-range"] == "bytes */1024"
+    assert body == b""
+
+
+def test_invalid_range_sends_the_whole_file(data_file):
+    response, body = get(data_file, range="bytes=20-10")
+
+    assert response.status == "200 OK"
+    assert body == DATA
+
+
+def test_multiple_ranges(data_file):
+    response, body = get(data_file, range="bytes=0-9,100-109,-5")
+
+    headers = response.get_headers()
+    assert response.status == "206 Partial Content"
+    content_type, _, boundary = headers["content-type"].partition("; boundary=")
+    assert content_type == "multipart/byteranges"
+    assert headers["content-length"] == str(len(body))
+
+    parts = body.split(f"--{boundary}".encode())
+    assert parts[0] == b""
+    assert parts[-1] == b"--\r\n"
+    expected = [(0, 9), (100, 109), (1019, 1023)]
+    for part, (first, last) in zip(parts[1:-1], expected):
+        part_headers, _, data = part.partition(b"\r\n\r\n")
+        assert f"Content-Range: bytes {first}-{last}/1024".encode() in part_headers
+        assert b"Content-Type: application/octet-stream" in part_headers
+        assert data == DATA[first : last + 1] + b"\r\n"
+
+
+def test_if_range(data_file):
+    headers = validators(data_file)
+
+    response, body = get(data_file, range="bytes=0-9", if_range=headers["etag"])
+    assert response.status == "206 Partial Content"
+
+    response, body = get(
+        data_file, range="bytes=0-9", if_range=headers["last-modified"]
+    )
+    assert response.status == "206 Partial Content"
+
+    # the file changed since the client's copy, so it gets all of it
+    response, body = get(data_file, range="bytes=0-9", if_range='"stale"')
+    assert response.status == "200 OK"
+    assert body == DATA
+
+    # weak tags never match If-Range
+    response, body = get(data_file, range="bytes=0-9", if_range="W/" + headers["etag"])
+    assert response.status == "200 OK"
+
+
+def test_range_goes_through_the_file_wrapper(data_file):
+    app, environ, start_response = setup()
+    app.add_route("/", lambda request: FileResponse(str(data_file)))
+    environ["HTTP_RANGE"] = "bytes=100-199"
+    wrapped = []
+
+    def file_wrapper(filelike, blksize):
+        wrapped.append(filelike)
+        return iter(lambda: filelike.read(blksize), b"")
+
+    environ["wsgi.file_wrapper"] = file_wrapper
+
+    assert b"".join(app(environ, start_response)) == DATA[100:200]
+    # positioned at the start of the range, like sendfile() expects
+    assert wrapped[0].fileno() == wrapped[0].file.fileno()
+    assert wrapped[0].offset == 100
+
+
+def test_send_file_supports_ranges():
+    app, environ, start_response = setup(
+        staticfiles_dirs=["spiderweb/tests/staticfiles"], debug=True
+    )
+    environ["PATH_INFO"] = "/static/file_for_testing_fileresponse.txt"
+    environ["HTTP_RANGE"] = "bytes=0-3"
+
+    body = b"".join(app(environ, start_response))
+
+    assert start_response.status == "206 Partial Content"
+    with open(
+        "spiderweb/tests/staticfiles/file_for_testing_fileresponse.txt", "rb"
+    ) as f:
+        assert body == f.read(4)
+
+
+async def call_asgi(app, headers, extensions=None):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")] + headers,
+        "extensions": extensions or {},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app.asgi_app(scope, receive, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_asgi_range_uses_zerocopysend_with_offset(data_file):
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(data_file)))
+
+    messages = await call_asgi(
+        app,
+        [(b"range", b"bytes=100-199")],
+        {"http.response.zerocopysend": {}, "http.response.pathsend": {}},
+    )
+
+    assert messages[0]["status"] == 206
+    sent = messages[1]
+    assert sent["type"] == "http.response.zerocopysend"
+    assert sent["offset"] == 100
+    assert sent["count"] == 100
+    assert sent["file"].name == str(data_file)
+
+
+@pytest.mark.asyncio
+async def test_asgi_multiple_ranges_are_read_in_chunks(data_file):
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(data_file)))
+
+    messages = await call_asgi(
+        app, [(b"range", b"bytes=0-1,10-11")], {"http.response.pathsend": {}}
+    )
+
+    assert messages[0]["status"] == 206
+    assert all(m["type"] == "http.response.body" for m in messages[1:])
+    body = b"".join(m["body"] for m in messages[1:])
+    assert b"\r\n\r\n" + DATA[0:2] + b"\r\n" in body
+    assert b"\r\n\r\n" + DATA[10:12] + b"\r\n" in body
+
+
+@pytest.mark.asyncio
+async def test_asgi_if_none_match(data_file):
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(data_file)))
+    etag = validators(data_file)["etag"]
+
+    messages = await call_asgi(app, [(b"if-none-match", etag.encode())])
+
+    assert messages[0]["status"] == 304
+    assert messages[1]["body"] == b""
@@ -1,10 +1,16 @@
+import gc
+import hashlib
 import string
 from io import BytesIO
 from pathlib import Path
 
+import pytest
 from hypothesis import given, strategies as st, settings, HealthCheck
 
-from spiderweb.files import MediaFile
+from spiderweb.exceptions import ConfigError
+from spiderweb.files import FIELD_MEMORY_LIMIT, UPLOAD_TEMP_DIR, MediaFile
+from spiderweb.response import HttpResponse
+from spiderweb.tests.helpers import setup
 
 
 class FakeMultipartPart:
@@ -185,3 +191,211 @@ def test_get_random_suffix_properties():
     outputs = {MediaFile.get_random_suffix(mf) for _ in range(10)}
     assert all(len(s) == 6 for s in outputs)
     assert all(set(s) <= set(string.ascii_letters) for s in outputs)
+
+
+def multipart_body(boundary: str, parts: list[tuple]) -> bytes:
+    """parts are (name, value) for fields or (name, filename, data) for files"""
+    out = b""
+    for part in parts:
+        out += f"--{boundary}\r\n".encode()
+        if len(part) == 2:
+            name, value = part
+            out += f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            out += value
+        else:
+            name, filename, value = part
+            out += (
+                f'Content-Disposition: form-data; name="{name}";'
+                f' filename="{filename}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            out += value
+        out += b"\r\n"
+    return out + f"--{boundary}--\r\n".encode()
+
+
+def upload_environ(environ, parts, boundary="xXxBOUNDARYxXx"):
+    body = multipart_body(boundary, parts)
+    environ["PATH_INFO"] = "/upload"
+    environ["REQUEST_METHOD"] = "POST"
+    environ["CONTENT_TYPE"] = f"multipart/form-data; boundary={boundary}"
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ["wsgi.input"] = BytesIO(body)
+    return environ
+
+
+def leftover_temp_files(media_dir: Path) -> list[Path]:
+    return list((media_dir / UPLOAD_TEMP_DIR).glob(".upload-*"))
+
+
+def test_upload_is_streamed_to_media_dir_and_moved_on_save(tmp_path):
+    media_dir = tmp_path / "media"
+    app, environ, start_response = setup(
+        media_dir=media_dir, upload_hash_algorithm="sha256"
+    )
+    seen = {}
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        file = request.FILES["video"]
+        seen["temp"] = file._file.path
+        assert file._file.path.parent == media_dir / UPLOAD_TEMP_DIR
+        assert file.read() == data
+        seen["saved"] = file.save()
+        seen["hash"] = file.hash
+        return HttpResponse(request.POST["title"])
+
+    data = bytes(range(256)) * 1024
+    upload_environ(environ, [("title", b"cats"), ("video", "cats.mp4", data)])
+
+    assert app(environ, start_response) == [b"cats"]
+    assert seen["saved"] == media_dir / "cats.mp4"
+    assert seen["saved"].read_bytes() == data
+    assert not seen["temp"].exists()
+    assert seen["hash"] == hashlib.sha256(data).hexdigest()
+    assert leftover_temp_files(media_dir) == []
+
+
+def test_upload_is_copied_if_it_cannot_be_renamed(tmp_path, monkeypatch):
+    media_dir = tmp_path / "media"
+    app, environ, start_response = setup(media_dir=media_dir)
+    seen = {}
+
+    def cross_device(src, dst):
+        raise OSError(18, "Invalid cross-device link")
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        file = request.FILES["file"]
+        seen["temp"] = file._file.path
+        monkeypatch.setattr("spiderweb.files.os.replace", cross_device)
+        seen["saved"] = file.save()
+        return HttpResponse(file.read().decode())
+
+    upload_environ(environ, [("file", "a.txt", b"hello")])
+
+    assert app(environ, start_response) == [b"hello"]
+    assert seen["saved"].read_bytes() == b"hello"
+    assert not seen["temp"].exists()
+
+
+def test_uploads_in_progress_are_not_served(tmp_path):
+    media_dir = tmp_path / "media"
+    (media_dir / UPLOAD_TEMP_DIR).mkdir(parents=True)
+    app, environ, start_response = setup(
+        debug=True, media_dir=media_dir, staticfiles_dirs=[media_dir]
+    )
+    (media_dir / UPLOAD_TEMP_DIR / ".upload-abc.part").write_bytes(b"secret")
+    (media_dir / "public.txt").write_bytes(b"public")
+
+    environ["PATH_INFO"] = "/media/public.txt"
+    assert b"".join(app(environ, start_response)) == b"public"
+
+    environ["PATH_INFO"] = f"/media/{UPLOAD_TEMP_DIR}/.upload-abc.part"
+    body = b"".join(app(environ, start_response))
+    assert start_response.status.startswith("404")
+    assert b"secret" not in body
+
+
+def test_unsaved_uploads_are_removed(tmp_path):
+    media_dir = tmp_path / "media"
+    app, environ, start_response = setup(media_dir=media_dir)
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        size = request.FILES["file"].size
+        assert len(leftover_temp_files(media_dir)) == 1
+        return HttpResponse(str(size))
+
+    upload_environ(environ, [("file", "a.txt", b"hello")])
+
+    assert app(environ, start_response) == [b"5"]
+    gc.collect()
+    assert leftover_temp_files(media_dir) == []
+
+
+def test_multiple_files_with_the_same_name(tmp_path):
+    app, environ, start_response = setup(media_dir=tmp_path / "media")
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        files = request.FILES.getall("photos")
+        assert all(isinstance(f, MediaFile) for f in files)
+        assert request.FILES["photos"].filename == "b.png"
+        return HttpResponse(",".join(f.read().decode() for f in files))
+
+    upload_environ(environ, [("photos", "a.png", b"one"), ("photos", "b.png", b"two")])
+
+    assert app(environ, start_response) == [b"one,two"]
+
+
+def test_upload_over_max_file_size(tmp_path):
+    media_dir = tmp_path / "media"
+    app, environ, start_response = setup(media_dir=media_dir, upload_max_file_size=10)
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        return HttpResponse(str(len(request.FILES)))
+
+    upload_environ(
+        environ, [("small", "a.txt", b"x" * 10), ("big", "b.txt", b"x" * 11)]
+    )
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+    assert leftover_temp_files(media_dir) == []
+
+
+def test_upload_over_max_total_size_is_rejected_before_reading(tmp_path):
+    app, environ, start_response = setup(
+        media_dir=tmp_path / "media", upload_max_total_size=100
+    )
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        return HttpResponse(str(len(request.FILES)))
+
+    upload_environ(environ, [("file", "a.txt", b"x" * 200)])
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+    assert environ["wsgi.input"].tell() == 0
+
+
+def test_upload_over_max_total_size_without_content_length(tmp_path):
+    media_dir = tmp_path / "media"
+    app, environ, start_response = setup(media_dir=media_dir, upload_max_total_size=10)
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        return HttpResponse(str(len(request.FILES)))
+
+    upload_environ(environ, [("a", "a.txt", b"x" * 6), ("b", "b.txt", b"x" * 6)])
+    del environ["CONTENT_LENGTH"]
+    environ["wsgi.input_terminated"] = True
+
+    app(environ, start_response)
+    assert start_response.status.startswith("413")
+    assert leftover_temp_files(media_dir) == []
+
+
+def test_big_text_field_goes_to_files(tmp_path):
+    app, environ, start_response = setup(media_dir=tmp_path / "media")
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        assert "notes" not in request.POST
+        # fields after the big one are still kept as text
+        assert request.POST["small"] == "hello"
+        assert list(request.FILES) == ["notes"]
+        return HttpResponse(str(request.FILES["notes"].size))
+
+    size = FIELD_MEMORY_LIMIT + 1
+    upload_environ(environ, [("notes", b"n" * size), ("small", b"hello")])
+
+    assert app(environ, start_response) == [str(size).encode()]
+
+
+def test_unknown_upload_hash_algorithm():
+    with pytest.raises(ConfigError):
+        setup(upload_hash_algorithm="not-a-hash")
@@ -0,0 +1,120 @@
+import pytest
+
+from spiderweb.exceptions import ConfigError
+from spiderweb.response import HttpResponse
+from spiderweb.tests.helpers import setup
+
+
+def test_freeze_routes_report():
+    app, environ, start_response = setup()
+
+    @app.route("/")
+    def index(request):
+        return HttpResponse("index")
+
+    @app.route("/users/<int:user_id>")
+    def user(request, user_id):
+        return HttpResponse(str(user_id))
+
+    @app.route("/users/<int:user_id>/files/<path:filename>")
+    def user_file(request, user_id, filename):
+        return HttpResponse(filename)
+
+    report = app.freeze_routes()
+
+    assert report["routes"] == 3
+    assert report["static_routes"] == 1
+    assert report["converters"] == {"int": 2, "path": 1}
+    assert report["shadowed"] == []
+    assert report["compile_time_ms"] >= 0
+    assert app._route_trie is not None
+
+
+def test_freeze_routes_reports_shadowed_routes():
+    app, environ, start_response = setup()
+
+    @app.route("/posts/<str:slug>")
+    def by_slug(request, slug):
+        return HttpResponse(slug)
+
+    @app.route("/posts/new")
+    def new_post(request):
+        return HttpResponse("new")
+
+    @app.route("/posts/<int:post_id>")
+    def by_id(request, post_id):
+        return HttpResponse(str(post_id))
+
+    report = app.freeze_routes()
+    assert report["shadowed"] == [
+        ("/posts/new", "/posts/<str:slug>"),
+        ("/posts/<int:post_id>", "/posts/<str:slug>"),
+    ]
+
+
+def test_first_request_freezes_routes():
+    app, environ, start_response = setup()
+
+    @app.route("/ping")
+    def ping(request):
+        return HttpResponse("pong")
+
+    assert not app._routes_frozen
+    environ["PATH_INFO"] = "/ping"
+    assert app(environ, start_response) == [b"pong"]
+    assert app._routes_frozen
+
+
+def test_adding_routes_after_freeze_is_rejected():
+    app, environ, start_response = setup()
+    app.freeze_routes()
+
+    with pytest.raises(ConfigError):
+
+        @app.route("/late")
+        def late(request):
+            return HttpResponse("late")
+
+
+def test_adding_routes_after_freeze_is_allowed_in_debug_mode():
+    app, environ, start_response = setup(debug=True)
+
+    @app.route("/early")
+    def early(request):
+        return HttpResponse("early")
+
+    environ["PATH_INFO"] = "/early"
+    assert app(environ, start_response) == [b"early"]
+
+    @app.route("/late/<int:n>")
+    def late(request, n):
+        return HttpResponse(str(n))
+
+    assert not app._routes_frozen
+    environ["PATH_INFO"] = "/late/3"
+    assert app(environ, start_response) == [b"3"]
+    assert app._routes_frozen
+
+
+@pytest.mark.asyncio
+async def test_asgi_lifespan_startup_freezes_routes():
+    app, environ, start_response = setup()
+
+    def add_late_route():
+        app.add_route("/added-on-startup", lambda request: HttpResponse("ok"))
+
+    app.on_startup.append(add_late_route)
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(msg):
+        sent.append(msg)
+
+    await app.asgi_app({"type": "lifespan"}, receive, send)
+
+    assert sent[0]["type"] == "lifespan.startup.complete"
+    assert app._routes_frozen
+    assert app.get_route("/added-on-startup")
@@ -0,0 +1,106 @@
+import httpx
+import pytest
+
+from spiderweb import RouteGroup
+from spiderweb.exceptions import ConfigError
+from spiderweb.response import HttpResponse
+from spiderweb.tests.helpers import call, setup
+
+
+def make_app(**kwargs):
+    app, environ, start_response = setup(**kwargs)
+    api = app.host("api.example.com")
+    admin = app.host("admin.example.com")
+
+    @api.route("/users")
+    def api_users(request):
+        return HttpResponse("api users")
+
+    @admin.route("/users")
+    def admin_users(request):
+        return HttpResponse("admin users")
+
+    @app.route("/health")
+    def health(request):
+        return HttpResponse("ok")
+
+    return app, environ, start_response
+
+
+def test_routes_are_separated_by_host():
+    app, environ, start_response = make_app()
+
+    assert call(app, environ, start_response, "/users", host="api.example.com") == (
+        b"api users"
+    )
+    assert call(
+        app, environ, start_response, "/users", host="ADMIN.example.com:8000"
+    ) == (b"admin users")
+    call(app, environ, start_response, "/users", host="www.example.com")
+    assert start_response.status.startswith("404")
+
+
+def test_host_routes_fall_back_to_app_routes():
+    app, environ, start_response = make_app()
+
+    assert (
+        call(app, environ, start_response, "/health", host="api.example.com") == b"ok"
+    )
+    assert (
+        call(app, environ, start_response, "/health", host="www.example.com") == b"ok"
+    )
+
+
+def test_host_routes_still_respect_allowed_hosts():
+    app, environ, start_response = make_app(allowed_hosts=["admin.example.com"])
+
+    call(app, environ, start_response, "/users", host="api.example.com")
+    assert start_response.status.startswith("403")
+    assert call(app, environ, start_response, "/users", host="admin.example.com") == (
+        b"admin users"
+    )
+
+
+def test_host_routegroup_and_reverse():
+    app, environ, start_response = setup()
+    group = RouteGroup(prefix="/v1", namespace="v1")
+
+    @group.route("/items/<int:item_id>", name="item")
+    def item(request, item_id):
+        return HttpResponse(str(item_id))
+
+    api = app.host("api.example.com")
+    api.include_routegroup(group)
+
+    assert app.host("api.example.com") is api
+    assert api.reverse("v1:item", {"item_id": 4}) == "/v1/items/4"
+    assert call(
+        app, environ, start_response, "/v1/items/4", host="api.example.com"
+    ) == (b"4")
+
+
+def test_freeze_routes_covers_host_tables():
+    app, environ, start_response = make_app()
+    report = app.freeze_routes()
+
+    assert report["routes"] == 1
+    assert report["hosts"]["api.example.com"]["routes"] == 1
+    assert app.host("api.example.com")._routes_frozen
+
+    with pytest.raises(ConfigError):
+        app.host("api.example.com").add_route("/late", lambda request: None)
+    with pytest.raises(ConfigError):
+        app.host("new.example.com").add_route("/late", lambda request: None)
+
+
+@pytest.mark.asyncio
+async def test_asgi_host_routes():
+    app, _, _ = make_app()
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app.asgi_app),
+        base_url="http://api.example.com",
+    ) as client:
+        resp = await client.get("/users")
+
+    assert resp.text == "api users"
@@ -7,7 +7,13 @@ from wsgiref.util import setup_testing_defaults
 import pytest
 
 from spiderweb import SpiderwebRouter
-from spiderweb.exceptions import ServerError
+from spiderweb.exceptions import (
+    Forbidden,
+    NotFound,
+    RequestEntityTooLarge,
+    ServerError,
+    SpiderwebNetworkException,
+)
 from spiderweb.middleware.base import SpiderwebMiddleware
 from spiderweb.response import HttpResponse, TemplateResponse
 from spiderweb.tests.helpers import setup
@@ -334,3 +340,28 @@ def test_send_error_response_basic():
     result = app(environ, start_response)
     body = b"".join(result)
     assert b"Something went wrong" in body
+
+
+@pytest.mark.parametrize(
+    "exc, status",
+    [
+        (NotFound(), "404 Not Found"),
+        (Forbidden(), "403 Forbidden"),
+        (RequestEntityTooLarge(), "413 Request Entity Too Large"),
+        (ServerError(), "500 Internal Server Error"),
+        (SpiderwebNetworkException(418), "418 I'm a Teapot"),
+        # not a real status code
+        (SpiderwebNetworkException(999), "500 Internal Server Error"),
+    ],
+)
+def test_send_error_response_uses_the_exception_code(exc, status):
+    """WSGI error responses get the exception's status, like ASGI does."""
+    app, environ, start_response = setup()
+
+    @app.route("/")
+    def index(request):
+        raise exc
+
+    body = b"".join(app(environ, start_response))
+    assert start_response.status == status
+    assert f"Code: {exc.code}".encode() in body
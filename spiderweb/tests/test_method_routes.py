@@ -0,0 +1,170 @@
+import httpx
+import pytest
+
+from spiderweb import RouteGroup
+from spiderweb.exceptions import ConfigError
+from spiderweb.response import HttpResponse
+from spiderweb.tests.helpers import call, setup
+
+
+def test_same_path_different_methods():
+    app, environ, start_response = setup()
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["POST"])
+    def create_item(request):
+        return HttpResponse("create")
+
+    assert call(app, environ, start_response, "/items", "GET") == b"list"
+    assert call(app, environ, start_response, "/items", "POST") == b"create"
+    assert app.get_route("/items")[2] == ["GET", "POST"]
+
+
+def test_same_path_with_converters():
+    app, environ, start_response = setup()
+
+    @app.route("/items/<int:item_id>", allowed_methods=["GET"])
+    def get_item(request, item_id):
+        return HttpResponse(f"get {item_id}")
+
+    @app.route("/items/<int:item_id>", allowed_methods=["DELETE"])
+    def delete_item(request, item_id):
+        return HttpResponse(f"delete {item_id}")
+
+    assert call(app, environ, start_response, "/items/3", "GET") == b"get 3"
+    assert call(app, environ, start_response, "/items/3", "DELETE") == b"delete 3"
+
+
+def test_overlapping_methods_are_rejected():
+    app, environ, start_response = setup()
+
+    @app.route("/items", allowed_methods=["GET", "POST"])
+    def items(request):
+        return HttpResponse("items")
+
+    with pytest.raises(ConfigError):
+
+        @app.route("/items", allowed_methods=["POST"])
+        def create_item(request):
+            return HttpResponse("create")
+
+
+def test_unregistered_method_gets_405_without_calling_views():
+    app, environ, start_response = setup()
+    called = []
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        called.append("GET")
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["POST"])
+    def create_item(request):
+        called.append("POST")
+        return HttpResponse("create")
+
+    call(app, environ, start_response, "/items", "PUT")
+    assert start_response.status.startswith("405")
+    assert called == []
+
+
+def test_automatic_options():
+    app, environ, start_response = setup()
+    called = []
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        called.append("GET")
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["POST"])
+    def create_item(request):
+        called.append("POST")
+        return HttpResponse("create")
+
+    assert call(app, environ, start_response, "/items", "OPTIONS") == b""
+    assert start_response.status.startswith("204")
+    assert start_response.get_headers()["allow"] == "GET, OPTIONS, POST"
+    assert called == []
+
+
+def test_registered_options_view_is_used():
+    app, environ, start_response = setup()
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["OPTIONS"])
+    def items_options(request):
+        return HttpResponse("custom options")
+
+    assert call(app, environ, start_response, "/items", "OPTIONS") == (
+        b"custom options"
+    )
+
+
+def test_same_path_different_methods_with_append_slash():
+    app, environ, start_response = setup(append_slash=True)
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["POST"])
+    def create_item(request):
+        return HttpResponse("create")
+
+    call(app, environ, start_response, "/items", "POST")
+    assert start_response.status.startswith("302")
+    assert call(app, environ, start_response, "/items/", "POST") == b"create"
+    assert call(app, environ, start_response, "/items/", "GET") == b"list"
+
+
+def test_routegroup_same_path_different_methods():
+    group = RouteGroup(prefix="/api", namespace="api")
+
+    @group.route("/items", allowed_methods=["GET"], name="list")
+    def list_items(request):
+        return HttpResponse("list")
+
+    @group.route("/items", allowed_methods=["POST"], name="create")
+    def create_item(request):
+        return HttpResponse("create")
+
+    app, environ, start_response = setup()
+    app.include_routegroup(group)
+
+    assert call(app, environ, start_response, "/api/items", "POST") == b"create"
+    assert app.reverse("api:list") == app.reverse("api:create") == "/api/items"
+
+
+@pytest.mark.asyncio
+async def test_asgi_same_path_different_methods():
+    app, _, _ = setup()
+
+    @app.route("/items", allowed_methods=["GET"])
+    def list_items(request):
+        return HttpResponse("list")
+
+    @app.route("/items", allowed_methods=["POST"])
+    async def create_item(request):
+        return HttpResponse("create")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app.asgi_app),
+        base_url="http://testserver",
+    ) as client:
+        get = await client.get("/items")
+        post = await client.post("/items")
+        options = await client.options("/items")
+        put = await client.put("/items")
+
+    assert get.text == "list"
+    assert post.text == "create"
+    assert options.status_code == 204
+    assert options.headers["allow"] == "GET, OPTIONS, POST"
+    assert put.status_code == 405
@@ -402,6 +402,32 @@ class TestGzipMiddleware:
         assert str(app(environ, start_response)[0]).startswith("b'\\x1f\\x8b\\x08")
         assert "content-encoding" in start_response.get_headers()
 
+    @pytest.mark.parametrize(
+        "headers, compressed",
+        [
+            ({"X-Custom": "yes"}, True),
+            ({"Content-Encoding": "gzip"}, False),
+        ],
+    )
+    def test_view_can_replace_headers_with_a_dict(self, headers, compressed):
+        app, environ, start_response = setup(
+            **self.middleware,
+            gzip_minimum_response_length=1,
+        )
+
+        def view(request):
+            resp = HttpResponse("Hi!")
+            resp.headers = dict(headers)
+            return resp
+
+        app.add_route("/", view)
+
+        environ["HTTP_ACCEPT_ENCODING"] = "gzip"
+        body = b"".join(app(environ, start_response))
+        # already gzipped content is passed through as it is
+        assert body.startswith(b"\x1f\x8b") is compressed
+        assert start_response.get_headers()["content-encoding"] == "gzip"
+
     def test_not_enabled_on_error_response(self):
         app, environ, start_response = setup(
             **self.middleware,
@@ -428,7 +454,7 @@ class TestGzipMiddleware:
         environ["HTTP_USER_AGENT"] = "hi"
         environ["REMOTE_ADDR"] = "/"
         environ["REQUEST_METHOD"] = "GET"
-        assert app(environ, start_response) == [bytes("hi", DEFAULT_ENCODING)]
+        assert b"".join(app(environ, start_response)) == bytes("hi", DEFAULT_ENCODING)
         assert "content-encoding" not in start_response.get_headers()
 
     def test_invalid_response_length(self):
@@ -752,7 +778,12 @@ class TestCorsMiddleware:
         )
         environ["REQUEST_METHOD"] = "OPTIONS"
         app(environ, start_response)
-        assert start_response.status == "405 Method Not Allowed"
+        # not a preflight, so the router answers OPTIONS from the route's methods
+        assert start_response.status == "204 No Content"
+        assert (
+            start_response.get_headers()["allow"]
+            == "DELETE, GET, OPTIONS, PATCH, POST, PUT"
+        )
 
     def test_allow_all_origins_get(self):
         app, environ, start_response = setup(
@@ -13,6 +13,7 @@ import pytest
 
 from spiderweb.middleware.pydantic import RequestModel
 from spiderweb.response import HttpResponse
+from spiderweb.routes import View
 from spiderweb.tests.helpers import StartResponse, setup
 
 pydantic = pytest.importorskip("pydantic", reason="pydantic not installed")
@@ -185,3 +186,19 @@ def test_pydantic_multiple_errors_reported():
     assert sr.status.startswith("400")
     body = json.loads(b"".join(result).decode())
     assert len(body["errors"]) >= 3
+
+
+def test_pydantic_with_class_based_view():
+    """Class-based views are left alone instead of breaking the request."""
+    app, _, _ = setup(middleware=["spiderweb.middleware.pydantic.PydanticMiddleware"])
+
+    @app.route("/view")
+    class FormView(View):
+        def post(self, request):
+            return HttpResponse("posted")
+
+    sr = StartResponse()
+    result = app(_post_environ({"name": "Alice"}, path="/view"), sr)
+
+    assert sr.status.startswith("200")
+    assert b"".join(result) == b"posted"
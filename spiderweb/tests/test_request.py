@@ -0,0 +1,322 @@
+import io
+import json
+import sys
+import tracemalloc
+
+import pytest
+from multipart import MultiDict
+
+from spiderweb.request import Request, _UNSET
+from spiderweb.response import HttpResponse, JsonResponse
+from spiderweb.tests.helpers import setup, RequestFactory
+from spiderweb.utils import EMPTY_DICT, EMPTY_MULTIDICT, EMPTY_QUERYDICT, QueryDict
+
+LAZY_ATTRIBUTES = [
+    "headers",
+    "META",
+    "COOKIES",
+    "body",
+    "content",
+    "GET",
+    "POST",
+    "FILES",
+]
+
+
+def is_loaded(request, name):
+    return getattr(request, getattr(Request, name).slot) is not _UNSET
+
+
+def make_environ(header_count=0, body=b""):
+    environ = {}
+    for i in range(header_count):
+        environ[f"HTTP_X_EXTRA_{i}"] = "x" * 64
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ["wsgi.input"] = io.BytesIO(body)
+    return environ
+
+
+def test_request_is_not_parsed_up_front():
+    environ = make_environ(header_count=5, body=b"a=1")
+    environ["HTTP_COOKIE"] = "a=1"
+    req = RequestFactory.create_request(environ=environ)
+
+    for name in LAZY_ATTRIBUTES:
+        assert not is_loaded(req, name)
+    assert environ["wsgi.input"].tell() == 0
+
+
+def test_lazy_attributes_match_the_environ():
+    environ = make_environ(body=b"a=1&b=2")
+    environ["HTTP_COOKIE"] = "session=abc; theme=dark"
+    environ["QUERY_STRING"] = "page=2"
+    req = RequestFactory.create_request(environ=environ, content="")
+
+    assert req.headers["cookie"] == "session=abc; theme=dark"
+    assert req.headers["content_length"] == "7"
+    assert req.META["HTTP_USER_AGENT"] == "Mozilla/5.0 (testrequest)"
+    assert req.META["client_address"] == "1.1.1.1"
+    assert req.COOKIES == {"session": "abc", "theme": "dark"}
+    assert req.content == "a=1&b=2"
+    # the query string, not the body
+    assert req.GET.dict == {"page": ["2"]}
+    assert len(req.POST) == 0
+    assert len(req.FILES) == 0
+
+
+def test_body_is_read_once():
+    environ = make_environ(body=b'{"a": 1}')
+    req = RequestFactory.create_request(environ=environ, content="")
+
+    assert len(req.GET) == 0
+    assert req.json() == {"a": 1}
+    assert req.content == '{"a": 1}'
+    assert environ["wsgi.input"].read() == b""
+
+
+def test_lazy_attributes_can_be_assigned():
+    environ = make_environ(body=b"a=1")
+    req = RequestFactory.create_request(environ=environ)
+    req.META = {"replaced": True}
+    req.content = "overridden"
+
+    assert req.META == {"replaced": True}
+    assert req.content == "overridden"
+    # the body still gets read for the others, but doesn't clobber content
+    assert len(req.POST) == 0
+    assert environ["wsgi.input"].tell() == 3
+    assert req.content == "overridden"
+
+
+def test_request_allocations_do_not_grow_with_headers_or_body():
+    def allocated(environ):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            req = RequestFactory.create_request(environ=environ)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert req is not None
+        return after - before
+
+    small = allocated(make_environ())
+    large = allocated(make_environ(header_count=100, body=b"x" * 65536))
+    # eagerly copying the headers alone is several KB, and the body is 64KB
+    assert large - small < 1024
+
+
+def test_health_check_does_not_parse_the_request():
+    app, environ, start_response = setup()
+    requests = []
+
+    @app.route("/health")
+    def health(request):
+        requests.append(request)
+        return HttpResponse("ok")
+
+    environ["PATH_INFO"] = "/health"
+    environ["HTTP_COOKIE"] = "a=1"
+    assert app(environ, start_response) == [b"ok"]
+    for name in LAZY_ATTRIBUTES:
+        assert not is_loaded(requests[0], name)
+
+
+def test_empty_values_are_shared():
+    first = RequestFactory.create_request(environ=make_environ())
+    second = RequestFactory.create_request(environ=make_environ())
+
+    for name in ["COOKIES", "GET", "POST", "FILES"]:
+        assert getattr(first, name)._target is getattr(second, name)._target
+    assert first.COOKIES._target is EMPTY_DICT
+    assert first.GET._target is EMPTY_QUERYDICT
+    assert first.POST._target is EMPTY_MULTIDICT
+    # repeated reads hand back the same object
+    assert first.POST is first.POST
+
+
+def test_empty_values_are_copied_on_write():
+    req = RequestFactory.create_request(environ=make_environ())
+    other = RequestFactory.create_request(environ=make_environ())
+    post = req.POST
+
+    req.COOKIES["a"] = "1"
+    post["a"] = "1"
+    post["b"] = "2"
+    req.GET.update({"a": "1"})
+    req.FILES.append("f", "x")
+
+    assert req.COOKIES == {"a": "1"}
+    assert type(req.COOKIES) is dict
+    assert isinstance(req.POST, MultiDict)
+    assert req.POST["a"] == "1"
+    assert req.POST["b"] == "2"
+    assert isinstance(req.GET, QueryDict)
+    assert req.GET["a"] == "1"
+    assert req.FILES.getall("f") == ["x"]
+    # nobody else sees the writes
+    assert len(other.COOKIES) == len(other.POST) == len(other.GET) == 0
+    assert len(EMPTY_DICT) == len(EMPTY_MULTIDICT) == len(EMPTY_QUERYDICT) == 0
+    with pytest.raises(TypeError):
+        EMPTY_MULTIDICT["a"] = "1"
+
+
+def test_middleware_can_write_to_empty_values():
+    app, environ, start_response = setup(
+        middleware=["spiderweb.tests.middleware.FillInEmptyValuesMiddleware"]
+    )
+    seen = {}
+
+    @app.route("/")
+    def index(request):
+        seen["POST"] = request.POST["x"]
+        seen["COOKIES"] = request.COOKIES["k"]
+        seen["GET"] = request.GET["q"]
+        return HttpResponse("ok")
+
+    assert app(environ, start_response) == [b"ok"]
+    assert seen == {"POST": "from middleware", "COOKIES": "v", "GET": "search"}
+
+
+def test_request_and_response_are_slotted():
+    req = RequestFactory.create_request(environ=make_environ())
+    resp = JsonResponse(data={})
+
+    # nothing has been attached yet, so there's no per-instance dict
+    assert vars(req) == {}
+    assert sys.getsizeof(req) < 256
+    # middleware can still hang things off of them
+    req.user = "someone"
+    resp.extra = True
+    assert vars(req) == {"user": "someone"}
+    assert vars(resp) == {"extra": True}
+
+
+def test_get_comes_from_the_query_string():
+    environ = make_environ(body=b"from=body")
+    environ["QUERY_STRING"] = "q=spider+web&tag=a&tag=b&page=2&empty=&flag"
+    req = RequestFactory.create_request(environ=environ)
+
+    assert req.GET["q"] == "spider web"
+    assert req.GET["tag"] == "b"
+    assert req.GET.getall("tag") == ["a", "b"]
+    assert req.GET.get_list("tag") == ["a", "b"]
+    assert req.GET.get_int("page") == 2
+    assert req.GET["empty"] == ""
+    assert req.GET["flag"] == ""
+    assert "from" not in req.GET
+    # GET never touches the body
+    assert environ["wsgi.input"].tell() == 0
+
+
+def test_get_is_empty_without_a_query_string():
+    req = RequestFactory.create_request(environ=make_environ())
+
+    assert len(req.GET) == 0
+    assert req.GET.get_int("page", 1) == 1
+    assert req.GET.get_list("tag") == []
+
+
+def test_query_dict_typed_accessors():
+    query = QueryDict("page=abc&size=10&size=20&id=%2D5")
+
+    assert query.get_int("page") is None
+    assert query.get_int("page", 1) == 1
+    assert query.get_int("size") == 20
+    assert query.get_int("id") == -5
+    assert query.get_int("missing", 7) == 7
+    assert query.get_list("size") == ["10", "20"]
+    assert query.get_list("missing", ["default"]) == ["default"]
+
+
+def test_query_dict_matches_multidict_behavior():
+    query = QueryDict("a=1&a=2&b=3")
+
+    assert query["a"] == "2"
+    assert query.get("a", index=0) == "1"
+    assert query.get("b", index=0) == "3"
+    assert query.get("b", index=1) is None
+    assert list(query.iterallitems()) == [("a", "1"), ("a", "2"), ("b", "3")]
+    assert query.dict == {"a": ["1", "2"], "b": ["3"]}
+    assert len(query) == 2
+
+    query["b"] = "4"
+    query.replace("a", "5")
+    assert query.dict == {"a": ["5"], "b": ["3", "4"]}
+
+
+def test_query_dict_decodes_utf8():
+    # WSGI servers decode the raw query string as latin-1
+    raw = "name=caf\u00e9&city=%E6%9D%B1%E4%BA%AC".encode("utf-8").decode("latin1")
+    query = QueryDict(raw)
+
+    assert query["name"] == "caf\u00e9"
+    assert query["city"] == "\u6771\u4eac"
+
+
+def test_query_dict_accepts_text_that_is_not_latin1():
+    query = QueryDict("b=\u20ac&city=\u6771\u4eac&name=caf\u00e9")
+
+    assert query["b"] == "\u20ac"
+    assert query["city"] == "\u6771\u4eac"
+    assert query["name"] == "caf\u00e9"
+
+
+def test_json_is_parsed_once_from_the_raw_body():
+    calls = []
+
+    def loads(data):
+        calls.append(data)
+        return json.loads(data)
+
+    app, environ, start_response = setup(json_loads=loads)
+
+    @app.route("/", allowed_methods=["POST"])
+    def index(request):
+        assert request.json() == {"a": 1}
+        assert request.json() is request.json()
+        # the body never had to be decoded to text
+        assert not is_loaded(request, "content")
+        return HttpResponse("ok")
+
+    body = b'{"a": 1}'
+    environ["REQUEST_METHOD"] = "POST"
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ["wsgi.input"] = io.BytesIO(body)
+
+    assert app(environ, start_response) == [b"ok"]
+    assert calls == [body]
+
+
+def test_json_falls_back_to_initial_content():
+    req = RequestFactory.create_request(content='{"a": 1}')
+
+    assert req.json() == {"a": 1}
+    assert req.content == '{"a": 1}'
+
+
+def test_json_follows_replaced_content():
+    req = RequestFactory.create_request(environ=make_environ(body=b'{"a": 1}'))
+    req.content = '{"b": 2}'
+
+    assert req.json() == {"b": 2}
+
+
+@pytest.mark.parametrize(
+    "attribute, value", [("content", '{"b": 2}'), ("body", b'{"b": 2}')]
+)
+def test_json_follows_content_replaced_after_parsing(attribute, value):
+    req = RequestFactory.create_request(environ=make_environ(body=b'{"a": 1}'))
+    assert req.json() == {"a": 1}
+
+    setattr(req, attribute, value)
+
+    assert req.json() == {"b": 2}
+
+
+def test_reading_content_does_not_reparse_json():
+    req = RequestFactory.create_request(environ=make_environ(body=b'{"a": 1}'))
+    parsed = req.json()
+
+    assert req.content == '{"a": 1}'
+    assert req.json() is parsed
@@ -0,0 +1,267 @@
+import asyncio
+import io
+
+import pytest
+
+from spiderweb.asgi import ASGIRequestBody
+from spiderweb.decorators import stream_request_body
+from spiderweb.response import HttpResponse, JsonResponse
+from spiderweb.tests.helpers import Receiver, Sender, make_scope, setup
+
+
+def test_wsgi_stream_yields_chunks():
+    app, environ, start_response = setup()
+    seen = []
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        for chunk in request.stream(chunk_size=4):
+            seen.append(chunk)
+        return HttpResponse(str(len(request.content)))
+
+    body = b"0123456789"
+    environ["PATH_INFO"] = "/upload"
+    environ["REQUEST_METHOD"] = "POST"
+    environ["CONTENT_LENGTH"] = str(len(body))
+    # trailing bytes past CONTENT_LENGTH must never be read
+    environ["wsgi.input"] = io.BytesIO(body + b"garbage")
+
+    assert app(environ, start_response) == [b"0"]
+    assert seen == [b"0123", b"4567", b"89"]
+
+
+def test_wsgi_stream_until_input_terminated():
+    app, environ, start_response = setup()
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        return HttpResponse(b"".join(request.stream(chunk_size=3)).decode())
+
+    environ["PATH_INFO"] = "/upload"
+    environ["REQUEST_METHOD"] = "POST"
+    environ["wsgi.input_terminated"] = True
+    environ["wsgi.input"] = io.BytesIO(b"chunked body")
+
+    assert app(environ, start_response) == [b"chunked body"]
+
+
+def test_stream_after_content_was_read():
+    app, environ, start_response = setup()
+
+    @app.route("/upload", allowed_methods=["POST"])
+    def upload(request):
+        assert request.content == "abc"
+        return HttpResponse(b"".join(request.stream()).decode())
+
+    environ["PATH_INFO"] = "/upload"
+    environ["REQUEST_METHOD"] = "POST"
+    environ["CONTENT_LENGTH"] = "3"
+    environ["wsgi.input"] = io.BytesIO(b"abc")
+
+    assert app(environ, start_response) == [b"abc"]
+
+
+@pytest.mark.asyncio
+async def test_asgi_stream_hands_over_chunks_as_they_arrive():
+    app, _, _ = setup()
+    log = []
+
+    @app.route("/ingest", allowed_methods=["POST"])
+    @stream_request_body
+    async def ingest(request):
+        lines = 0
+        async for chunk in request.stream():
+            log.append(("view", chunk))
+            lines += chunk.count(b"\n")
+        return HttpResponse(str(lines))
+
+    send = Sender()
+    chunks = [b'{"a": 1}\n', b'{"a": 2}\n', b'{"a": 3}\n']
+    await app.asgi_app(make_scope("/ingest", "POST"), Receiver(chunks, log), send)
+
+    assert send.status == 200
+    assert send.body == b"3"
+    # each chunk reached the view before the next one was received
+    assert log == [
+        ("receive", chunks[0]),
+        ("view", chunks[0]),
+        ("receive", chunks[1]),
+        ("view", chunks[1]),
+        ("receive", chunks[2]),
+        ("view", chunks[2]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_asgi_stream_from_sync_view():
+    app, _, _ = setup()
+
+    @app.route("/ingest", allowed_methods=["POST"])
+    @stream_request_body
+    def ingest(request):
+        return HttpResponse(b"".join(chunk for chunk in request.stream()).decode())
+
+    send = Sender()
+    await app.asgi_app(
+        make_scope("/ingest", "POST"), Receiver([b"one ", b"two ", b"three"]), send
+    )
+
+    assert send.status == 200
+    assert send.body == b"one two three"
+
+
+@pytest.mark.asyncio
+async def test_asgi_streaming_sync_view_can_read_content():
+    app, _, _ = setup()
+
+    @app.route("/ingest", allowed_methods=["POST"])
+    @stream_request_body
+    def ingest(request):
+        return JsonResponse(data=request.json())
+
+    send = Sender()
+    body = [b'{"hello": ', b'"world"}']
+    headers = [(b"content-length", str(len(b"".join(body))).encode())]
+    await app.asgi_app(
+        make_scope("/ingest", "POST", headers=headers), Receiver(body), send
+    )
+
+    assert send.status == 200
+    assert send.body == b'{"hello": "world"}'
+
+
+@pytest.mark.asyncio
+async def test_asgi_streaming_async_view_read_body():
+    app, _, _ = setup()
+
+    @app.route("/ingest", allowed_methods=["POST"])
+    @stream_request_body
+    async def ingest(request):
+        await request.read_body()
+        return JsonResponse(data=request.json())
+
+    send = Sender()
+    # no content-length, like a chunked upload
+    await app.asgi_app(
+        make_scope("/ingest", "POST"), Receiver([b'{"hello": ', b'"world"}']), send
+    )
+
+    assert send.status == 200
+    assert send.body == b'{"hello": "world"}'
+
+
+@pytest.mark.asyncio
+async def test_asgi_stream_enforces_max_body_size():
+    app, _, _ = setup(max_request_body_size=10)
+
+    @app.route("/ingest", allowed_methods=["POST"])
+    @stream_request_body
+    async def ingest(request):
+        async for _ in request.stream():
+            pass
+        return HttpResponse("ok")  # pragma: no cover
+
+    send = Sender()
+    await app.asgi_app(
+        make_scope("/ingest", "POST"), Receiver([b"x" * 6, b"x" * 6]), send
+    )
+
+    assert send.status == 413
+
+
+@pytest.mark.asyncio
+async def test_asgi_stream_on_a_buffered_body():
+    app, _, _ = setup()
+
+    @app.route("/echo", allowed_methods=["POST"])
+    async def echo(request):
+        return HttpResponse(b"".join([c async for c in request.stream()]).decode())
+
+    send = Sender()
+    await app.asgi_app(make_scope("/echo", "POST"), Receiver([b"ab", b"cd"]), send)
+
+    assert send.body == b"abcd"
+
+
+@pytest.mark.asyncio
+async def test_asgi_streaming_body_cannot_be_read_synchronously_on_the_loop():
+    body = ASGIRequestBody(receive=Receiver([b"abc"]), loop=asyncio.get_running_loop())
+
+    with pytest.raises(RuntimeError):
+        body.read()
+    await body.fill()
+    assert body.read() == b"abc"
+
+
+@pytest.mark.asyncio
+async def test_asgi_rejects_large_content_length_before_reading():
+    app, _, _ = setup(max_request_body_size=10)
+
+    @app.route("/echo", allowed_methods=["POST"])
+    def echo(request):
+        return HttpResponse("ok")  # pragma: no cover
+
+    log = []
+    send = Sender()
+    headers = [(b"content-length", b"11")]
+    await app.asgi_app(
+        make_scope("/echo", "POST", headers=headers), Receiver([b"x" * 11], log), send
+    )
+
+    assert send.status == 413
+    assert log == []
+
+
+@pytest.mark.asyncio
+async def test_asgi_buffers_many_chunks():
+    app, _, _ = setup()
+
+    @app.route("/echo", allowed_methods=["POST"])
+    def echo(request):
+        return HttpResponse(request.content)
+
+    chunks = [str(i % 10).encode() * 7 for i in range(500)]
+    headers = [(b"content-length", str(7 * 500).encode())]
+    send = Sender()
+    await app.asgi_app(
+        make_scope("/echo", "POST", headers=headers), Receiver(chunks), send
+    )
+
+    assert send.status == 200
+    assert send.body == b"".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_asgi_buffered_body_limit_is_checked_per_chunk():
+    app, _, _ = setup(max_request_body_size=10)
+
+    @app.route("/echo", allowed_methods=["POST"])
+    def echo(request):
+        return HttpResponse("ok")  # pragma: no cover
+
+    log = []
+    send = Sender()
+    chunks = [b"x" * 6, b"x" * 6, b"x" * 6]
+    await app.asgi_app(make_scope("/echo", "POST"), Receiver(chunks, log), send)
+
+    assert send.status == 413
+    # gave up as soon as the limit was crossed
+    assert len(log) == 2
+
+
+def test_asgi_request_body_single_chunk_is_not_copied():
+    data = b"x" * 1024
+    body = ASGIRequestBody(data)
+
+    assert body.read() is data
+
+
+def test_asgi_request_body_readinto():
+    body = ASGIRequestBody(b"abcdef")
+    buffer = bytearray(4)
+
+    assert body.readinto(buffer) == 4
+    assert buffer == b"abcd"
+    assert body.readinto(buffer) == 2
+    assert buffer[:2] == b"ef"
+    assert body.read() == b""
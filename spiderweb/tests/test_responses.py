@@ -1,7 +1,10 @@
+import gzip
+
+import httpx
 import pytest
 
 from spiderweb import ConfigError
-from spiderweb.constants import DEFAULT_ENCODING
+from spiderweb.constants import DEFAULT_ENCODING, STREAM_CHUNK_SIZE
 from spiderweb.exceptions import (
     NoResponseError,
     SpiderwebNetworkException,
@@ -19,6 +22,7 @@ from spiderweb.response import (
 from hypothesis import given, strategies as st
 
 from spiderweb.tests.helpers import setup
+from spiderweb.utils import ResponseHeaders
 
 
 @given(st.text())
@@ -237,6 +241,39 @@ def test_reversed_views_explode_when_missing_some_args():
         app.reverse("qwer", {"hi": 1})
 
 
+def test_reverse_uses_prebuilt_templates():
+    app, environ, start_response = setup(append_slash=True)
+
+    @app.route("/about", name="about")
+    def about(request): ...
+
+    @app.route("/users/<username>/posts/<int:post_id>", name="post")
+    def post(request, username, post_id): ...
+
+    # argument-free routes are stored as the finished path
+    assert app._reverse_index["about"] == "/about"
+    assert app._reverse_index["post"] == (
+        ("/users/", "/posts/", ""),
+        ("username", "post_id"),
+    )
+    assert app.reverse("about") == "/about"
+    assert (
+        app.reverse("post", {"username": "joe", "post_id": 3}) == "/users/joe/posts/3"
+    )
+
+
+def test_reverse_finds_first_route_with_name():
+    app, environ, start_response = setup()
+
+    @app.route("/first", name="dupe")
+    def first(request): ...
+
+    @app.route("/second", name="dupe")
+    def second(request): ...
+
+    assert app.reverse("dupe") == "/first"
+
+
 def test_reverse_nonexistent_view():
     app, environ, start_response = setup()
 
@@ -257,6 +294,54 @@ def test_setting_content_type_header():
     assert start_response.get_headers()["content-type"] == "text/html"
 
 
+def test_default_headers():
+    resp = HttpResponse("hi")
+
+    assert list(resp.headers) == ["content-type", "server", "date"]
+    assert resp.headers["content-type"] == "text/html; charset=utf-8"
+    assert resp.headers["server"] == "Spiderweb"
+
+
+def test_default_headers_are_encoded_once_per_class():
+    class CsvResponse(HttpResponse):
+        default_headers = (("content-type", "text/csv"), ("server", "Spiderweb"))
+
+    assert CsvResponse._encoded_default_headers[0] == (
+        "content-type",
+        "text/csv",
+        (b"content-type", b"text/csv"),
+    )
+    first, second = CsvResponse("a,b"), CsvResponse("c,d")
+    first.headers["content-type"] = "text/plain"
+    first.headers.add("server", "extra")
+
+    assert second.headers.asgi_items()[:2] == [
+        (b"content-type", b"text/csv"),
+        (b"server", b"Spiderweb"),
+    ]
+    assert second.headers.getall("server") == ["Spiderweb"]
+    assert HttpResponse("hi").headers["content-type"] == "text/html; charset=utf-8"
+
+
+def test_assigned_headers_become_response_headers():
+    resp = HttpResponse("hi")
+    resp.headers = {"Content-Type": "text/plain", "X-Custom": 1}
+
+    assert isinstance(resp.headers, ResponseHeaders)
+    assert resp.headers.get_canonical("x-custom") == "1"
+    assert resp.headers.asgi_items() == [
+        (b"content-type", b"text/plain"),
+        (b"x-custom", b"1"),
+    ]
+
+
+def test_json_response_default_headers_can_be_overridden():
+    assert JsonResponse(data={}).headers["content-type"] == "application/json"
+
+    resp = JsonResponse(data={}, headers={"Content-Type": "application/problem+json"})
+    assert resp.headers["content-type"] == "application/problem+json"
+
+
 def test_httpresponse_str_returns_body():
     resp = HttpResponse("Hello, World!")
     assert str(resp) == "Hello, World!"
@@ -292,7 +377,9 @@ def test_template_response_with_no_template_dirs():
 def test_file_response():
     resp = FileResponse("spiderweb/tests/staticfiles/file_for_testing_fileresponse.txt")
     assert resp.headers["content-type"] == "text/plain"
-    assert resp.render() == [b"hi"]
+    with resp.render() as f:
+        assert f.read() == b"hi"
+    assert resp.headers["content-length"] == "2"
 
 
 def test_requesting_static_file():
@@ -302,7 +389,7 @@ def test_requesting_static_file():
 
     environ["PATH_INFO"] = "/static/file_for_testing_fileresponse.txt"
 
-    assert app(environ, start_response) == [b"hi"]
+    assert b"".join(app(environ, start_response)) == b"hi"
 
 
 def test_requesting_nonexistent_static_file():
@@ -333,3 +420,176 @@ def test_static_file_with_unsafe_path():
         b"Msg: Not Found\n\n"
         b"Desc: The requested resource could not be found"
     ]
+
+
+def test_json_response_uses_router_json_dumps():
+    orjson = pytest.importorskip("orjson")
+    app, environ, start_response = setup(json_dumps=orjson.dumps)
+
+    @app.route("/")
+    def index(request):
+        return JsonResponse(data={"hello": "world"})
+
+    assert app(environ, start_response) == [b'{"hello":"world"}']
+
+
+def test_json_response_keeps_its_own_json_dumps():
+    app, environ, start_response = setup(json_dumps=lambda data: "router")
+
+    @app.route("/")
+    def index(request):
+        return JsonResponse(data={}, json_dumps=lambda data: "view")
+
+    assert app(environ, start_response) == [b"view"]
+
+
+@pytest.mark.asyncio
+async def test_json_response_uses_router_json_dumps_under_asgi():
+    orjson = pytest.importorskip("orjson")
+    app, _, _ = setup(json_dumps=orjson.dumps)
+
+    @app.route("/")
+    async def index(request):
+        return {"hello": "world"}
+
+    transport = httpx.ASGITransport(app=app.asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as c:
+        response = await c.get("/")
+
+    assert response.content == b'{"hello":"world"}'
+
+
+def test_gzip_compresses_bytes_from_json_backend():
+    orjson = pytest.importorskip("orjson")
+    app, environ, start_response = setup(
+        json_dumps=orjson.dumps,
+        middleware=["spiderweb.middleware.gzip.GzipMiddleware"],
+        gzip_minimum_response_length=1,
+    )
+
+    @app.route("/")
+    def index(request):
+        return JsonResponse(data={"hello": "world"})
+
+    environ["HTTP_ACCEPT_ENCODING"] = "gzip"
+    body = app(environ, start_response)
+
+    assert gzip.decompress(body[0]) == b'{"hello":"world"}'
+
+
+class RecordingFileWrapper:
+    def __init__(self, filelike, blksize=8192):
+        self.filelike = filelike
+        self.blksize = blksize
+
+    def __iter__(self):
+        while chunk := self.filelike.read(self.blksize):
+            yield chunk
+
+    def close(self):
+        self.filelike.close()
+
+
+def big_file(tmp_path, size=200 * 1024):
+    path = tmp_path / "big.bin"
+    path.write_bytes(bytes(range(256)) * (size // 256))
+    return path
+
+
+def test_file_response_uses_wsgi_file_wrapper(tmp_path):
+    path = big_file(tmp_path)
+    app, environ, start_response = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+    environ["wsgi.file_wrapper"] = RecordingFileWrapper
+
+    result = app(environ, start_response)
+
+    assert isinstance(result, RecordingFileWrapper)
+    assert result.filelike.name == str(path)
+    assert start_response.get_headers()["content-length"] == str(path.stat().st_size)
+    assert b"".join(result) == path.read_bytes()
+    result.close()
+    assert result.filelike.closed
+
+
+def test_file_response_is_sent_in_chunks_without_a_file_wrapper(tmp_path):
+    path = big_file(tmp_path)
+    app, environ, start_response = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+    environ.pop("wsgi.file_wrapper", None)
+
+    chunks = list(app(environ, start_response))
+
+    assert len(chunks) > 1
+    assert max(len(c) for c in chunks) <= STREAM_CHUNK_SIZE
+    assert b"".join(chunks) == path.read_bytes()
+
+
+async def call_asgi_file(app, extensions=None):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+    }
+    if extensions is not None:
+        scope["extensions"] = extensions
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app.asgi_app(scope, receive, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_file_response_uses_asgi_pathsend(tmp_path):
+    path = big_file(tmp_path)
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+
+    messages = await call_asgi_file(app, {"http.response.pathsend": {}})
+
+    assert messages[0]["type"] == "http.response.start"
+    assert (b"content-length", str(path.stat().st_size).encode()) in messages[0][
+        "headers"
+    ]
+    assert messages[1:] == [{"type": "http.response.pathsend", "path": str(path)}]
+
+
+@pytest.mark.asyncio
+async def test_file_response_uses_asgi_zerocopysend(tmp_path):
+    path = big_file(tmp_path)
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+
+    messages = await call_asgi_file(app, {"http.response.zerocopysend": {}})
+
+    assert [m["type"] for m in messages] == [
+        "http.response.start",
+        "http.response.zerocopysend",
+    ]
+    sent = messages[1]["file"]
+    assert sent.name == str(path)
+    # closed once the server was done with it
+    assert sent.closed
+
+
+@pytest.mark.asyncio
+async def test_file_response_asgi_fallback_reads_in_chunks(tmp_path):
+    path = big_file(tmp_path)
+    app, _, _ = setup()
+    app.add_route("/", lambda request: FileResponse(str(path)))
+
+    messages = await call_asgi_file(app)
+
+    bodies = messages[1:]
+    assert len(bodies) > 2
+    assert all(len(m["body"]) <= STREAM_CHUNK_SIZE for m in bodies)
+    assert [m["more_body"] for m in bodies] == [True] * (len(bodies) - 1) + [False]
+    assert b"".join(m["body"] for m in bodies) == path.read_bytes()
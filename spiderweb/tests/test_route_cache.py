@@ -0,0 +1,112 @@
+import pytest
+
+from spiderweb import RouteGroup
+from spiderweb.exceptions import NotFound
+from spiderweb.response import HttpResponse
+from spiderweb.routes import RouteCache
+from spiderweb.tests.helpers import setup
+
+
+def test_route_cache_is_off_by_default():
+    app, environ, start_response = setup()
+
+    @app.route("/users/<int:user_id>")
+    def user(request, user_id):
+        return HttpResponse(str(user_id))
+
+    assert app.get_route("/users/42")[1] == {"user_id": 42}
+    assert app._route_cache is None
+    assert app.route_cache_hits == 0
+    assert app.route_cache_misses == 0
+
+
+def test_route_cache_counts_hits_and_misses():
+    app, environ, start_response = setup(route_cache_size=8)
+
+    @app.route("/users/<int:user_id>")
+    def user(request, user_id):
+        return HttpResponse(str(user_id))
+
+    first = app.get_route("/users/42")
+    second = app.get_route("/users/42")
+    assert first == second == (user, {"user_id": 42}, app.DEFAULT_ALLOWED_METHODS)
+    assert app.route_cache_misses == 1
+    assert app.route_cache_hits == 1
+
+
+def test_route_cache_skips_static_routes_and_404s():
+    app, environ, start_response = setup(route_cache_size=8)
+
+    @app.route("/health")
+    def health(request):
+        return HttpResponse("ok")
+
+    app.get_route("/health")
+    for _ in range(2):
+        with pytest.raises(NotFound):
+            app.get_route("/missing")
+
+    assert app.route_cache_hits == 0
+    assert app.route_cache_misses == 2
+    assert len(app._route_cache) == 0
+
+
+def test_route_cache_evicts_least_recently_used():
+    cache = RouteCache(maxsize=2)
+    cache.resolve("/a", lambda path: path)
+    cache.resolve("/b", lambda path: path)
+    cache.resolve("/a", lambda path: path)  # /a is now the most recent
+    cache.resolve("/c", lambda path: path)
+
+    assert len(cache) == 2
+    assert list(cache._data) == ["/a", "/c"]
+
+
+def test_route_cache_cleared_by_add_route():
+    app, environ, start_response = setup(route_cache_size=8)
+
+    @app.route("/<str:page>")
+    def page(request, page):
+        return HttpResponse(page)
+
+    assert app.get_route("/about")[0] is page
+    assert len(app._route_cache) == 1
+
+    @app.route("/items/<int:item_id>")
+    def item(request, item_id):
+        return HttpResponse(str(item_id))
+
+    assert len(app._route_cache) == 0
+    assert app.get_route("/items/1")[0] is item
+
+
+def test_route_cache_cleared_by_include_routegroup():
+    app, environ, start_response = setup(route_cache_size=8)
+
+    @app.route("/api/<path:rest>")
+    def fallback(request, rest):
+        return HttpResponse(rest)
+
+    app.get_route("/api/users/1")
+    assert len(app._route_cache) == 1
+
+    group = RouteGroup(prefix="/v2")
+
+    @group.route("/users/<int:user_id>")
+    def user(request, user_id):
+        return HttpResponse(str(user_id))
+
+    app.include_routegroup(group)
+    assert len(app._route_cache) == 0
+
+
+def test_stale_lookup_is_not_cached_after_clear():
+    cache = RouteCache(maxsize=2)
+
+    def resolver(path):
+        # the route table changes while this lookup is in progress
+        cache.clear()
+        return path
+
+    cache.resolve("/a", resolver)
+    assert len(cache) == 0
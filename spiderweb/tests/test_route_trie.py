@@ -0,0 +1,312 @@
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from spiderweb.exceptions import NotFound
+from spiderweb.response import HttpResponse
+from spiderweb.tests.helpers import setup
+
+
+class SlugConverter:
+    regex = r"[-a-z0-9_]+"
+    name = "slug"
+
+    def to_python(self, value):
+        return str(value)
+
+
+class YearConverter:
+    regex = r"\d{4}"
+    name = "year"
+
+    def to_python(self, value):
+        return int(value)
+
+
+ROUTE_PATHS = [
+    "/",
+    "/api/health",
+    "/api/v1/orders",
+    "/api/v1/orders/<int:order_id>",
+    "/api/v1/orders/<int:order_id>/items",
+    "/api/v1/orders/<str:order_name>",
+    "/api/v1/orders/latest",  # shadowed by the str route above
+    "/api/v1/prices/<float:price>",
+    "/api/v1/prices/<int:price>",
+    "/users/<username>",
+    "/users/<username>/posts/<slug:post>",
+    "/users/<int:user_id>/posts",  # shadowed by the str route for the first part
+    "/archive/<year:year>",
+    "/archive/<year:year>/<slug:post>",
+    "/files/<path:filename>",
+    "/files/<path:filename>/download",
+    "/mixed/<path:first>/<path:second>",
+    "/robots.txt",
+    "/<str:catchall>",
+]
+
+REQUEST_PATHS = [
+    "",
+    "/",
+    "//",
+    "/api/health",
+    "/api/health/",
+    "/api/v1/orders",
+    "/api/v1/orders/",
+    "/api/v1/orders/42",
+    "/api/v1/orders/42/items",
+    "/api/v1/orders/42/items/",
+    "/api/v1/orders/latest",
+    "/api/v1/orders/abc/items",
+    "/api/v1/prices/1.5",
+    "/api/v1/prices/15",
+    "/api/v1/prices/1.",
+    "/users/joe",
+    "/users/12/posts",
+    "/users/joe/posts/hello-world",
+    "/users/joe/posts/Hello",
+    "/archive/2024",
+    "/archive/202",
+    "/archive/2024/some-post",
+    "/files/a.txt",
+    "/files/a/b/c.txt",
+    "/files/a/b/download",
+    "/files/download",
+    "/files/",
+    "/files//x",
+    "/mixed/a/b",
+    "/mixed/a/b/c/d",
+    "/mixed/a",
+    "/robots.txt",
+    "/robotsXtxt",
+    "/robots/txt",
+    "/anything",
+    "/anything/else",
+]
+
+
+def make_app(**kwargs):
+    app, environ, start_response = setup(**kwargs)
+    app.register_converter(SlugConverter)
+    app.register_converter(YearConverter)
+    for i, path in enumerate(ROUTE_PATHS):
+
+        def view(request, **kwargs):
+            return HttpResponse("ok")
+
+        app.add_route(path, view, name=f"route_{i}")
+    return app
+
+
+def resolve(resolver, path):
+    try:
+        return resolver(path)
+    except NotFound:
+        return None
+
+
+def assert_equivalent(app, path):
+    trie_result = resolve(app.get_route, path)
+    scan_result = resolve(app.scan_routes, path)
+    if scan_result is None:
+        assert trie_result is None, path
+        return
+    assert trie_result is not None, path
+    # same view, same converted kwargs (including their types), same methods
+    assert trie_result[0] is scan_result[0], path
+    assert trie_result[1] == scan_result[1], path
+    assert [type(v) for v in trie_result[1].values()] == [
+        type(v) for v in scan_result[1].values()
+    ], path
+    assert trie_result[2] == scan_result[2], path
+
+
+@pytest.mark.parametrize("append_slash", [False, True])
+@pytest.mark.parametrize("path", REQUEST_PATHS)
+def test_trie_matches_linear_scan(append_slash, path):
+    app = make_app(append_slash=append_slash)
+    assert_equivalent(app, path)
+
+
+@settings(max_examples=200, deadline=None)
+@given(
+    st.lists(
+        st.sampled_from(
+            [
+                "",
+                "api",
+                "v1",
+                "orders",
+                "items",
+                "latest",
+                "prices",
+                "users",
+                "posts",
+                "archive",
+                "files",
+                "download",
+                "mixed",
+                "robots.txt",
+                "42",
+                "2024",
+                "1.5",
+                "joe",
+                "Hello",
+                "a-b",
+            ]
+        ),
+        max_size=6,
+    )
+)
+def test_trie_matches_linear_scan_generated(segments):
+    app = make_app()
+    assert_equivalent(app, "/" + "/".join(segments))
+
+
+def test_trie_is_rebuilt_after_add_route():
+    app, environ, start_response = setup()
+
+    @app.route("/first")
+    def first(request):
+        return HttpResponse("first")
+
+    assert app.get_route("/first")[0] is first
+    with pytest.raises(NotFound):
+        app.get_route("/second")
+
+    @app.route("/second")
+    def second(request):
+        return HttpResponse("second")
+
+    assert app.get_route("/second")[0] is second
+
+
+def test_first_registered_route_wins():
+    app, environ, start_response = setup()
+
+    @app.route("/posts/<str:slug>")
+    def by_slug(request, slug):
+        return HttpResponse(slug)
+
+    @app.route("/posts/new")
+    def new_post(request):
+        return HttpResponse("new")
+
+    handler, kwargs, _ = app.get_route("/posts/new")
+    assert handler is by_slug
+    assert kwargs == {"slug": "new"}
+
+
+def test_trie_used_for_wsgi_requests():
+    app, environ, start_response = setup()
+
+    @app.route("/orders/<int:order_id>")
+    def order(request, order_id):
+        return HttpResponse(f"{order_id + 1}")
+
+    environ["PATH_INFO"] = "/orders/41"
+    assert app(environ, start_response) == [b"42"]
+    assert app._route_trie is not None
+
+
+def test_static_routes_skip_the_trie():
+    app, environ, start_response = setup()
+
+    @app.route("/api/health")
+    def health(request):
+        return HttpResponse("ok")
+
+    @app.route("/api/<int:item_id>")
+    def item(request, item_id):
+        return HttpResponse("item")
+
+    app.freeze_routes()
+    assert app._static_routes["/api/health"]["func"] is health
+    assert "/api/<int:item_id>" not in app._static_routes
+
+    def fail(path):
+        raise AssertionError(f"{path} went through the trie")
+
+    app._route_trie.match = fail
+    # answered straight from the dict
+    assert app.get_route("/api/health") == (health, {}, app.DEFAULT_ALLOWED_METHODS)
+
+
+def test_static_routes_with_append_slash():
+    app, environ, start_response = setup(append_slash=True)
+
+    @app.route("/api/orders")
+    def orders(request):
+        return HttpResponse("orders")
+
+    redirect, kwargs, _ = app.get_route("/api/orders")
+    assert redirect.location == "/api/orders/"
+    assert kwargs == {}
+    assert app._static_routes["/api/orders/"]["func"] is orders
+
+
+def test_shadowed_static_route_is_not_a_fast_path():
+    app, environ, start_response = setup()
+
+    @app.route("/posts/<str:slug>")
+    def by_slug(request, slug):
+        return HttpResponse(slug)
+
+    @app.route("/posts/new")
+    def new_post(request):
+        return HttpResponse("new")
+
+    @app.route("/robots.txt")
+    def robots(request):
+        return HttpResponse("robots")
+
+    assert app.get_route("/posts/new")[0] is by_slug
+    assert "/posts/new" not in app._static_routes
+    # "." is a regex wildcard in route paths, so this isn't a plain lookup
+    assert "/robots.txt" not in app._static_routes
+
+
+def test_static_routes_follow_later_additions():
+    app, environ, start_response = setup(debug=True)
+
+    @app.route("/about")
+    def about(request):
+        return HttpResponse("about")
+
+    assert app.get_route("/about")[0] is about
+    assert "/about" in app._static_routes
+
+    @app.route("/<str:page>")
+    def page(request, page):
+        return HttpResponse(page)
+
+    # registered later, so /about still wins
+    assert app.get_route("/about")[0] is about
+    assert app.get_route("/contact")[0] is page
+    assert list(app._static_routes) == ["/about"]
+
+
+def test_converters_are_created_once_per_route():
+    app, environ, start_response = setup()
+
+    class CountingConverter:
+        regex = r"\d+"
+        name = "counting"
+        instances = 0
+
+        def __init__(self):
+            CountingConverter.instances += 1
+
+        def to_python(self, value):
+            return int(value)
+
+    app.register_converter(CountingConverter)
+
+    @app.route("/items/<counting:item_id>")
+    def item(request, item_id):
+        return HttpResponse(str(item_id))
+
+    assert CountingConverter.instances == 1
+    for i in range(5):
+        assert app.get_route(f"/items/{i}")[1] == {"item_id": i}
+        assert app.scan_routes(f"/items/{i}")[1] == {"item_id": i}
+    assert CountingConverter.instances == 1
@@ -2,7 +2,7 @@ import pytest
 
 from spiderweb.exceptions import MethodNotAllowed
 from spiderweb.response import HttpResponse
-from spiderweb.routes import View
+from spiderweb.routes import View, make_view_dispatcher
 from spiderweb.tests.helpers import setup
 
 
@@ -170,3 +170,98 @@ def test_class_based_view_routes_list() -> None:
     body_iter = app(environ, start_response)
     assert start_response.status.startswith("200")
     assert b"".join(body_iter) == b"GET from routes list"
+
+
+def test_class_based_view_allowed_methods_come_from_the_view() -> None:
+    app, environ, start_response = setup()
+
+    @app.route("/")
+    class MyView(View):
+        def get(self, request):
+            return HttpResponse("GET")
+
+    _, _, allowed_methods = app.get_route("/")
+    assert allowed_methods == ["GET", "OPTIONS"]
+
+    environ["PATH_INFO"] = "/"
+    environ["REQUEST_METHOD"] = "POST"
+    app(environ, start_response)
+    assert start_response.status.startswith("405")
+
+    environ["REQUEST_METHOD"] = "OPTIONS"
+    app(environ, start_response)
+    assert start_response.status.startswith("204")
+    assert start_response.get_headers()["allow"] == "GET, OPTIONS"
+
+
+def test_class_based_view_explicit_allowed_methods_win() -> None:
+    app, environ, start_response = setup()
+
+    class MyView(View):
+        def get(self, request):
+            return HttpResponse("GET")
+
+        def post(self, request):
+            return HttpResponse("POST")
+
+    app.add_route("/", MyView, allowed_methods=["GET"])
+    assert app.get_route("/")[2] == ["GET"]
+
+
+def test_class_based_view_new_instance_per_request() -> None:
+    app, environ, start_response = setup()
+    instances = []
+
+    @app.route("/")
+    class MyView(View):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            instances.append(self)
+
+        def get(self, request):
+            return HttpResponse("GET")
+
+    environ["PATH_INFO"] = "/"
+    environ["REQUEST_METHOD"] = "GET"
+    app(environ, start_response)
+    app(environ, start_response)
+    assert len(instances) == 2
+    assert instances[0] is not instances[1]
+
+
+def test_class_based_view_shared_instance() -> None:
+    app, environ, start_response = setup()
+    instances = []
+
+    @app.route("/<int:item_id>")
+    class MyView(View):
+        shared_instance = True
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            instances.append(self)
+
+        def get(self, request, item_id):
+            return HttpResponse(str(item_id))
+
+    assert len(instances) == 1
+    environ["REQUEST_METHOD"] = "GET"
+    for i in range(3):
+        environ["PATH_INFO"] = f"/{i}"
+        assert app(environ, start_response) == [str(i).encode()]
+    assert len(instances) == 1
+
+
+def test_view_dispatcher_rejects_unimplemented_methods() -> None:
+    class MyView(View):
+        def get(self, request):
+            return HttpResponse("GET")
+
+    dispatcher = make_view_dispatcher(MyView)
+    assert dispatcher.view_methods == ["GET", "OPTIONS"]
+
+    class MockRequest:
+        method = "DELETE"
+
+    with pytest.raises(MethodNotAllowed):
+        dispatcher(MockRequest())
@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from spiderweb.response import StreamingHttpResponse
+from spiderweb.tests.helpers import make_scope, setup
+
+
+def receiver(disconnect: asyncio.Event = None):
+    """Hands over an empty body, then waits for `disconnect` (or forever)."""
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await (disconnect or asyncio.Event()).wait()
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+def test_wsgi_streams_a_generator_lazily():
+    app, environ, start_response = setup()
+    produced = []
+
+    def rows():
+        for i in range(3):
+            produced.append(i)
+            yield f"{i},row\n"
+
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+
+    result = app(environ, start_response)
+
+    assert produced == []
+    assert start_response.status == "200 OK"
+    assert "content-length" not in start_response.get_headers()
+    assert list(result) == [b"0,row\n", b"1,row\n", b"2,row\n"]
+
+
+def test_wsgi_streams_an_async_generator():
+    app, environ, start_response = setup()
+
+    async def rows():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield f"{i}\n".encode()
+
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+
+    assert b"".join(app(environ, start_response)) == b"0\n1\n2\n"
+
+
+def test_wsgi_close_closes_the_generator():
+    app, environ, start_response = setup()
+    closed = []
+
+    def rows():
+        try:
+            while True:
+                yield b"row\n"
+        finally:
+            closed.append(True)
+
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+
+    result = app(environ, start_response)
+    assert next(result) == b"row\n"
+    # what the server does when the client goes away
+    result.close()
+    assert closed == [True]
+
+
+@pytest.mark.parametrize(
+    "middleware, expected",
+    [
+        ("spiderweb.tests.middleware.PostProcessingMiddleware", b"ab"),
+        ("spiderweb.tests.middleware.StreamingPostProcessingMiddleware", b"AB"),
+    ],
+)
+def test_post_process_only_runs_if_it_supports_streaming(middleware, expected):
+    app, environ, start_response = setup(middleware=[middleware])
+    app.add_route("/", lambda request: StreamingHttpResponse(iter(["a", "b"])))
+
+    assert b"".join(app(environ, start_response)) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_async", [False, True])
+async def test_asgi_sends_each_chunk(use_async):
+    app, _, _ = setup()
+
+    def sync_rows():
+        yield "a"
+        yield b""
+        yield b"b"
+
+    async def async_rows():
+        for chunk in sync_rows():
+            yield chunk
+
+    rows = async_rows if use_async else sync_rows
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await asyncio.wait_for(app.asgi_app(make_scope(), receiver(), send), timeout=5)
+
+    assert messages[0]["type"] == "http.response.start"
+    assert messages[1:] == [
+        {"type": "http.response.body", "body": b"a", "more_body": True},
+        {"type": "http.response.body", "body": b"b", "more_body": True},
+        {"type": "http.response.body", "body": b"", "more_body": False},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_asgi_disconnect_cancels_an_async_generator():
+    app, _, _ = setup()
+    events = []
+    first_chunk_sent = asyncio.Event()
+
+    async def rows():
+        try:
+            yield b"first"
+            await asyncio.Event().wait()  # a slow query, say
+            yield b"never"  # pragma: no cover
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        finally:
+            events.append("finally")
+
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        if message.get("body") == b"first":
+            first_chunk_sent.set()
+
+    receive = receiver(first_chunk_sent)
+    await asyncio.wait_for(app.asgi_app(make_scope(), receive, send), timeout=5)
+
+    assert events == ["cancelled", "finally"]
+    assert [m.get("body") for m in sent[1:]] == [b"first"]
+
+
+@pytest.mark.asyncio
+async def test_asgi_disconnect_closes_a_sync_generator():
+    app, _, _ = setup()
+    closed = []
+
+    def rows():
+        try:
+            while True:
+                yield b"row\n"
+        finally:
+            closed.append(True)
+
+    app.add_route("/", lambda request: StreamingHttpResponse(rows()))
+
+    gone = asyncio.Event()
+    gone.set()
+
+    async def send(message):
+        pass
+
+    await asyncio.wait_for(app.asgi_app(make_scope(), receiver(gone), send), timeout=5)
+
+    assert closed == [True]
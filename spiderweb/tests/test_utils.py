@@ -1,12 +1,21 @@
 import re
+import time
 
 import pytest
 
+import spiderweb.utils
+
 from spiderweb.utils import (
+    CookieView,
     Headers,
+    HostMatcher,
+    MetaView,
+    ResponseHeaders,
     convert_url_to_regex,
     generate_key,
     get_client_address,
+    get_date_header,
+    get_hostname,
     get_http_status_by_code,
     import_by_string,
     is_form_request,
@@ -20,16 +29,11 @@ from spiderweb.utils import (
 
 
 class TestHeaders:
-    def test_setitem_normalizes_dashes_to_underscores(self):
+    def test_setitem_normalizes_key(self):
         h = Headers()
         h["Content-Type"] = "text/html"
-        # Should be stored as content_type
-        assert dict.__contains__(h, "content_type")
-
-    def test_setitem_lowercases_key(self):
-        h = Headers()
-        h["X-Custom-Header"] = "val"
-        assert dict.__contains__(h, "x_custom_header")
+        h["X_Custom_Header"] = "val"
+        assert list(h) == ["content-type", "x-custom-header"]
 
     def test_getitem_normalizes_key(self):
         h = Headers()
@@ -37,59 +41,105 @@ class TestHeaders:
         assert h["Content-Type"] == "text/html"
         assert h["content-type"] == "text/html"
         assert h["content_type"] == "text/html"
+        assert h["HTTP_CONTENT_TYPE"] == "text/html"
 
-    def test_getitem_falls_back_to_http_prefix(self):
-        # If the plain key is missing, the http_ variant should be found
+    def test_http_prefix_is_dropped(self):
         h = Headers()
-        dict.__setitem__(h, "http_host", "example.com")
+        h["HTTP_HOST"] = "example.com"
         assert h["host"] == "example.com"
+        assert h["http_host"] == "example.com"
+        assert list(h) == ["host"]
 
-    def test_getitem_direct_key_wins_over_http_prefix(self):
+    def test_setitem_replaces_existing_value(self):
         h = Headers()
-        h["host"] = "direct"
-        dict.__setitem__(h, "http_host", "indirect")
+        h["host"] = "indirect"
+        h["HTTP_HOST"] = "direct"
         assert h["host"] == "direct"
+        assert len(h) == 1
 
-    def test_contains_plain_key(self):
+    def test_contains(self):
         h = Headers()
         h["Content-Type"] = "text/html"
         assert "Content-Type" in h
         assert "content-type" in h
         assert "content_type" in h
-
-    def test_contains_http_prefix_fallback(self):
-        h = Headers()
-        dict.__setitem__(h, "http_host", "localhost")
-        assert "host" in h
-
-    def test_not_contains_missing_key(self):
-        h = Headers()
         assert "x-missing" not in h
 
+    def test_getitem_missing_raises(self):
+        with pytest.raises(KeyError):
+            Headers()["x-missing"]
+
     def test_get_existing_key(self):
         h = Headers()
         h["accept"] = "application/json"
         assert h.get("accept") == "application/json"
+        assert h.get("HTTP_ACCEPT") == "application/json"
 
     def test_get_returns_default_for_missing(self):
         h = Headers()
         assert h.get("x-nonexistent", "fallback") == "fallback"
         assert h.get("x-nonexistent") is None
 
-    def test_get_falls_back_to_http_prefix(self):
-        h = Headers()
-        dict.__setitem__(h, "http_accept", "text/plain")
-        assert h.get("accept") == "text/plain"
+    def test_get_canonical_skips_normalization(self):
+        h = Headers({"User-Agent": "test"})
+        assert h.get_canonical("user-agent") == "test"
+        assert h.get_canonical("User-Agent") is None
+        assert h.get_canonical("user_agent", "default") == "default"
 
-    def test_setdefault_sets_when_absent(self):
+    def test_setdefault(self):
         h = Headers()
-        result = h.setdefault("x-foo", "bar")
-        assert result == "bar"
+        assert h.setdefault("X-Foo", "bar") == "bar"
+        assert h.setdefault("x_foo", "baz") == "bar"
 
-    def test_setdefault_lowercases_key(self):
+    def test_multiple_values(self):
+        h = Headers()
+        h.add("Vary", "accept-encoding")
+        h.add("vary", "origin")
+        assert h["vary"] == "accept-encoding, origin"
+        assert h.getall("VARY") == ["accept-encoding", "origin"]
+        assert list(h.multi_items()) == [
+            ("vary", "accept-encoding"),
+            ("vary", "origin"),
+        ]
+        assert h.getall("x-missing") == []
+
+    def test_assigning_a_list_sets_every_value(self):
         h = Headers()
-        h.setdefault("X-Custom", "value")
-        assert dict.__contains__(h, "x-custom")
+        h["set-cookie"] = ["a=1", "b=2"]
+        assert h.getall("set-cookie") == ["a=1", "b=2"]
+        h["set-cookie"] = "c=3"
+        assert h.getall("set-cookie") == ["c=3"]
+
+    def test_from_asgi(self):
+        h = Headers.from_asgi(
+            [
+                (b"host", b"example.com"),
+                (b"Accept", b"text/html"),
+                (b"accept", b"application/json"),
+                (b"content-type", b"application/json"),
+            ]
+        )
+        assert h["host"] == "example.com"
+        assert h.getall("accept") == ["text/html", "application/json"]
+        assert h["Content-Type"] == "application/json"
+
+    def test_from_environ(self):
+        h = Headers.from_environ(
+            {
+                "HTTP_USER_AGENT": "test",
+                "CONTENT_TYPE": "text/plain",
+                "CONTENT_LENGTH": "",
+                "PATH_INFO": "/",
+            }
+        )
+        assert dict(h) == {"user-agent": "test", "content-type": "text/plain"}
+
+    def test_copy_is_independent(self):
+        h = Headers({"vary": ["origin"]})
+        copy = h.copy()
+        copy.add("vary", "accept")
+        assert h.getall("vary") == ["origin"]
+        assert Headers(copy).getall("vary") == ["origin", "accept"]
 
 
 # ---------------------------------------------------------------------------
@@ -237,6 +287,145 @@ class TestConvertUrlToRegex:
         assert result.match("localhost") is not None
 
 
+# ---------------------------------------------------------------------------
+# HostMatcher
+# ---------------------------------------------------------------------------
+
+
+class TestHostMatcher:
+    def test_allow_all(self):
+        assert HostMatcher(["*"]).is_allowed("anything.example.com")
+
+    def test_exact_hosts_ignore_port_and_case(self):
+        matcher = HostMatcher(["example.com"])
+        assert matcher.is_allowed("example.com")
+        assert matcher.is_allowed("Example.COM:8000")
+        assert not matcher.is_allowed("example.com.evil.org")
+        assert not matcher.is_allowed("sub.example.com")
+
+    def test_entry_with_port_matches_full_host(self):
+        matcher = HostMatcher(["localhost:9000"])
+        assert matcher.is_allowed("localhost:9000")
+        assert not matcher.is_allowed("localhost:9001")
+
+    def test_wildcards_are_anchored(self):
+        matcher = HostMatcher(["*.example.com", "*.example.org"])
+        assert matcher.is_allowed("api.example.com")
+        assert matcher.is_allowed("a.b.example.org:443")
+        assert not matcher.is_allowed("example.com")
+        assert not matcher.is_allowed("api.example.com.evil.org")
+
+    def test_compiled_patterns_match_raw_header(self):
+        matcher = HostMatcher([re.compile(r"^internal-\d+:8000$")])
+        assert matcher.is_allowed("internal-3:8000")
+        assert not matcher.is_allowed("internal-3")
+
+    def test_ipv6_hosts(self):
+        matcher = HostMatcher(["[::1]"])
+        assert matcher.is_allowed("[::1]:8000")
+        assert get_hostname("[::1]:8000") == "[::1]"
+
+    def test_results_are_memoized(self):
+        matcher = HostMatcher(["example.com"])
+        matcher.is_allowed("example.com:80")
+        matcher.is_allowed("evil.org")
+        assert matcher._memo == {"example.com:80": True, "evil.org": False}
+
+    def test_memo_is_bounded(self):
+        matcher = HostMatcher(["example.com"])
+        matcher.MAX_MEMO_SIZE = 2
+        for host in ["a.org", "b.org", "c.org"]:
+            matcher.is_allowed(host)
+        assert len(matcher._memo) <= 2
+
+
+# ---------------------------------------------------------------------------
+# MetaView / CookieView
+# ---------------------------------------------------------------------------
+
+
+class TestMetaView:
+    def environ(self):
+        return {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": "/",
+            "REMOTE_ADDR": "10.0.0.1",
+            "HTTP_USER_AGENT": "test",
+            "wsgi.input": None,
+        }
+
+    def test_reads_through_to_the_environ(self):
+        environ = self.environ()
+        meta = MetaView(environ)
+        assert meta["REQUEST_METHOD"] == "GET"
+        assert meta["HTTP_USER_AGENT"] == "test"
+        assert meta["client_address"] == "10.0.0.1"
+        # CGI fields are always there, even if the server didn't set them
+        assert meta["SERVER_PORT"] is None
+        assert "wsgi.input" not in meta
+        assert meta.get("HTTPS", False) is False
+        with pytest.raises(KeyError):
+            meta["HTTP_MISSING"]
+
+        environ["HTTP_X_LATE"] = "yes"
+        assert meta["HTTP_X_LATE"] == "yes"
+
+    def test_keys(self):
+        meta = MetaView(self.environ())
+        assert "HTTP_USER_AGENT" in set(meta)
+        assert "client_address" in set(meta)
+        assert len(meta) == 12 + 1 + 1
+
+    def test_writes_do_not_touch_the_environ(self):
+        environ = self.environ()
+        meta = MetaView(environ)
+        meta["SESSION"] = "abc"
+        del meta["HTTP_USER_AGENT"]
+        assert meta["SESSION"] == "abc"
+        assert "HTTP_USER_AGENT" not in meta
+        assert meta["REQUEST_METHOD"] == "GET"
+        assert "SESSION" not in environ
+        assert environ["HTTP_USER_AGENT"] == "test"
+
+
+class TestCookieView:
+    def test_get_does_not_parse_the_whole_header(self):
+        cookies = CookieView("theme=dark; swsession=abc; lang=en")
+        assert cookies.get("swsession") == "abc"
+        assert cookies["theme"] == "dark"
+        assert "lang" in cookies
+        assert cookies.get("missing") is None
+        assert "missing" not in cookies
+        assert cookies._cookies is None
+
+    def test_lookup_matches_full_parse(self):
+        header = " a = 1 ;flag; b=x=y;; a=2; =empty; sw=session "
+        cookies = CookieView(header)
+        lookups = {name: cookies[name] for name in ["a", "b", "", "sw"]}
+        assert "flag" not in cookies
+        assert (
+            dict(cookies)
+            == lookups
+            == {
+                "a": "2",
+                "b": "x=y",
+                "": "empty",
+                "sw": "session",
+            }
+        )
+
+    def test_name_inside_a_value_is_not_a_match(self):
+        cookies = CookieView("a=theme; b=2")
+        assert cookies.get("theme") is None
+
+    def test_writes_parse_then_change_the_copy(self):
+        cookies = CookieView("a=1; b=2")
+        cookies["c"] = "3"
+        del cookies["a"]
+        assert cookies == {"b": "2", "c": "3"}
+        assert cookies.get("a") is None
+
+
 # ---------------------------------------------------------------------------
 # get_http_status_by_code
 # ---------------------------------------------------------------------------
@@ -285,3 +474,87 @@ class TestIsFormRequest:
     def test_returns_false_when_no_content_type(self):
         req = self._make_request()
         assert is_form_request(req) is False
+
+
+# ---------------------------------------------------------------------------
+# get_date_header
+# ---------------------------------------------------------------------------
+
+
+class TestGetDateHeader:
+    def test_format(self, monkeypatch):
+        monkeypatch.setattr(time, "time", lambda: 784111777.5)
+
+        assert get_date_header() == "Sun, 06 Nov 1994 08:49:37 GMT"
+
+    def test_only_formats_once_a_second(self, monkeypatch):
+        now = [784111777.1]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        monkeypatch.setattr(spiderweb.utils, "_date_header", (0, ""))
+        formatted = []
+        formatdate = spiderweb.utils.email.utils.formatdate
+
+        def counting_formatdate(*args, **kwargs):
+            formatted.append(args)
+            return formatdate(*args, **kwargs)
+
+        monkeypatch.setattr(
+            spiderweb.utils.email.utils, "formatdate", counting_formatdate
+        )
+
+        first = get_date_header()
+        now[0] = 784111777.9
+        assert get_date_header() is first
+        now[0] = 784111778.0
+        assert get_date_header() == "Sun, 06 Nov 1994 08:49:38 GMT"
+        assert len(formatted) == 2
+
+
+# ---------------------------------------------------------------------------
+# ResponseHeaders
+# ---------------------------------------------------------------------------
+
+
+class TestResponseHeaders:
+    def test_values_are_kept_in_wire_form(self):
+        h = ResponseHeaders()
+        h["Content-Length"] = 12
+        h.add("set-cookie", "a=1")
+        h.add("Set-Cookie", "b=2")
+
+        assert h["content-length"] == "12"
+        assert h.wsgi_items() == [
+            ("content-length", "12"),
+            ("set-cookie", "a=1"),
+            ("set-cookie", "b=2"),
+        ]
+        assert h.asgi_items() == [
+            (b"content-length", b"12"),
+            (b"set-cookie", b"a=1"),
+            (b"set-cookie", b"b=2"),
+        ]
+
+    def test_coerce(self):
+        h = ResponseHeaders({"X-One": "1"})
+        assert ResponseHeaders.coerce(h) is h
+
+        plain = Headers({"x-two": "2"})
+        plain.add("x-two", "3")
+        assert ResponseHeaders.coerce(plain).asgi_items() == [
+            (b"x-two", b"2"),
+            (b"x-two", b"3"),
+        ]
+        assert ResponseHeaders.coerce({"X_Three": 3}).wsgi_items() == [("x-three", "3")]
+
+    def test_copy_keeps_wire_form(self):
+        h = ResponseHeaders({"x-one": "1"})
+        copied = h.copy()
+        copied["x-two"] = "2"
+
+        assert copied.asgi_items() == [(b"x-one", b"1"), (b"x-two", b"2")]
+        assert h.asgi_items() == [(b"x-one", b"1")]
+
+    def test_non_latin1_values_are_rejected_when_set(self):
+        h = ResponseHeaders()
+        with pytest.raises(UnicodeEncodeError):
+            h["x-name"] = "\u2603"
@@ -1,10 +1,20 @@
+import datetime
+import email.utils
 import importlib
 import json
 import re
 import secrets
 import string
+import threading
+import time
+from collections.abc import MutableMapping
 from http import HTTPStatus
 from typing import Optional, TYPE_CHECKING
+from urllib.parse import unquote_plus
+
+from multipart import MultiDict
+
+from spiderweb.constants import DEFAULT_ENCODING
 
 if TYPE_CHECKING:
     from spiderweb.request import Request
@@ -66,39 +76,710 @@ def is_jsonable(data: str) -> bool:
         return False
 
 
-class Headers(dict):
-    # special dict that forces lowercase and snake_case for all keys
+# (second, formatted date) for the `Date` header; a tuple so that reading it
+# from any thread sees a matching pair
+_date_header: tuple[int, str] = (0, "")
+_date_header_lock = threading.Lock()
+
+
+def get_date_header() -> str:
+    """
+    The current time formatted for the `Date` header. It only changes once a
+    second, so it's formatted at most once a second and cached in between.
+    """
+    global _date_header
+    now = int(time.time())
+    cached = _date_header
+    if cached[0] != now:
+        with _date_header_lock:
+            cached = _date_header
+            if cached[0] != now:
+                cached = (now, email.utils.formatdate(now, usegmt=True))
+                _date_header = cached
+    return cached[1]
+
+
+def parse_http_date(value: Optional[str]) -> Optional[int]:
+    """
+    Turn an HTTP date (like an `If-Modified-Since` header) into a Unix
+    timestamp, or None if it's missing or can't be parsed.
+    """
+    if not value:
+        return None
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return int(date.timestamp())
+
+
+# more ranges than this in one Range header and it's ignored
+MAX_RANGES = 100
+
+
+def parse_range_header(header: str, size: int) -> Optional[list[tuple[int, int]]]:
+    """
+    Parse a `Range` header for a body of `size` bytes into a sorted list of
+    (first, last) byte positions, inclusive, with overlapping or touching
+    ranges merged. Returns None if the header should be ignored (it's
+    malformed, not in bytes, or asks for too many ranges) and an empty list
+    if none of the ranges can be satisfied.
+
+    Example:
+        >>> parse_range_header("bytes=0-99,-100", 1000)
+        [(0, 99), (900, 999)]
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+    specs = specs.split(",")
+    if len(specs) > MAX_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        first, dash, last = spec.strip().partition("-")
+        numbers = [part for part in (first, last) if part]
+        if not dash or not numbers or not all(n.isdigit() for n in numbers):
+            return None
+        if not first:
+            # suffix range: the last `last` bytes
+            suffix = int(last)
+            if suffix == 0:
+                continue
+            first, last = max(size - suffix, 0), size - 1
+        else:
+            first = int(first)
+            if last:
+                last = int(last)
+                if last < first:
+                    return None
+            else:
+                last = size - 1
+        if first >= size:
+            continue
+        ranges.append((first, min(last, size - 1)))
+    ranges.sort()
+    merged = []
+    for first, last in ranges:
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(last, merged[-1][1]))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+# Canonical names for header keys we've seen before, so that normalizing a
+# key is usually a single dict lookup.
+_CANONICAL_HEADER_NAMES: dict[str, str] = {}
+MAX_CANONICAL_HEADER_NAMES = 4096
+
+
+def canonical_header_name(name: str) -> str:
+    """
+    Normalize a header name the way Headers stores it: lowercase, with dashes,
+    and without the `HTTP_` prefix WSGI adds.
+
+    Example:
+        >>> canonical_header_name("HTTP_USER_AGENT")
+        'user-agent'
+    """
+    try:
+        return _CANONICAL_HEADER_NAMES[name]
+    except KeyError:
+        pass
+    canonical = name.lower().replace("_", "-")
+    if canonical.startswith("http-"):
+        canonical = canonical[5:]
+    if len(_CANONICAL_HEADER_NAMES) < MAX_CANONICAL_HEADER_NAMES:
+        _CANONICAL_HEADER_NAMES[name] = canonical
+    return canonical
+
+
+class Headers(MutableMapping):
+    """
+    Case-insensitive multidict for HTTP headers.
+
+    Names are normalized once, when they're added, so `Content-Type`,
+    `content_type` and `HTTP_CONTENT_TYPE` all refer to `content-type`.
+    Each name can hold several values; reading one with `[]` or `get()`
+    joins them with ", ", and `getall()` returns them separately. Assigning
+    a list sets all of the values at once. If you already have the canonical
+    name, `get_canonical()` skips the normalization.
+    """
+
+    __slots__ = ("_store",)
+
+    def __init__(self, data=None, **kwargs):
+        self._store: dict[str, list] = {}
+        if isinstance(data, Headers):
+            self._store = {k: list(v) for k, v in data._store.items()}
+        elif data:
+            items = data.items() if hasattr(data, "items") else data
+            for k, v in items:
+                self[k] = v
+        for k, v in kwargs.items():
+            self[k] = v
+
+    @classmethod
+    def from_asgi(cls, raw_headers) -> "Headers":
+        """Build from ASGI `scope["headers"]`, a list of (name, value) bytes."""
+        headers = cls()
+        store = headers._store
+        for raw_name, raw_value in raw_headers:
+            name = canonical_header_name(raw_name.decode("latin1"))
+            value = raw_value.decode("latin1")
+            if name in store:
+                store[name].append(value)
+            else:
+                store[name] = [value]
+        return headers
+
+    @classmethod
+    def from_environ(cls, environ: dict) -> "Headers":
+        """Build from the `HTTP_*`, `CONTENT_TYPE` and `CONTENT_LENGTH` keys."""
+        headers = cls()
+        store = headers._store
+        for k, v in environ.items():
+            if k.startswith("HTTP_"):
+                store[canonical_header_name(k)] = [v]
+        for k in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(k):
+                store[canonical_header_name(k)] = [environ[k]]
+        return headers
+
     def __getitem__(self, key):
-        key = key.replace("-", "_")
+        values = self._store[canonical_header_name(key)]
+        return values[0] if len(values) == 1 else ", ".join(map(str, values))
+
+    def __setitem__(self, key, value):
+        self._store[canonical_header_name(key)] = (
+            list(value) if isinstance(value, list) else [value]
+        )
+
+    def __delitem__(self, key):
+        del self._store[canonical_header_name(key)]
+
+    def __contains__(self, key):
+        return canonical_header_name(key) in self._store
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return f"Headers({self._store!r})"
+
+    def get(self, key, default=None):
+        values = self._store.get(canonical_header_name(key))
+        if values is None:
+            return default
+        return values[0] if len(values) == 1 else ", ".join(map(str, values))
+
+    def get_canonical(self, name: str, default=None):
+        """Like `get()`, but `name` must already be canonical (`user-agent`)."""
+        values = self._store.get(name)
+        if values is None:
+            return default
+        return values[0] if len(values) == 1 else ", ".join(map(str, values))
+
+    def getall(self, key) -> list:
+        """Every value for a header, in the order they were added."""
+        return list(self._store.get(canonical_header_name(key), ()))
+
+    def add(self, key, value) -> None:
+        """Add another value for a header without replacing the existing ones."""
+        name = canonical_header_name(key)
+        if name in self._store:
+            self._store[name].append(value)
+        else:
+            self._store[name] = [value]
+
+    def multi_items(self):
+        """Yield (name, value) once for every value, repeated names included."""
+        for name, values in self._store.items():
+            for value in values:
+                yield name, value
+
+    def copy(self) -> "Headers":
+        return type(self)(self)
+
+
+class ResponseHeaders(Headers):
+    """
+    Headers for a response, kept ready to send as they're set.
+
+    Values are turned into strings once, when they're added, and the
+    latin-1 encoded (name, value) pair ASGI wants is built alongside, so
+    sending the headers is just handing over a list: `wsgi_items()` for
+    `start_response` and `asgi_items()` for `http.response.start`.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, data=None, **kwargs):
+        self._raw: dict[str, list[tuple[bytes, bytes]]] = {}
+        if not isinstance(data, Headers):
+            super().__init__(data, **kwargs)
+            return
+        super().__init__()
+        for k, v in data.multi_items():
+            self.add(k, v)
+        for k, v in kwargs.items():
+            self[k] = v
+
+    @classmethod
+    def coerce(cls, headers) -> "ResponseHeaders":
+        """Use `headers` as-is if it's already ResponseHeaders, else convert it."""
+        return headers if isinstance(headers, cls) else cls(headers)
+
+    @staticmethod
+    def encode_items(items) -> tuple[tuple[str, str, tuple[bytes, bytes]], ...]:
+        """
+        Turn canonical (name, value) pairs into the (name, value, raw pair)
+        triples `from_encoded()` takes, so it can be done once up front.
+        """
+        encoded = []
+        for name, value in items:
+            value = str(value)
+            encoded.append(
+                (name, value, (name.encode("latin1"), value.encode("latin1")))
+            )
+        return tuple(encoded)
+
+    @classmethod
+    def from_encoded(cls, encoded, date: str) -> "ResponseHeaders":
+        """Build from `encode_items()` output plus a Date header."""
+        headers = cls()
+        headers._store = {name: [value] for name, value, _ in encoded}
+        headers._raw = {name: [pair] for name, _, pair in encoded}
+        headers._store["date"] = [date]
+        headers._raw["date"] = [(b"date", date.encode("latin1"))]
+        return headers
+
+    def __setitem__(self, key, value):
+        name = canonical_header_name(key)
+        values = [str(v) for v in value] if isinstance(value, list) else [str(value)]
+        raw_name = name.encode("latin1")
+        self._raw[name] = [(raw_name, v.encode("latin1")) for v in values]
+        self._store[name] = values
+
+    def __delitem__(self, key):
+        name = canonical_header_name(key)
+        del self._store[name]
+        del self._raw[name]
+
+    def add(self, key, value) -> None:
+        name = canonical_header_name(key)
+        value = str(value)
+        pair = (name.encode("latin1"), value.encode("latin1"))
+        if name in self._store:
+            self._store[name].append(value)
+            self._raw[name].append(pair)
+        else:
+            self._store[name] = [value]
+            self._raw[name] = [pair]
+
+    def wsgi_items(self) -> list[tuple[str, str]]:
+        """Every header as the (name, value) strings `start_response` takes."""
+        return [(name, v) for name, values in self._store.items() for v in values]
+
+    def asgi_items(self) -> list[tuple[bytes, bytes]]:
+        """Every header as the (name, value) bytes ASGI takes."""
+        return [pair for pairs in self._raw.values() for pair in pairs]
+
+
+_MISSING = object()
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(
+        f"{type(self).__name__} is read-only; assign a new one instead of"
+        f" changing this one."
+    )
+
+
+class ImmutableDict(dict):
+    """A dict that can't be changed. Used for shared empty values."""
+
+    __slots__ = ()
+    mutable_type = dict
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class ImmutableMultiDict(MultiDict):
+    """A MultiDict that can't be changed. Used for shared empty values."""
+
+    mutable_type = MultiDict
+
+    __setitem__ = __delitem__ = append = replace = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+def _unquote(value: str) -> str:
+    if "%" in value or "+" in value:
+        return unquote_plus(value)
+    return value
+
+
+def parse_query_string(query_string: str) -> dict[str, str | list[str]]:
+    """
+    Parse a query string into a dict. Keys that show up once map straight to
+    their value; only keys that repeat get a list. Blank values are kept.
+
+    Example:
+        >>> parse_query_string("q=spider&tag=a&tag=b&empty=")
+        {'q': 'spider', 'tag': ['a', 'b'], 'empty': ''}
+    """
+    data = {}
+    if not query_string:
+        return data
+    if not query_string.isascii():
+        # WSGI hands us the raw bytes decoded as latin-1; anything that doesn't
+        # round-trip (already proper text, say) is used as it is
         try:
-            regular = super().__getitem__(key.lower())
-        except KeyError:
-            regular = None
+            query_string = query_string.encode("latin1").decode(DEFAULT_ENCODING)
+        except UnicodeError:
+            pass
+    for pair in query_string.split("&"):
+        if not pair:
+            continue
+        name, _, value = pair.partition("=")
+        name = _unquote(name)
+        value = _unquote(value)
+        existing = data.get(name)
+        if existing is None:
+            data[name] = value
+        elif type(existing) is list:
+            existing.append(value)
+        else:
+            data[name] = [existing, value]
+    return data
+
+
+class QueryDict(MultiDict):
+    """
+    The MultiDict used for `request.GET`.
+
+    It works like any other MultiDict (`[]` and `get()` return the last
+    value, `getall()` returns all of them), but single values aren't wrapped
+    in lists, and there are typed helpers so views don't have to convert
+    values themselves.
+    """
+
+    def __init__(self, query_string: str = ""):
+        self._data = parse_query_string(query_string)
+
+    @property
+    def dict(self) -> dict[str, list[str]]:
+        return {key: self.getall(key) for key in self._data}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __str__(self):
+        return str(self.dict)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.dict!r})"
+
+    def keys(self):
+        return self._data.keys()
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        return value[-1] if type(value) is list else value
+
+    def append(self, key, value):
+        existing = self._data.get(key)
+        if existing is None:
+            self._data[key] = value
+        elif type(existing) is list:
+            existing.append(value)
+        else:
+            self._data[key] = [existing, value]
+
+    def replace(self, key, value):
+        self._data[key] = value
+
+    def getall(self, key) -> list[str]:
+        value = self._data.get(key)
+        if value is None:
+            return []
+        return list(value) if type(value) is list else [value]
+
+    def get(self, key, default=None, index=-1):
+        value = self._data.get(key)
+        if value is None:
+            return default
+        if type(value) is not list:
+            return value if index in (0, -1) else default
         try:
-            http_version = super().__getitem__(f"http_{key.lower()}")
-        except KeyError:
-            http_version = None
-        return regular or http_version
+            return value[index]
+        except IndexError:
+            return default
 
-    def __contains__(self, item):
-        item = item.lower().replace("-", "_")
+    def iterallitems(self):
+        for key, value in self._data.items():
+            if type(value) is list:
+                for item in value:
+                    yield key, item
+            else:
+                yield key, value
 
-        regular = super().__contains__(item)
-        http = super().__contains__(f"http_{item}")
+    def get_int(self, key, default: int = None) -> int | None:
+        """The last value for `key` as an int, or `default` if it isn't one."""
+        try:
+            return int(self[key])
+        except (KeyError, ValueError):
+            return default
 
-        return regular or http
+    def get_list(self, key, default: list = None) -> list[str]:
+        """Every value for `key`, or `default` (an empty list) if there aren't any."""
+        values = self.getall(key)
+        if not values and default is not None:
+            return default
+        return values
 
-    def __setitem__(self, key, value):
-        return super().__setitem__(key.lower().replace("-", "_"), value)
 
-    def get(self, key, default=None):
-        key = key.replace("-", "_")
-        regular = super().get(key.lower(), default)
-        http_version = super().get(f"http_{key.lower()}", default)
-        return regular or http_version
+class ImmutableQueryDict(QueryDict):
+    """A QueryDict that can't be changed. Used for requests without a query."""
+
+    mutable_type = QueryDict
+
+    __setitem__ = __delitem__ = append = replace = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+# CGI variables that are always in request.META, even if the server left them out
+META_FIELDS = dict.fromkeys(
+    (
+        "SERVER_PROTOCOL",
+        "SERVER_SOFTWARE",
+        "REQUEST_METHOD",
+        "PATH_INFO",
+        "QUERY_STRING",
+        "REMOTE_HOST",
+        "REMOTE_ADDR",
+        "SERVER_NAME",
+        "GATEWAY_INTERFACE",
+        "SERVER_PORT",
+        "CONTENT_LENGTH",
+        "SCRIPT_NAME",
+    )
+)
+
+
+class MetaView(MutableMapping):
+    """
+    `request.META`: the CGI variables and `HTTP_*` headers from the WSGI
+    environ, plus `client_address`. Reads go straight to the environ. The
+    first write copies everything into a dict of its own, so the environ is
+    never changed.
+    """
+
+    __slots__ = ("_environ", "_data")
+
+    def __init__(self, environ: dict):
+        self._environ = environ
+        self._data: dict | None = None
+
+    def __getitem__(self, key: str):
+        if self._data is not None:
+            return self._data[key]
+        if key in META_FIELDS:
+            return self._environ.get(key)
+        if key == "client_address":
+            return get_client_address(self._environ)
+        if key.startswith("HTTP_"):
+            return self._environ[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        if self._data is not None:
+            yield from self._data
+            return
+        yield from META_FIELDS
+        for key in self._environ:
+            if key.startswith("HTTP_"):
+                yield key
+        yield "client_address"
+
+    def __len__(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        return sum(1 for _ in self)
+
+    def _materialize(self) -> dict:
+        if self._data is None:
+            self._data = {key: self[key] for key in self}
+        return self._data
+
+    def __setitem__(self, key: str, value) -> None:
+        self._materialize()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._materialize()[key]
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CookieView(MutableMapping):
+    """
+    `request.COOKIES`, parsed from the Cookie header only as far as needed.
+    Looking up a single name scans the header from the end and stops at the
+    first match, so `COOKIES.get(name)` never builds a dict. Anything else
+    (iterating, writing) parses the whole header once. When a name shows up
+    more than once, the last one wins.
+    """
+
+    __slots__ = ("_header", "_cookies")
 
-    def setdefault(self, key, default=None):
-        return super().setdefault(key.lower(), default)
+    def __init__(self, header: str):
+        self._header = header
+        self._cookies: dict[str, str] | None = None
+
+    def _find(self, name: str):
+        header = self._header
+        if name not in header:
+            return _MISSING
+        end = len(header)
+        while True:
+            start = header.rfind(";", 0, end) + 1
+            key, sep, value = header[start:end].partition("=")
+            if sep and key.strip() == name:
+                return value.strip()
+            if not start:
+                return _MISSING
+            end = start - 1
+
+    def _parse(self) -> dict[str, str]:
+        if self._cookies is None:
+            cookies = {}
+            # Split on ';' and be tolerant of optional spaces and malformed segments
+            for segment in self._header.split(";"):
+                name, sep, value = segment.partition("=")  # only split on first '='
+                if not sep:
+                    # Ignore flag-like segments that don't conform to name=value
+                    continue
+                cookies[name.strip()] = value.strip()
+            self._cookies = cookies
+        return self._cookies
+
+    def __getitem__(self, name: str) -> str:
+        if self._cookies is not None:
+            return self._cookies[name]
+        value = self._find(name)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def get(self, name: str, default=None):
+        if self._cookies is not None:
+            return self._cookies.get(name, default)
+        value = self._find(name)
+        return default if value is _MISSING else value
+
+    def __contains__(self, name) -> bool:
+        if self._cookies is not None:
+            return name in self._cookies
+        return isinstance(name, str) and self._find(name) is not _MISSING
+
+    def __iter__(self):
+        return iter(self._parse())
+
+    def __len__(self) -> int:
+        return len(self._parse())
+
+    def __setitem__(self, name: str, value: str) -> None:
+        self._parse()[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        del self._parse()[name]
+
+    def __repr__(self) -> str:
+        return repr(self._parse())
+
+
+# Shared by every request that doesn't have any cookies / form data / etc.
+EMPTY_DICT = ImmutableDict()
+EMPTY_MULTIDICT = ImmutableMultiDict()
+EMPTY_QUERYDICT = ImmutableQueryDict()
+SHARED_EMPTY_TYPES = frozenset((ImmutableDict, ImmutableMultiDict, ImmutableQueryDict))
+
+
+class CopyOnWrite(MutableMapping):
+    """
+    Stands in for one of the shared empty values on a single request. Reads go
+    to the shared value; the first write swaps in a fresh mutable copy, both
+    here and in `owner.attr`, so middleware can fill in `request.POST` or
+    `request.COOKIES` without anyone else seeing it.
+    """
+
+    __slots__ = ("_target", "_owner", "_attr")
+
+    def __init__(self, target, owner, attr: str):
+        self._target = target
+        self._owner = owner
+        self._attr = attr
+
+    def _writable(self):
+        if type(self._target) in SHARED_EMPTY_TYPES:
+            self._target = self._target.mutable_type()
+            setattr(self._owner, self._attr, self._target)
+        return self._target
+
+    def __getattr__(self, name: str):
+        # get_int(), getall(), dict and anything else read-only
+        return getattr(self._target, name)
+
+    def __getitem__(self, key):
+        return self._target[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._writable()[key] = value
+
+    def __delitem__(self, key) -> None:
+        del self._writable()[key]
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __len__(self) -> int:
+        return len(self._target)
+
+    def __contains__(self, key) -> bool:
+        return key in self._target
+
+    def __eq__(self, other) -> bool:
+        return self._target == other
+
+    def __repr__(self) -> str:
+        return repr(self._target)
+
+    def get(self, *args, **kwargs):
+        return self._target.get(*args, **kwargs)
+
+    def append(self, key, value) -> None:
+        self._writable().append(key, value)
+
+    def replace(self, key, value) -> None:
+        self._writable().replace(key, value)
 
 
 def convert_url_to_regex(url: str | re.Pattern) -> re.Pattern:
@@ -107,3 +788,70 @@ def convert_url_to_regex(url: str | re.Pattern) -> re.Pattern:
     url = url.replace(".", "\\.")
     url = url.replace("*", ".+")
     return re.compile(url)
+
+
+def get_hostname(host: str) -> str:
+    """Lowercase a Host header value and strip the port off of it."""
+    host = host.lower()
+    if host.startswith("["):
+        # IPv6 literal, like [::1]:8000
+        return host[: host.find("]") + 1] or host
+    if host.count(":") == 1:
+        return host.split(":", 1)[0]
+    return host
+
+
+class HostMatcher:
+    """
+    Checks Host headers against `allowed_hosts`.
+
+    Plain hostnames are kept in a set and every wildcard (`*.example.com`) is
+    folded into one anchored regex. Hosts are compared without their port, but
+    an entry that includes a port also matches the full header. Compiled
+    patterns are matched against the raw header, same as they always have been.
+    Results are remembered per Host header value.
+    """
+
+    # keeps the memo from growing without bound if clients send junk hosts
+    MAX_MEMO_SIZE = 1024
+
+    def __init__(self, allowed_hosts: list[str | re.Pattern]):
+        self.allow_all = False
+        self.exact: set[str] = set()
+        self.patterns: list[re.Pattern] = []
+        wildcards = []
+        for host in allowed_hosts:
+            if isinstance(host, re.Pattern):
+                self.patterns.append(host)
+            elif host == "*":
+                self.allow_all = True
+            elif "*" in host:
+                wildcards.append(re.escape(host.lower()).replace(r"\*", ".+"))
+            else:
+                self.exact.add(host.lower())
+        self.wildcard = re.compile("|".join(wildcards)) if wildcards else None
+        self._memo: dict[str, bool] = {}
+
+    def is_allowed(self, host: str) -> bool:
+        if self.allow_all:
+            return True
+        try:
+            return self._memo[host]
+        except KeyError:
+            pass
+        allowed = self._check(host)
+        if len(self._memo) >= self.MAX_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[host] = allowed
+        return allowed
+
+    def _check(self, host: str) -> bool:
+        hostname = get_hostname(host)
+        full_host = host.lower()
+        if hostname in self.exact or full_host in self.exact:
+            return True
+        if self.wildcard is not None and (
+            self.wildcard.fullmatch(hostname) or self.wildcard.fullmatch(full_host)
+        ):
+            return True
+        return any(pattern.match(host) for pattern in self.patterns)